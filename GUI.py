@@ -1,25 +1,328 @@
 import tkinter as tk
-from tkinter import messagebox, ttk, simpledialog
+from tkinter import messagebox, ttk, simpledialog, filedialog
 from main_classes import *
+from itertools import islice
+import os
+import queue
 import random
+import threading
+import time
+
+class VirtualTable:
+    """A table that only creates Treeview rows for the part of the data scrolled into view.
+
+    The rows are given as a list of keys plus a function that returns the column values for a key. Only the
+    visible window of rows exists in the Treeview, and the values of a few rows above and below it are cached
+    so scrolling fetches new rows as they come into view instead of rebuilding the whole table. A single
+    added, modified or deleted record is applied with upsert_row/remove_row, which only touch its own row.
+    """
+    def __init__(self, parent, columns, row_values, height=15, buffer=15):
+        self.frame = tk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=[column for column, heading in columns], show="headings",
+                                 height=height, selectmode="browse")
+        self.headings = dict(columns)
+        for column, heading in columns:
+            self.tree.heading(column, text=heading, command=lambda column=column: self._heading_clicked(column))
+        # Called with (column position, descending) when a heading is clicked
+        self.on_heading = None
+        self.sort_column = None
+        self.sort_descending = False
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.yview)
+        self.tree.pack(side=tk.LEFT, expand=True, fill='both')
+        self.scrollbar.pack(side=tk.RIGHT, fill='y')
+
+        self.row_values = row_values
+        self.height = height
+        self.buffer = buffer
+        self._keys = []
+        self.top = 0
+        self._key_set = set()
+        # Keys removed while out of view; they stay in _keys until the list is next used, then go in one pass
+        self._removed = set()
+        self._cache = {}
+        # Maps the keys in the visible window to their Treeview item IDs and back
+        self._items = {}
+        self._shown = {}
+        self._selected = None
+
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(sequence, self._on_mouse_wheel)
+        self.tree.bind("<Up>", lambda event: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda event: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda event: self._move_selection(-self.height))
+        self.tree.bind("<Next>", lambda event: self._move_selection(self.height))
+
+    def pack(self, **options):
+        self.frame.pack(**options)
+
+    @property
+    def keys(self):
+        "The keys shown, in order"
+        self._compact()
+        return self._keys
+
+    def set_rows(self, keys):
+        "Shows the given keys in order, starting again from the top"
+        # The ID table of a MappedStore is shown as it is rather than copied; such a table is read-only, so
+        # upsert_row and remove_row are never used with it
+        self._keys = keys if isinstance(keys, memoryview) else list(keys)
+        self._key_set = set() if isinstance(keys, memoryview) else set(self._keys)
+        self._removed = set()
+        self.top = 0
+        self._cache.clear()
+        self._selected = None
+        self._render()
+
+    def upsert_row(self, key):
+        "Refreshes the row of an existing key, or adds a new key at the end of the table"
+        self._cache.pop(key, None)
+        if key in self._items:
+            self.tree.item(self._items[key], values=self._row(key))
+        elif key in self._removed:
+            # Removed out of view and added again before the list was compacted: it keeps its place
+            self._removed.discard(key)
+            self._key_set.add(key)
+            self._update_scrollbar()
+        elif key not in self._key_set:
+            self._keys.append(key)
+            self._key_set.add(key)
+            if self._count() <= self.top + self.height:
+                self._compact()
+                self._insert_item(key)
+            self._update_scrollbar()
+
+    def remove_row(self, key):
+        "Removes a key from the table, deleting its row if it is in the visible window"
+        if key not in self._key_set:
+            return
+        self._key_set.discard(key)
+        self._cache.pop(key, None)
+        if self._selected == key:
+            self._selected = None
+
+        if key in self._items:
+            # A visible row's position comes from the window, not from searching the whole list
+            self._compact()
+            iid = self._items.pop(key)
+            del self._keys[self.top + self.tree.index(iid)]
+            del self._shown[iid]
+            self.tree.delete(iid)
+            # The row below the window moves up into the free place
+            if self.top + self.height - 1 < len(self._keys):
+                self._insert_item(self._keys[self.top + self.height - 1])
+        else:
+            # Rows out of view are only marked, so removing many of them costs one pass over the list
+            self._removed.add(key)
+        self._update_scrollbar()
+
+    def refresh(self, exists):
+        "Redraws every row from the current records, dropping the keys exists() rejects, without scrolling"
+        self._keys = [key for key in self._keys if key not in self._removed and exists(key)]
+        self._key_set = set(self._keys)
+        self._removed = set()
+        if self._selected not in self._key_set:
+            self._selected = None
+        self.top = max(0, min(self.top, len(self.keys) - self.height))
+        self._cache.clear()
+        self._render()
+
+    def selected_key(self):
+        return self._selected
+
+    def yview(self, *args):
+        # Called by the scrollbar with ("moveto", fraction) or ("scroll", amount, "units" or "pages")
+        if args[0] == "moveto":
+            top = int(float(args[1]) * len(self.keys))
+        else:
+            top = self.top + int(args[1]) * (self.height if args[2] == "pages" else 1)
+        self._scroll_to(top)
+
+    def _scroll_to(self, top):
+        top = max(0, min(top, len(self.keys) - self.height))
+        if top != self.top:
+            self.top = top
+            self._render()
+
+    def _count(self):
+        return len(self._keys) - len(self._removed)
+
+    def _compact(self):
+        # Takes the keys removed out of view out of the list, moving the window up by those above it
+        if self._removed:
+            removed = self._removed
+            self.top -= sum(1 for key in islice(self._keys, self.top) if key in removed)
+            self._keys = [key for key in self._keys if key not in removed]
+            self._removed = set()
+
+    def _row(self, key):
+        if key not in self._cache:
+            self._cache[key] = self.row_values(key)
+        return self._cache[key]
+
+    def _insert_item(self, key):
+        iid = str(key)
+        self._items[key] = iid
+        self._shown[iid] = key
+        self.tree.insert("", "end", iid=iid, values=self._row(key))
+
+    def _render(self):
+        self.tree.delete(*self.tree.get_children())
+        self._items = {}
+        self._shown = {}
+        for key in self.keys[self.top:self.top + self.height]:
+            self._insert_item(key)
+
+        # Fetches the rows just outside the window ahead of time and forgets the ones further away
+        buffered = self.keys[max(0, self.top - self.buffer):self.top + self.height + self.buffer]
+        self._cache = {key: self._row(key) for key in buffered}
+
+        if self._selected in self._items:
+            self.tree.selection_set(self._items[self._selected])
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        total = self._count()
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + self.height) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _heading_clicked(self, column):
+        # A second click on the same heading reverses the order; the arrow shows the current one
+        if self.on_heading is None:
+            return
+        self.sort_descending = self.sort_column == column and not self.sort_descending
+        self.sort_column = column
+        for name, heading in self.headings.items():
+            arrow = (" \u25bc" if self.sort_descending else " \u25b2") if name == column else ""
+            self.tree.heading(name, text=heading + arrow)
+        self.on_heading(list(self.headings).index(column), self.sort_descending)
+
+    def _on_select(self, event):
+        # Rows scrolled out of view are deleted from the Treeview, which must not clear the selected key
+        selection = self.tree.selection()
+        if selection:
+            self._selected = self._shown[selection[0]]
+
+    def _on_mouse_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.yview("scroll", -3, "units")
+        else:
+            self.yview("scroll", 3, "units")
+        return "break"
+
+    def _move_selection(self, step):
+        # Moves the selection with the keyboard, scrolling the window when it reaches the edge
+        if not self.keys:
+            return "break"
+        if self._selected in self._items:
+            position = self.top + self.tree.index(self._items[self._selected]) + step
+        else:
+            position = self.top
+        position = max(0, min(position, len(self.keys) - 1))
+        if position < self.top:
+            self._scroll_to(position)
+        elif position >= self.top + self.height:
+            self._scroll_to(position - self.height + 1)
+        self._selected = self.keys[position]
+        self.tree.selection_set(self._items[self._selected])
+        self.tree.see(self._items[self._selected])
+        return "break"
+
 
 class CompanySystemGUI:
     "This represents the user interface for the company's system to operate in"
-    def __init__(self, master):
+    def __init__(self, master, database=None, autosave_ms=AUTOSAVE_EVERY_MS, autosave_changes=AUTOSAVE_EVERY_CHANGES,
+                 binary=False, read_only=False, shared=False):
 
+        self.startup_started = time.perf_counter()
         self.master = master
         self.master.title("Company Management System")
 
         # Loads data from storage, handles any potential errors if data are missing.
-        self.employees = load_data("employees.pkl")
-        self.clients_events = load_data("clients_events.pkl")
-        self.events = load_data("events.pkl")
-        self.suppliers = load_data("suppliers.pkl")
-        self.guests = load_data("guests.pkl")
-        self.venues = load_data("venues.pkl")
+        # Every change goes through the service, which validates it, keeps the indexes up to date and saves it.
+        # Shared, it saves at once and picks up what other copies of the program save to the same files.
+        self.service = CompanyService(database, binary, read_only, autosave_ms, autosave_changes, shared)
+        self.employees = self.service.employees
+        self.clients_events = self.service.clients_events
+        self.events = self.service.events
+        self.suppliers = self.service.suppliers
+        self.guests = self.service.guests
+        self.venues = self.service.venues
+        if read_only:
+            for action in ("add_employee", "delete_employee", "modify_employee", "add_client", "delete_client",
+                           "modify_client", "add_event", "delete_event", "modify_event", "add_supplier",
+                           "delete_supplier", "modify_supplier", "add_guest", "delete_guest", "modify_guest",
+                           "add_venue", "delete_venue", "modify_venue", "import_file"):
+                setattr(self, action, self.show_read_only)
+
+        # Changes are written to disk by the service's background thread so the window never waits for a save.
+        # Its autosaver batches them: edits reach the writer every autosave_ms, every autosave_changes
+        # changes, and when the window is closed.
+        self.master.after(200, self.poll_persistence)
+        self.master.after(autosave_ms, self.autosave_tick)
+        self.master.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Name and contact search indexes, built in the background the first time a screen with a search box opens
+        self.search_indexes = {}
+        self.search_indexing = set()
+        # Sorted column indexes, keyed by (store, column position), built the first time a column is sorted or filtered
+        self.column_indexes = {}
+        self.service.listeners.append(self.update_indexes)
+        # The table of each store on the screen, refreshed when another copy of the program changes the store
+        self.tables = {}
 
         # Setup the initial user interface when launching the program.
         self.setup_welcome_frame()
+        self.master.after_idle(self.report_startup_time)
+
+    def poll_persistence(self):
+        # Reports writes that failed on the persistence thread, then checks again
+        while not self.service.writer.completed.empty():
+            file_path, error = self.service.writer.completed.get()
+            if error:
+                messagebox.showerror("Error", f"Failed to save {file_path}: {error}")
+        self.master.after(200, self.poll_persistence)
+
+    def show_read_only(self, *args):
+        # Takes the place of every action that would change a store when the data was opened read-only
+        messagebox.showerror("Error", "The data is opened read-only and can't be changed.")
+
+    def autosave_tick(self):
+        # Runs every autosave_ms, so no change stays unsaved for longer than that (or, when the data is shared,
+        # other copies' changes aren't shown later than that)
+        if self.service.autosave.is_dirty():
+            self.service.flush()
+        if self.service.shared:
+            self.show_changes(self.service.refresh())
+        self.master.after(self.service.autosave.every_ms, self.autosave_tick)
+
+    def show_changes(self, changes):
+        # Updates the rows of records other copies of the program changed, if their table is on the screen
+        for collection, key in changes:
+            table = self.tables.get(collection)
+            if table is None or not table.tree.winfo_exists():
+                continue
+            if key is None:
+                table.refresh(getattr(self, collection).__contains__)
+            elif key in getattr(self, collection):
+                table.upsert_row(key)
+            else:
+                table.remove_row(key)
+
+    def on_close(self):
+        # Writes every pending change before the window goes away
+        self.service.close()
+        self.master.destroy()
+
+    def report_startup_time(self):
+        # Prints how long it took until the first window could be drawn and which stores had to be loaded for it
+        loaded = [store.file_path for store in (self.employees, self.clients_events, self.events, self.suppliers,
+                                                self.guests, self.venues)
+                  if isinstance(store, LazyStore) and store.is_loaded()]
+        print(f"Time to first window: {(time.perf_counter() - self.startup_started) * 1000:.1f} ms "
+              f"(stores loaded: {', '.join(loaded) or 'none'})")
 
     def setup_welcome_frame(self):
         # Set up the welcome frame that allows users to select their role to enter the program.
@@ -102,17 +405,28 @@ class CompanySystemGUI:
         tk.Label(self.management_frame, text="Best Events Management System",
                  font=("Arial", 16, "bold")).pack(pady=20)
 
-        self.employee_tree = ttk.Treeview(self.management_frame,
-                                          columns=("ID", "Name", "Department", "Job Title", "Basic Salary", "Manager ID"),
-                                          show="headings")
-
-        self.employee_tree.heading("ID", text="Employee ID")
-        self.employee_tree.heading("Name", text="Name")
-        self.employee_tree.heading("Department", text="Department")
-        self.employee_tree.heading("Job Title", text="Job Title")
-        self.employee_tree.heading("Basic Salary", text="Basic Salary")
-        self.employee_tree.heading("Manager ID", text="Manager ID")
+        # Filter row above the table, answered from the employee index
+        filter_frame = tk.Frame(self.management_frame)
+        filter_frame.pack(padx=10, fill='x')
+        tk.Label(filter_frame, text="Filter by:").pack(side=tk.LEFT)
+        self.employee_filter_var = tk.StringVar(value="All")
+        filter_dropdown = ttk.Combobox(filter_frame, textvariable=self.employee_filter_var, state="readonly",
+                                       values=("All", "Department", "Job Title", "Manager ID"), width=12)
+        filter_dropdown.pack(side=tk.LEFT, padx=5)
+        self.employee_filter_value_var = tk.StringVar()
+        self.employee_filter_value = ttk.Combobox(filter_frame, textvariable=self.employee_filter_value_var)
+        self.employee_filter_value.pack(side=tk.LEFT, padx=5)
+        filter_dropdown.bind("<<ComboboxSelected>>", self.employee_filter_selected)
+        tk.Button(filter_frame, text="Apply Filter", command=self.filter_employees).pack(side=tk.LEFT, padx=5)
+
+        self.employee_tree = VirtualTable(self.management_frame,
+                                          columns=[("ID", "Employee ID"), ("Name", "Name"),
+                                                   ("Department", "Department"), ("Job Title", "Job Title"),
+                                                   ("Basic Salary", "Basic Salary"), ("Manager ID", "Manager ID")],
+                                          row_values=self.employee_row)
         self.employee_tree.pack(padx=10, pady=10, expand=True, fill='both')
+        self.build_search_box("employees", self.employee_tree, self.update_employee_tree)
+        self.build_column_filter("employees", self.employee_tree, self.update_employee_tree)
 
         # User-interactive buttons below the employee table
         tk.Button(self.management_frame, text="Add Employee", command=self.add_employee).pack(side=tk.LEFT, padx=10,
@@ -123,32 +437,51 @@ class CompanySystemGUI:
                                                                                                     padx=10, pady=10)
         tk.Button(self.management_frame, text="Display Employee Details", command=self.display_employee).pack(
             side=tk.LEFT, padx=10, pady=10)
+        tk.Button(self.management_frame, text="Import Employees",
+                  command=lambda: self.import_file("employees")).pack(side=tk.LEFT, padx=10, pady=10)
+        tk.Button(self.management_frame, text="Export Employees",
+                  command=lambda: self.export_file("employees")).pack(side=tk.LEFT, padx=10, pady=10)
         tk.Button(self.management_frame, text="Back to Menu", command=self.display_main_menu).pack(side=tk.LEFT,
                                                                                                    padx=10, pady=10)
 
         self.update_employee_tree()
 
     def update_employee_tree(self):
-        self.employee_tree.delete(*self.employee_tree.get_children())
-        for emp_id, emp in self.employees.items():
-            emp_data = {
-                "ID": emp._employee_ID,
-                "Name": emp._name,
-                "Department": emp._department,
-                "Job Title": emp._job_title.value,
-                "Basic Salary": emp._basic_salary,
-                "Manager ID": emp._manager_ID if emp._manager_ID else "None"
-            }
-
-            # Ensure order matches the treeview column order
-            self.employee_tree.insert("", "end", values=[
-                emp_data["ID"],  # ID
-                emp_data["Name"],  # Name
-                emp_data["Department"],  # Department
-                emp_data["Job Title"],  # Job Title
-                emp_data["Basic Salary"],  # Basic Salary
-                emp_data["Manager ID"],  # Manager ID
-            ])
+        self.employee_tree.set_rows(self.employees.keys())
+
+    def employee_filter_selected(self, event):
+        # Offers the values that currently exist in the index for the chosen filter
+        field = self.employee_filter_var.get()
+        if field == "Department":
+            values = self.service.employee_index().departments()
+        elif field == "Job Title":
+            values = self.service.employee_index().job_titles()
+        elif field == "Manager ID":
+            values = self.service.employee_index().managers()
+        else:
+            values = []
+        self.employee_filter_value["values"] = values
+        self.employee_filter_value_var.set("")
+
+    def filter_employees(self):
+        field = self.employee_filter_var.get()
+        value = self.employee_filter_value_var.get().strip()
+        if field == "All" or not value:
+            self.update_employee_tree()
+            return
+        if field == "Department":
+            emp_ids = self.service.employee_index().by_department(value)
+        elif field == "Job Title":
+            emp_ids = self.service.employee_index().by_job_title(value)
+        else:
+            emp_ids = self.service.employee_index().by_manager(value)
+        self.employee_tree.set_rows(sorted(emp_ids))
+
+    def employee_row(self, emp_id):
+        # Column values of one employee, in the same order as the table columns
+        emp = self.employees[emp_id]
+        return (emp._employee_ID, emp._name, emp._department, emp._job_title.value, emp._basic_salary,
+                emp._manager_ID if emp._manager_ID else "None")
 
     # Function that adds a new employee to the database (activated once the user presses add employee) The format below
     # will be applied to other sections as well due to time constraints
@@ -157,7 +490,7 @@ class CompanySystemGUI:
         add_window.title("Add New Employee")
 
         # Generates the next unique employee ID
-        next_id = max(self.employees.keys(), default=0) + 1
+        next_id = self.service.next_id("employees")
 
         # Name entry
         tk.Label(add_window, text="Name:").grid(row=0, column=0, padx=5, pady=5)
@@ -198,53 +531,38 @@ class CompanySystemGUI:
                                                                                pady=10)
 
     def save_new_employee(self, add_window, employee_ID, name, department, job_title, manager_ID, basic_salary):
-        # Check if the job_title is empty
-        if not job_title:
-            messagebox.showerror("Error", "Job Title cannot be empty!")
+        # Checks the fields with the same rules the bulk importer uses
+        try:
+            self.service.add_employee(employee_ID, name, department, job_title, manager_ID, basic_salary)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
             return
 
-        # Check if the manager ID is empty
-        if manager_ID.strip() == "":
-            manager_ID = None
-
-        # Check if the job title selected exists in the EmployeeType enum
-        job_title_enum = job_title.replace(' ', '_').upper()
-        if job_title_enum not in EmployeeType.__members__:
-            # Provide a default job title if the selected one doesn't match any of the enum members
-            job_title_enum = "DEFAULT"
-
-        employee_type_ENUM = EmployeeType[job_title_enum]
-
-        if name and department:
-            new_emp = Employee(employee_ID, name, department, employee_type_ENUM, basic_salary, manager_ID)
-            self.employees[employee_ID] = new_emp
-            save_data(self.employees, "employees.pkl")
-            self.update_employee_tree()
-            add_window.destroy()
-            messagebox.showinfo("Success", "Employee added successfully")
-        else:
-            messagebox.showerror("Error", "All fields are required!")
+        self.employee_tree.upsert_row(employee_ID)
+        add_window.destroy()
+        messagebox.showinfo("Success", "Employee added successfully")
 
     def delete_employee(self):
-        selected_item = self.employee_tree.selection()
-        # Generates the next unique employee ID
-        next_id = max(self.employees.keys(), default=0) - 1
-        if selected_item:
-            emp_id = int(self.employee_tree.item(selected_item, 'values')[0])
+        emp_id = self.employee_tree.selected_key()
+        if emp_id is not None:
             if messagebox.askyesno("Confirm", "Do you want to delete this employee?"):
-                del self.employees[emp_id]
-                save_data(self.employees, "employees.pkl")
-                self.update_employee_tree()
+                try:
+                    self.service.delete_employee(emp_id)
+                except RecordNotFoundError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                self.employee_tree.remove_row(emp_id)
                 messagebox.showinfo("Success", "Employee deleted successfully")
         else:
             messagebox.showerror("Error", "No employee selected")
 
     def modify_employee(self):
-        selected_item = self.employee_tree.selection()
-        if selected_item:
-            emp_id = int(self.employee_tree.item(selected_item, 'values')[0])
+        emp_id = self.employee_tree.selected_key()
+        if emp_id is not None:
             employee = self.employees.get(emp_id)
             if employee:
+                # Saving is refused if someone else changes the employee while the form is open
+                version = self.service.version("employees", emp_id)
                 modify_window = tk.Toplevel()  # Create a new top-level window
                 modify_window.title("Modify Employee Details")
 
@@ -267,10 +585,9 @@ class CompanySystemGUI:
                 # Job Title Dropdown
                 job_title_label = tk.Label(modify_window, text="Job Title:")
                 job_title_label.grid(row=3, column=0)
-                job_title_var = tk.StringVar(value=employee._job_title)
+                job_title_var = tk.StringVar(value=employee._job_title.value)
                 job_title_dropdown = ttk.Combobox(modify_window, textvariable=job_title_var, state="readonly",
-                                                  values=["Sales Manager", "Salesperson", "Marketing Manager",
-                                                          "Marketers", "Accountants", "Designers", "Handymen"])
+                                                  values=[jt.value for jt in EmployeeType])
                 job_title_dropdown.grid(row=3, column=1)
 
                 # Basic Salary Entry with Validation (Example)
@@ -290,7 +607,8 @@ class CompanySystemGUI:
 
                 # Apply Changes Button with Validation Call
                 button = tk.Button(modify_window, text="Apply Changes",
-                                   command=lambda: self.apply_employee_changes(modify_window, emp_id, name_entry.get(),
+                                   command=lambda: self.apply_employee_changes(modify_window, emp_id, version,
+                                                                               name_entry.get(),
                                                                                department_var.get(),
                                                                                job_title_var.get(),
                                                                                basic_salary_entry.get(),
@@ -304,26 +622,18 @@ class CompanySystemGUI:
         else:
             messagebox.showerror("Error", "No employee selected")
 
-    def apply_employee_changes(self, modify_window, emp_id, name, department, job_title, basic_salary, manager_ID):
-        employee = self.employees.get(emp_id)
-        if employee:
-            if name and department and job_title and basic_salary:
-                # Update the employee's details
-                employee._name = name
-                employee._department = department
-                employee._job_title = EmployeeType[job_title.replace(' ', '_').upper()]
-                employee._basic_salary = int(basic_salary)
-                employee._manager_ID = manager_ID
-                # Save the updated data
-                save_data(self.employees, "employees.pkl")
-                # Update the treeview to reflect changes
-                self.update_employee_tree()
-                modify_window.destroy()
-                messagebox.showinfo("Success", "Employee details updated successfully")
-            else:
-                messagebox.showerror("Error", "All fields are required")
-        else:
-            messagebox.showerror("Error", "Employee not found")
+    def apply_employee_changes(self, modify_window, emp_id, version, name, department, job_title, basic_salary,
+                               manager_ID):
+        try:
+            self.service.modify_employee(emp_id, name, department, job_title, manager_ID, basic_salary,
+                                         version=version)
+        except (ValueError, RecordNotFoundError, ConflictError) as e:
+            messagebox.showerror("Error", str(e))
+            return
+        # Update the treeview to reflect changes
+        self.employee_tree.upsert_row(emp_id)
+        modify_window.destroy()
+        messagebox.showinfo("Success", "Employee details updated successfully")
 
     def display_employee(self):
         emp_id = simpledialog.askinteger("Display Employee", "Enter Employee ID:")
@@ -338,6 +648,265 @@ class CompanySystemGUI:
         else:
             messagebox.showerror("Error", "Invalid Employee ID")
 
+    def build_date_filter(self, date_index, table, show_all):
+        # Date range row shown above a table, answered from the date index of its store
+        filter_frame = tk.Frame(self.management_frame)
+        filter_frame.pack(padx=10, fill='x', before=table.frame)
+        tk.Label(filter_frame, text="From (yyyy-mm-dd):").pack(side=tk.LEFT)
+        from_entry = tk.Entry(filter_frame, width=12)
+        from_entry.pack(side=tk.LEFT, padx=5)
+        tk.Label(filter_frame, text="To (yyyy-mm-dd):").pack(side=tk.LEFT)
+        to_entry = tk.Entry(filter_frame, width=12)
+        to_entry.pack(side=tk.LEFT, padx=5)
+        tk.Button(filter_frame, text="Filter by Date",
+                  command=lambda: self.filter_by_date(date_index, table, from_entry.get(), to_entry.get(),
+                                                      show_all)).pack(side=tk.LEFT, padx=5)
+        tk.Button(filter_frame, text="Next 7 Days",
+                  command=lambda: table.set_rows(date_index.next_days(7))).pack(side=tk.LEFT, padx=5)
+
+    def build_search_box(self, collection, table, show_all):
+        # Search row shown above a table; the results follow the text as it is typed
+        search_frame = tk.Frame(table.frame.master)
+        search_frame.pack(padx=10, fill='x', before=table.frame)
+        tk.Label(search_frame, text="Search name or contact:").pack(side=tk.LEFT)
+        query = tk.StringVar()
+        tk.Entry(search_frame, textvariable=query, width=30).pack(side=tk.LEFT, padx=5)
+        status = tk.Label(search_frame, text="")
+        status.pack(side=tk.LEFT, padx=5)
+
+        # Each keystroke restarts the delay, so the search only runs once typing pauses
+        pending = []
+
+        def schedule(*args):
+            if pending:
+                self.master.after_cancel(pending.pop())
+            pending.append(self.master.after(SEARCH_DELAY_MS, run))
+
+        def run():
+            pending.clear()
+            if not table.tree.winfo_exists():
+                return
+            text = query.get()
+            if not text.strip():
+                status.config(text="")
+                show_all()
+                return
+            store = getattr(self, collection)
+            if isinstance(store, SQLiteCollection):
+                # The database answers the search itself, so no text is loaded into memory
+                keys = store.search(text)
+            else:
+                # The index is only built once something is searched; the search runs again when it is complete
+                if collection not in self.search_indexes:
+                    self.build_search_index(collection, on_done=run)
+                keys = self.search_indexes[collection].search(text)
+            table.set_rows(keys)
+            status.config(text=f"{len(keys)}{'+' if len(keys) >= SEARCH_LIMIT else ''} "
+                               f"match{'' if len(keys) == 1 else 'es'}"
+                               + (" (still indexing)" if collection in self.search_indexing else ""))
+
+        query.trace_add("write", schedule)
+
+    def build_search_index(self, collection, on_done=None):
+        # Indexes a store a chunk at a time between Tk events, so a large store never freezes the window.
+        # Searches made in the meantime only see the records indexed so far; on_done is called at the end.
+        store = getattr(self, collection)
+        index = self.search_indexes[collection] = TextSearchIndex()
+        keys = iter(list(store.keys()))
+        self.search_indexing.add(collection)
+
+        def index_chunk():
+            chunk = list(islice(keys, SEARCH_INDEX_CHUNK))
+            # Records deleted since the keys were listed are skipped; changed ones are re-read by add()
+            index.add_many((key, store[key]) for key in chunk if key in store)
+            if chunk:
+                self.master.after(1, index_chunk)
+            else:
+                self.search_indexing.discard(collection)
+                if on_done is not None:
+                    on_done()
+
+        index_chunk()
+
+    def build_column_filter(self, collection, table, show_all):
+        # Click-to-sort headings and a filter on any one column, both answered from sorted column indexes
+        self.tables[collection] = table
+        table.on_heading = lambda position, descending: self.sort_table(collection, table, position, descending)
+        filter_frame = tk.Frame(table.frame.master)
+        filter_frame.pack(padx=10, fill='x', before=table.frame)
+        tk.Label(filter_frame, text="Column:").pack(side=tk.LEFT)
+        column_var = tk.StringVar(value=list(table.headings.values())[0])
+        ttk.Combobox(filter_frame, textvariable=column_var, state="readonly", values=list(table.headings.values()),
+                     width=15).pack(side=tk.LEFT, padx=5)
+        tk.Label(filter_frame, text="Value (or from..to):").pack(side=tk.LEFT)
+        value_entry = tk.Entry(filter_frame, width=20)
+        value_entry.pack(side=tk.LEFT, padx=5)
+        tk.Button(filter_frame, text="Filter Column",
+                  command=lambda: self.filter_column(collection, table, list(table.headings.values()).index(
+                      column_var.get()), value_entry.get(), show_all)).pack(side=tk.LEFT, padx=5)
+
+    def column_index(self, collection, table, position):
+        # Built from the table's own row values the first time a column is sorted or filtered
+        if (collection, position) not in self.column_indexes:
+            self.column_indexes[collection, position] = ColumnIndex(
+                getattr(self, collection).keys(), lambda key: table.row_values(key)[position])
+        return self.column_indexes[collection, position]
+
+    def sort_table(self, collection, table, position, descending):
+        index = self.column_index(collection, table, position)
+        # A table showing every record takes the index order as it is; a filtered one is ordered by it
+        if len(table.keys) == len(getattr(self, collection)):
+            table.set_rows(index.ordered(descending))
+        else:
+            table.set_rows(index.sort(table.keys, descending))
+
+    def filter_column(self, collection, table, position, text, show_all):
+        if not text.strip():
+            show_all()
+            return
+        table.set_rows(self.column_index(collection, table, position).matching(text.strip()))
+
+    def update_indexes(self, collection, key):
+        # Keeps the built search and column indexes of a store in step with an added, modified or deleted record
+        store = getattr(self, collection)
+        index = self.search_indexes.get(collection)
+        if index is not None:
+            if key in store:
+                index.add(key, store[key])
+            else:
+                index.remove(key)
+        for (indexed_collection, position), column_index in self.column_indexes.items():
+            if indexed_collection == collection:
+                if key in store:
+                    column_index.add(key)
+                else:
+                    column_index.remove(key)
+
+    def filter_by_date(self, date_index, table, start, end, show_all):
+        start, end = start.strip(), end.strip()
+        if not start and not end:
+            show_all()
+            return
+        if (start and parse_date(start) is None) or (end and parse_date(end) is None):
+            messagebox.showerror("Error", "Dates must be in the format yyyy-mm-dd")
+            return
+        table.set_rows(date_index.between(start or None, end or None))
+
+    def display_booking_conflicts(self):
+        # Lists every pair of overlapping bookings across the whole store
+        conflicts = self.service.venue_bookings().find_all_conflicts()
+        if conflicts:
+            details = "\n".join(f"{venue}: {first[0]} {first[1]} overlaps {second[0]} {second[1]}"
+                                for venue, first, second in conflicts)
+            messagebox.showinfo("Booking Conflicts", details)
+        else:
+            messagebox.showinfo("Booking Conflicts", "No venue is double-booked")
+
+    def import_file(self, collection):
+        # Bulk-imports guests, suppliers or employees from a CSV or JSON-lines file chosen by the user
+        source_path = filedialog.askopenfilename(title="Import " + collection.title(),
+                                                 filetypes=[("CSV or JSON lines", "*.csv *.jsonl *.json"),
+                                                            ("All files", "*.*")])
+        if not source_path:
+            return
+        try:
+            result = self.service.import_file(collection, source_path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", "Failed to import file: " + str(e))
+            return
+
+        getattr(self, "update_" + collection.rstrip("s") + "_tree")()
+
+        details = result.summary()
+        if result.errors:
+            details += "\n\n" + "\n".join(f"Line {line}: {error}" for line, error in result.errors[:10])
+        messagebox.showinfo("Import Finished", details)
+
+    def export_file(self, collection):
+        # Streams a store into a CSV, JSON-lines or columnar file on a worker thread, showing its progress
+        target_path = filedialog.asksaveasfilename(title="Export " + collection.title(), defaultextension=".csv",
+                                                   filetypes=[("CSV", "*.csv"), ("JSON lines", "*.jsonl"),
+                                                              ("Columnar", "*.columnar")])
+        if not target_path:
+            return
+        file_format = os.path.splitext(target_path)[1].lstrip(".").lower()
+        if file_format not in EXPORT_FORMATS:
+            messagebox.showerror("Error", "Export files must end in .csv, .jsonl or .columnar")
+            return
+
+        window = tk.Toplevel(self.master)
+        window.title("Exporting " + collection.title())
+        status = tk.Label(window, text="Starting export...")
+        status.pack(padx=20, pady=10)
+        progress_bar = ttk.Progressbar(window, length=300, mode="determinate")
+        progress_bar.pack(padx=20, pady=10)
+
+        # The worker only reports through this queue; the Tk widgets are updated from the main loop
+        updates = queue.Queue()
+        stopped = threading.Event()
+        data = getattr(self, collection)
+        keys = list(data.keys())
+        if isinstance(data, (MappedStore, SQLiteCollection)):
+            # Mapped stores are read-only and SQLite reads are locked, so the worker reads those itself
+            rows = iter_export_rows(data, collection, keys)
+        else:
+            # This thread may change or compact an in-memory store at any time, so only its IDs are copied and
+            # the rows are read here, a chunk at a time, for the worker to write
+            chunks = queue.Queue(maxsize=EXPORT_CHUNKS_AHEAD)
+            rows = (row for chunk in iter(chunks.get, None) for row in chunk)
+            self.feed_export(data, collection, keys, 0, chunks, stopped)
+
+        def run_export():
+            started = time.perf_counter()
+            try:
+                written = export_rows(rows, len(keys), collection, target_path, file_format,
+                                      progress=lambda done, total: updates.put(("progress", done, total)))
+                updates.put(("done", written, time.perf_counter() - started))
+            except OSError as e:
+                updates.put(("error", str(e), None))
+            except Exception as e:
+                # Anything else would end the thread silently and leave the progress window polling forever
+                updates.put(("error", f"{type(e).__name__}: {e}", None))
+            finally:
+                stopped.set()
+
+        threading.Thread(target=run_export, daemon=True).start()
+        self.master.after(100, self.poll_export, window, status, progress_bar, updates)
+
+    def feed_export(self, data, collection, keys, position, chunks, stopped):
+        # Hands the export worker the rows of the next EXPORT_PROGRESS_EVERY IDs, then None after the last ones.
+        # Only this thread puts chunks, so a queue that isn't full takes one without blocking; a full one means
+        # the worker is behind and is looked at again a little later.
+        if stopped.is_set():
+            return
+        if not chunks.full():
+            if position >= len(keys):
+                chunks.put(None)
+                return
+            chunk = keys[position:position + EXPORT_PROGRESS_EVERY]
+            chunks.put(list(iter_export_rows(data, collection, chunk)))
+            position += len(chunk)
+        self.master.after(1 if not chunks.full() else 20, self.feed_export, data, collection, keys, position, chunks,
+                          stopped)
+
+    def poll_export(self, window, status, progress_bar, updates):
+        # Applies the progress reported by the export worker and polls again until it has finished
+        while not updates.empty():
+            kind, value, extra = updates.get()
+            if kind == "progress":
+                progress_bar["maximum"] = max(extra, 1)
+                progress_bar["value"] = value
+                status.config(text=f"Exported {value} of {extra} records")
+            elif kind == "done":
+                window.destroy()
+                messagebox.showinfo("Export Finished", f"Exported {value} records in {extra:.2f}s")
+                return
+            else:
+                window.destroy()
+                messagebox.showerror("Error", "Failed to export file: " + value)
+                return
+        self.master.after(100, self.poll_export, window, status, progress_bar, updates)
+
     def display_client_management(self):
         for widget in self.management_frame.winfo_children():
             widget.destroy()
@@ -345,16 +914,13 @@ class CompanySystemGUI:
         tk.Label(self.management_frame, text="Best Events Management System",
                  font=("Arial", 16, "bold")).pack(pady=20)
 
-        self.client_tree = ttk.Treeview(self.management_frame,
-                                        columns=("Client ID", "Type", "Date", "Time", "Duration", "Venue"),
-                                        show="headings")
-        self.client_tree.heading("Client ID", text="Client ID")
-        self.client_tree.heading("Type", text="Type")
-        self.client_tree.heading("Date", text="Date")
-        self.client_tree.heading("Time", text="Time")
-        self.client_tree.heading("Duration", text="Duration")
-        self.client_tree.heading("Venue", text="Venue")
+        self.client_tree = VirtualTable(self.management_frame,
+                                        columns=[("Client ID", "Client ID"), ("Type", "Type"), ("Date", "Date"),
+                                                 ("Time", "Time"), ("Duration", "Duration"), ("Venue", "Venue")],
+                                        row_values=self.client_row)
         self.client_tree.pack(padx=10, pady=10, fill='both', expand=True)
+        self.build_date_filter(self.service.client_dates(), self.client_tree, self.update_client_tree)
+        self.build_column_filter("clients_events", self.client_tree, self.update_client_tree)
 
         tk.Button(self.management_frame, text="Add Client", command=self.add_client).pack(side=tk.LEFT, padx=10,
                                                                                           pady=10)
@@ -364,6 +930,8 @@ class CompanySystemGUI:
                                                                                                 pady=10)
         tk.Button(self.management_frame, text="Display Client Details", command=self.display_client_details).pack(
             side=tk.LEFT, padx=10, pady=10)
+        tk.Button(self.management_frame, text="Export Clients",
+                  command=lambda: self.export_file("clients_events")).pack(side=tk.LEFT, padx=10, pady=10)
 
         tk.Button(self.management_frame, text="Back to Menu", command=self.display_main_menu).pack(side=tk.LEFT,
                                                                                                    padx=10, pady=10)
@@ -371,16 +939,17 @@ class CompanySystemGUI:
         self.update_client_tree()
 
     def update_client_tree(self):
-        self.client_tree.delete(*self.client_tree.get_children())
-        for client_id, details in self.clients_events.items():
-            self.client_tree.insert("", "end", values=(
-                client_id, details['type'], details['date'], details['time'], details['duration'], details['venue']))
+        self.client_tree.set_rows(self.clients_events.keys())
+
+    def client_row(self, client_id):
+        details = self.clients_events[client_id]
+        return (client_id, details['type'], details['date'], details['time'], details['duration'], details['venue'])
 
     def add_client(self):
         add_window = tk.Toplevel(self.master)
         add_window.title("Add New Client")
 
-        client_id = max(self.clients_events.keys(), default=0) + 1
+        client_id = self.service.next_id("clients_events")
 
         tk.Label(add_window, text="Assigned Client ID:").grid(row=0, column=0)
         tk.Label(add_window, text=str(client_id)).grid(row=0, column=1)
@@ -415,34 +984,35 @@ class CompanySystemGUI:
             row=6, columnspan=2)
 
     def save_new_client(self, add_window, client_id, type, date, time, duration, venue):
-        if type and date and time and duration and venue:
-            self.clients_events[client_id] = {'type': type, 'date': date, 'time': time, 'duration': duration,
-                                              'venue': venue}
-            save_data(self.clients_events, "clients_events.pkl")
-            self.update_client_tree()
-            add_window.destroy()
-            messagebox.showinfo("Success", "Client added successfully")
-        else:
-            messagebox.showerror("Error", "All fields are required!")
+        try:
+            self.service.add_client(client_id, type, date, time, duration, venue)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.client_tree.upsert_row(client_id)
+        add_window.destroy()
+        messagebox.showinfo("Success", "Client added successfully")
 
     def delete_client(self):
-        selected_item = self.client_tree.selection()
-        if selected_item:
-            client_id = int(self.client_tree.item(selected_item, 'values')[0])
+        client_id = self.client_tree.selected_key()
+        if client_id is not None:
             if messagebox.askyesno("Confirm", "Do you want to delete this client?"):
-                del self.clients_events[client_id]
-                save_data(self.clients_events, "clients_events.pkl")
-                self.update_client_tree()
+                try:
+                    self.service.delete_client(client_id)
+                except RecordNotFoundError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                self.client_tree.remove_row(client_id)
                 messagebox.showinfo("Success", "Client deleted successfully")
         else:
             messagebox.showerror("Error", "No client selected")
 
     def modify_client(self):
-        selected_item = self.client_tree.selection()
-        if selected_item:
-            client_id = int(self.client_tree.item(selected_item, 'values')[0])
+        client_id = self.client_tree.selected_key()
+        if client_id is not None:
             client_details = self.clients_events.get(client_id)
             if client_details:
+                version = self.service.version("clients_events", client_id)
                 modify_window = tk.Toplevel(self.master)
                 modify_window.title("Modify Client Details")
 
@@ -474,7 +1044,7 @@ class CompanySystemGUI:
                 venue_dropdown.grid(row=4, column=1)
 
                 tk.Button(modify_window, text="Save Changes",
-                          command=lambda: self.apply_client_changes(modify_window, client_id, type_var.get(),
+                          command=lambda: self.apply_client_changes(modify_window, client_id, version, type_var.get(),
                                                                     date_entry.get(), time_entry.get(),
                                                                     duration_entry.get(), venue_var.get())).grid(row=5,
                                                                                                                  columnspan=2)
@@ -483,16 +1053,15 @@ class CompanySystemGUI:
         else:
             messagebox.showerror("Error", "No client selected")
 
-    def apply_client_changes(self, modify_window, client_id, type, date, time, duration, venue):
-        if type and date and time and duration and venue:
-            self.clients_events[client_id] = {'type': type, 'date': date, 'time': time, 'duration': duration,
-                                              'venue': venue}
-            save_data(self.clients_events, "clients_events.pkl")
-            self.update_client_tree()
-            modify_window.destroy()
-            messagebox.showinfo("Success", "Client details updated successfully")
-        else:
-            messagebox.showerror("Error", "All fields are required!")
+    def apply_client_changes(self, modify_window, client_id, version, type, date, time, duration, venue):
+        try:
+            self.service.modify_client(client_id, type, date, time, duration, venue, version=version)
+        except (ValueError, RecordNotFoundError, ConflictError) as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.client_tree.upsert_row(client_id)
+        modify_window.destroy()
+        messagebox.showinfo("Success", "Client details updated successfully")
 
     def display_client_details(self):
         client_id = simpledialog.askinteger("Display Client", "Enter Client ID:")
@@ -516,39 +1085,44 @@ class CompanySystemGUI:
         tk.Label(self.management_frame, text="Best Events Management System",
                  font=("Arial", 16, "bold")).pack(pady=20)
 
-        self.event_tree = ttk.Treeview(self.management_frame,
-                                       columns=("Event ID", "Event Name", "Type", "Date", "Venue", "Theme", "Invoice"),
-                                       show="headings")
-        self.event_tree.heading("Event ID", text="Event ID")
-        self.event_tree.heading("Event Name", text="Event Name")
-        self.event_tree.heading("Type", text="Type")
-        self.event_tree.heading("Date", text="Date")
-        self.event_tree.heading("Venue", text="Venue")
-        self.event_tree.heading("Theme", text="Theme")
-        self.event_tree.heading("Invoice", text="Invoice")
+        self.event_tree = VirtualTable(self.management_frame,
+                                       columns=[("Event ID", "Event ID"), ("Event Name", "Event Name"),
+                                                ("Type", "Type"), ("Date", "Date"), ("Venue", "Venue"),
+                                                ("Theme", "Theme"), ("Invoice", "Invoice"), ("Guests", "Guests"),
+                                                ("Suppliers", "Suppliers")],
+                                       row_values=self.event_row)
         self.event_tree.pack(padx=10, pady=10, expand=True, fill='both')
+        self.build_date_filter(self.service.event_dates(), self.event_tree, self.update_event_tree)
+        self.build_column_filter("events", self.event_tree, self.update_event_tree)
 
         tk.Button(self.management_frame, text="Add Event", command=self.add_event).pack(side=tk.LEFT, padx=10, pady=10)
         tk.Button(self.management_frame, text="Delete Event", command=self.delete_event).pack(side=tk.LEFT, padx=10, pady=10)
         tk.Button(self.management_frame, text="Modify Event", command=self.modify_event).pack(side=tk.LEFT, padx=10, pady=10)
         tk.Button(self.management_frame, text="Display Event Details", command=self.display_event_details).pack(side=tk.LEFT, padx=10, pady=10)
+        tk.Button(self.management_frame, text="Guest List",
+                  command=lambda: self.manage_event_members("guests")).pack(side=tk.LEFT, padx=10, pady=10)
+        tk.Button(self.management_frame, text="Assign Suppliers",
+                  command=lambda: self.manage_event_members("suppliers")).pack(side=tk.LEFT, padx=10, pady=10)
+        tk.Button(self.management_frame, text="Export Events",
+                  command=lambda: self.export_file("events")).pack(side=tk.LEFT, padx=10, pady=10)
 
         tk.Button(self.management_frame, text="Back to Menu", command=self.display_main_menu).pack(side=tk.LEFT,
                                                                                                    padx=10, pady=10)
         self.update_event_tree()
 
     def update_event_tree(self):
-        self.event_tree.delete(*self.event_tree.get_children())
-        for event_id, event in self.events.items():
-            self.event_tree.insert("", "end",
-                                   values=(event_id, event['name'], event['type'], event['date'], event['venue'],
-                                           event['theme'], event['invoice']))
+        self.event_tree.set_rows(self.events.keys())
+
+    def event_row(self, event_id):
+        event = self.events[event_id]
+        return (event_id, event['name'], event['type'], event['date'], event['venue'], event['theme'],
+                event['invoice'], len(event.get('guests', ())), len(event.get('suppliers', ())))
 
     def add_event(self):
         add_window = tk.Toplevel(self.master)
         add_window.title("Add New Event")
 
-        event_id = max(self.events.keys(), default=0) + 1
+        event_id = self.service.next_id("events")
 
         tk.Label(add_window, text="Event Name:").grid(row=0, column=0)
         event_name_entry = tk.Entry(add_window)
@@ -581,41 +1155,35 @@ class CompanySystemGUI:
         tk.Button(add_window, text="Save Event", command=lambda: self.save_new_event(add_window, event_id, event_name_entry.get(), type_var.get(), date_entry.get(), venue_var.get(), theme_entry.get(), invoice_number)).grid(row=6, columnspan=2)
 
     def save_new_event(self, add_window, event_id, name, type_str, date, venue, theme, invoice):
-        if name and type_str and date and venue and theme:
-            new_event = {
-                'name': name,
-                'type': type_str,
-                'date': date,
-                'venue': venue,
-                'theme': theme,
-                'invoice': invoice
-            }
-            self.events[event_id] = new_event
-            save_data(self.events, "events.pkl")
-            self.update_event_tree()
-            add_window.destroy()
-            messagebox.showinfo("Success", "Event added successfully")
-        else:
-            messagebox.showerror("Error", "All fields are required!")
+        try:
+            self.service.add_event(event_id, name, type_str, date, venue, theme, invoice)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.event_tree.upsert_row(event_id)
+        add_window.destroy()
+        messagebox.showinfo("Success", "Event added successfully")
 
     def delete_event(self):
-        selected_item = self.event_tree.selection()
-        if selected_item:
-            event_id = int(self.event_tree.item(selected_item, 'values')[0])
+        event_id = self.event_tree.selected_key()
+        if event_id is not None:
             if messagebox.askyesno("Confirm", "Do you really want to delete this event?"):
-                del self.events[event_id]
-                save_data(self.events, "events.pkl")
-                self.update_event_tree()
+                try:
+                    self.service.delete_event(event_id)
+                except RecordNotFoundError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                self.event_tree.remove_row(event_id)
                 messagebox.showinfo("Success", "Event deleted successfully")
         else:
             messagebox.showerror("Error", "No event selected")
 
     def modify_event(self):
-        selected_item = self.event_tree.selection()
-        if selected_item:
-            event_id = int(self.event_tree.item(selected_item, 'values')[0])
+        event_id = self.event_tree.selected_key()
+        if event_id is not None:
             event = self.events.get(event_id)
             if event:
+                version = self.service.version("events", event_id)
                 modify_window = tk.Toplevel(self.master)
                 modify_window.title("Modify Event Details")
 
@@ -646,30 +1214,29 @@ class CompanySystemGUI:
                 theme_entry.insert(0, event['theme'])
                 theme_entry.grid(row=4, column=1)
 
-                tk.Button(modify_window, text="Save Changes", command=lambda: self.apply_event_changes(modify_window, event_id, event_name_entry.get(), type_var.get(), date_entry.get(), venue_var.get(), theme_entry.get(), event['invoice'])).grid(row=5, columnspan=2)
+                tk.Button(modify_window, text="Save Changes", command=lambda: self.apply_event_changes(modify_window, event_id, version, event_name_entry.get(), type_var.get(), date_entry.get(), venue_var.get(), theme_entry.get())).grid(row=5, columnspan=2)
             else:
                 messagebox.showerror("Error", "Event not found")
         else:
             messagebox.showerror("Error", "No event selected")
 
-    def apply_event_changes(self, modify_window, event_id, name, type, date, venue, theme, invoice):
-        if name and type and date and venue and theme:
-            updated_event = {'name': name, 'type': type, 'date': date, 'venue': venue, 'theme': theme, 'invoice': invoice}
-            self.events[event_id] = updated_event
-            save_data(self.events, "events.pkl")
-            self.update_event_tree()
-            modify_window.destroy()
-            messagebox.showinfo("Success", "Event details updated successfully")
-        else:
-            messagebox.showerror("Error", "All fields are required!")
+    def apply_event_changes(self, modify_window, event_id, version, name, type, date, venue, theme):
+        try:
+            self.service.modify_event(event_id, name, type, date, venue, theme, version=version)
+        except (ValueError, RecordNotFoundError, ConflictError) as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.event_tree.upsert_row(event_id)
+        modify_window.destroy()
+        messagebox.showinfo("Success", "Event details updated successfully")
 
     def display_event_details(self):
-        selected_item = self.event_tree.selection()
-        if selected_item:
-            event_id = int(self.event_tree.item(selected_item, 'values')[0])
+        event_id = self.event_tree.selected_key()
+        if event_id is not None:
             event = self.events.get(event_id)
             if event:
                 details = f"Event ID: {event_id}\nEvent Name: {event['name']}\nType: {event['type']}\nDate: {event['date']}\nVenue: {event['venue']}\nTheme: {event['theme']}\nInvoice: {event['invoice']}"
+                details += f"\nGuests: {len(event.get('guests', ()))}\nSuppliers: {len(event.get('suppliers', ()))}"
                 messagebox.showinfo("Event Details", details)
             else:
                 messagebox.showerror("Error", "No event found")
@@ -677,6 +1244,90 @@ class CompanySystemGUI:
             messagebox.showerror("Error", "No event selected")
 
 
+    def manage_event_members(self, field):
+        # Guest list or supplier assignment of the selected event; IDs are added and removed in bulk
+        event_id = self.event_tree.selected_key()
+        if event_id is None:
+            messagebox.showerror("Error", "No event selected")
+            return
+        if event_id not in self.events:
+            messagebox.showerror("Error", "Event not found")
+            return
+        title = "Guest List" if field == "guests" else "Suppliers"
+        window = tk.Toplevel(self.master)
+        window.title(f"{title}: {self.events[event_id]['name']}")
+
+        count_label = tk.Label(window)
+        count_label.pack(padx=10, pady=5)
+        members = VirtualTable(window, columns=[("ID", "ID"), ("Name", "Name"), ("Contact Details", "Contact Details")],
+                               row_values=lambda key: self.member_row(field, key), height=12)
+        members.pack(padx=10, pady=5, expand=True, fill='both')
+
+        def show_members():
+            member_ids = sorted(self.service.event_members(event_id, field))
+            count_label.config(text=f"{len(member_ids)} {field}")
+            members.set_rows(member_ids)
+
+        def change(adding, member_ids):
+            try:
+                if adding:
+                    changed = self.service.add_event_members(event_id, field, member_ids)
+                else:
+                    changed = self.service.remove_event_members(event_id, field, member_ids)
+            except (ValueError, RecordNotFoundError) as e:
+                messagebox.showerror("Error", str(e))
+                return
+            show_members()
+            self.event_tree.upsert_row(event_id)
+            messagebox.showinfo("Success", f"{changed} {'added' if adding else 'removed'}")
+
+        def change_typed(adding):
+            try:
+                member_ids = parse_id_list(ids_entry.get())
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
+                return
+            change(adding, member_ids)
+
+        def remove_selected():
+            member_id = members.selected_key()
+            if member_id is None:
+                messagebox.showerror("Error", "Nothing selected")
+                return
+            change(False, [member_id])
+
+        entry_frame = tk.Frame(window)
+        entry_frame.pack(padx=10, pady=5, fill='x')
+        tk.Label(entry_frame, text="IDs (e.g. 3, 7, 10-250):").pack(side=tk.LEFT)
+        ids_entry = tk.Entry(entry_frame, width=30)
+        ids_entry.pack(side=tk.LEFT, padx=5)
+        tk.Button(entry_frame, text="Add", command=lambda: change_typed(True)).pack(side=tk.LEFT, padx=5)
+        tk.Button(entry_frame, text="Remove", command=lambda: change_typed(False)).pack(side=tk.LEFT, padx=5)
+        tk.Button(window, text="Remove Selected", command=remove_selected).pack(side=tk.LEFT, padx=10, pady=10)
+        tk.Button(window, text="Close", command=window.destroy).pack(side=tk.RIGHT, padx=10, pady=10)
+        show_members()
+
+    def member_row(self, field, member_id):
+        member = self.service.store(field).get(member_id)
+        if member is None:
+            return (member_id, "(deleted)", "")
+        return (member_id, member._name, member._contact_details)
+
+    def display_member_events(self, field, member_id):
+        # Reverse lookup: the events a guest is invited to or a supplier is assigned to
+        if member_id is None:
+            messagebox.showerror("Error", f"No {'guest' if field == 'guests' else 'supplier'} selected")
+            return
+        event_ids = self.service.events_with_member(field, member_id)
+        if not event_ids:
+            messagebox.showinfo("Events", "Not on any event")
+            return
+        lines = [f"{event_id}: {self.events[event_id]['name']} ({self.events[event_id]['date']})"
+                 for event_id in event_ids[:30]]
+        if len(event_ids) > 30:
+            lines.append(f"... and {len(event_ids) - 30} more")
+        messagebox.showinfo("Events", "\n".join(lines))
+
 
     def display_supplier_management(self):
         for widget in self.management_frame.winfo_children():
@@ -685,15 +1336,14 @@ class CompanySystemGUI:
         tk.Label(self.management_frame, text="Best Events Management System",
                  font=("Arial", 16, "bold")).pack(pady=20)
 
-        self.supplier_tree = ttk.Treeview(self.management_frame,
-                                          columns=("Supplier ID", "Name", "Contact Details", "Service"),
-                                          show="headings")
-        self.supplier_tree.heading("Supplier ID", text="Supplier ID")
-        self.supplier_tree.heading("Name", text="Name")
-        self.supplier_tree.heading("Service", text="Service")
-        self.supplier_tree.heading("Contact Details", text="Contact Details")
+        self.supplier_tree = VirtualTable(self.management_frame,
+                                          columns=[("Supplier ID", "Supplier ID"), ("Name", "Name"),
+                                                   ("Contact Details", "Contact Details"), ("Service", "Service")],
+                                          row_values=self.supplier_row)
 
         self.supplier_tree.pack(padx=10, pady=10, expand=True, fill='both')
+        self.build_search_box("suppliers", self.supplier_tree, self.update_supplier_tree)
+        self.build_column_filter("suppliers", self.supplier_tree, self.update_supplier_tree)
 
         tk.Button(self.management_frame, text="Add Supplier", command=self.add_supplier).pack(side=tk.LEFT, padx=10,
                                                                                               pady=10)
@@ -703,6 +1353,13 @@ class CompanySystemGUI:
                                                                                                     padx=10, pady=10)
         tk.Button(self.management_frame, text="Display Supplier Details", command=self.display_supplier_details).pack(
             side=tk.LEFT, padx=10, pady=10)
+        tk.Button(self.management_frame, text="Assigned Events",
+                  command=lambda: self.display_member_events("suppliers", self.supplier_tree.selected_key())).pack(
+            side=tk.LEFT, padx=10, pady=10)
+        tk.Button(self.management_frame, text="Import Suppliers",
+                  command=lambda: self.import_file("suppliers")).pack(side=tk.LEFT, padx=10, pady=10)
+        tk.Button(self.management_frame, text="Export Suppliers",
+                  command=lambda: self.export_file("suppliers")).pack(side=tk.LEFT, padx=10, pady=10)
 
         tk.Button(self.management_frame, text="Back to Menu", command=self.display_main_menu).pack(side=tk.LEFT,
                                                                                                    padx=10, pady=10)
@@ -710,15 +1367,16 @@ class CompanySystemGUI:
         self.update_supplier_tree()
 
     def update_supplier_tree(self):
-        self.supplier_tree.delete(*self.supplier_tree.get_children())
-        for supplier_id, supplier in self.suppliers.items():
-            self.supplier_tree.insert("", "end", values=(
-            supplier_id, supplier._name, supplier._service_type, supplier._contact_details))
+        self.supplier_tree.set_rows(self.suppliers.keys())
+
+    def supplier_row(self, supplier_id):
+        supplier = self.suppliers[supplier_id]
+        return (supplier_id, supplier._name, supplier._contact_details, supplier._service_type)
 
     def add_supplier(self):
         add_window = tk.Toplevel(self.master)
         add_window.title("Add New Supplier")
-        next_id = max(self.suppliers.keys(), default=0) + 1
+        next_id = self.service.next_id("suppliers")
 
         tk.Label(add_window, text="Supplier ID:").grid(row=0, column=0)
         tk.Label(add_window, text=str(next_id)).grid(row=0, column=1)
@@ -743,34 +1401,36 @@ class CompanySystemGUI:
                                                          contact_details_entry.get())).grid(row=4, columnspan=2)
 
     def save_new_supplier(self, add_window, supplier_id, name, service_type, contact_details):
-        if name and service_type and contact_details:
-            new_supplier = Supplier(supplier_id, name, service_type, contact_details)  # Now matches the constructor
-            self.suppliers[supplier_id] = new_supplier
-            save_data(self.suppliers, "suppliers.pkl")
-            self.update_supplier_tree()
-            add_window.destroy()
-            messagebox.showinfo("Success", "Supplier added successfully")
-        else:
-            messagebox.showerror("Error", "All fields are required!")
+        try:
+            self.service.add_supplier(supplier_id, name, service_type, contact_details)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        self.supplier_tree.upsert_row(supplier_id)
+        add_window.destroy()
+        messagebox.showinfo("Success", "Supplier added successfully")
 
     def delete_supplier(self):
-        selected_item = self.supplier_tree.selection()
-        if selected_item:
-            supplier_id = int(self.supplier_tree.item(selected_item, 'values')[0])
+        supplier_id = self.supplier_tree.selected_key()
+        if supplier_id is not None:
             if messagebox.askyesno("Confirm", "Do you really want to delete this supplier?"):
-                del self.suppliers[supplier_id]
-                save_data(self.suppliers, "suppliers.pkl")
-                self.update_supplier_tree()
+                try:
+                    self.service.delete_supplier(supplier_id)
+                except RecordNotFoundError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                self.supplier_tree.remove_row(supplier_id)
                 messagebox.showinfo("Success", "Supplier deleted successfully")
         else:
             messagebox.showerror("Error", "No supplier selected")
 
     def modify_supplier(self):
-        selected_item = self.supplier_tree.selection()
-        if selected_item:
-            supplier_id = int(self.supplier_tree.item(selected_item, 'values')[0])
+        supplier_id = self.supplier_tree.selected_key()
+        if supplier_id is not None:
             supplier = self.suppliers.get(supplier_id)
             if supplier:
+                version = self.service.version("suppliers", supplier_id)
                 modify_window = tk.Toplevel(self.master)
                 modify_window.title("Modify Supplier Details")
 
@@ -792,8 +1452,8 @@ class CompanySystemGUI:
                 contact_details_entry.grid(row=2, column=1)
 
                 tk.Button(modify_window, text="Save Changes",
-                          command=lambda: self.apply_supplier_changes(modify_window, supplier_id, name_entry.get(),
-                                                                      service_var.get(),
+                          command=lambda: self.apply_supplier_changes(modify_window, supplier_id, version,
+                                                                      name_entry.get(), service_var.get(),
                                                                       contact_details_entry.get())).grid(row=3,
                                                                                                          columnspan=2)
             else:
@@ -801,29 +1461,22 @@ class CompanySystemGUI:
         else:
             messagebox.showerror("Error", "No supplier selected")
 
-    def apply_supplier_changes(self, modify_window, supplier_id, name, service, contact_details):
-        if name and service and contact_details:
-            supplier = self.suppliers.get(supplier_id)
-            if supplier:
-                supplier._name = name
-                supplier._service_type = service
-                supplier._contact_details = contact_details
-                save_data(self.suppliers, "suppliers.pkl")
-                self.update_supplier_tree()
-                modify_window.destroy()
-                messagebox.showinfo("Success", "Supplier details updated successfully")
-            else:
-                messagebox.showerror("Error", "Failed to update supplier details")
-        else:
-            messagebox.showerror("Error", "All fields are required!")
+    def apply_supplier_changes(self, modify_window, supplier_id, version, name, service, contact_details):
+        try:
+            self.service.modify_supplier(supplier_id, name, service, contact_details, version=version)
+        except (ValueError, RecordNotFoundError, ConflictError) as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.supplier_tree.upsert_row(supplier_id)
+        modify_window.destroy()
+        messagebox.showinfo("Success", "Supplier details updated successfully")
 
     def display_supplier_details(self):
-        selected_item = self.supplier_tree.selection()
-        if selected_item:
-            supplier_id = int(self.supplier_tree.item(selected_item, 'values')[0])
+        supplier_id = self.supplier_tree.selected_key()
+        if supplier_id is not None:
             supplier = self.suppliers.get(supplier_id)
             if supplier:
-                details = f"Supplier ID: {supplier_id}\nName: {supplier._name}\nService: {supplier._contact_details}\n Contact: {supplier._service_type}"
+                details = f"Supplier ID: {supplier_id}\nName: {supplier._name}\nService: {supplier._service_type}\nContact: {supplier._contact_details}"
                 messagebox.showinfo("Supplier Details", details)
             else:
                 messagebox.showerror("Error", "No supplier found")
@@ -841,13 +1494,13 @@ class CompanySystemGUI:
                  font=("Arial", 16, "bold")).pack(pady=20)
 
         # Create the treeview for displaying guests with appropriate column headings
-        self.guest_tree = ttk.Treeview(self.management_frame,
-                                       columns=("Name", "Guest ID", "Contact Details"),
-                                       show="headings")
-        self.guest_tree.heading("Guest ID", text="Guest ID")
-        self.guest_tree.heading("Name", text="Name")
-        self.guest_tree.heading("Contact Details", text="Contact Details")
+        self.guest_tree = VirtualTable(self.management_frame,
+                                       columns=[("Guest ID", "Guest ID"), ("Name", "Name"),
+                                                ("Contact Details", "Contact Details")],
+                                       row_values=self.guest_row)
         self.guest_tree.pack(padx=10, pady=10, expand=True, fill='both')
+        self.build_search_box("guests", self.guest_tree, self.update_guest_tree)
+        self.build_column_filter("guests", self.guest_tree, self.update_guest_tree)
 
         # Adding buttons for managing guests
         tk.Button(self.management_frame, text="Add Guest", command=self.add_guest).pack(side=tk.LEFT, padx=10, pady=10)
@@ -857,6 +1510,13 @@ class CompanySystemGUI:
                                                                                               pady=10)
         tk.Button(self.management_frame, text="Display Guest Details", command=self.display_guest_details).pack(
             side=tk.LEFT, padx=10, pady=10)
+        tk.Button(self.management_frame, text="Events Invited To",
+                  command=lambda: self.display_member_events("guests", self.guest_tree.selected_key())).pack(
+            side=tk.LEFT, padx=10, pady=10)
+        tk.Button(self.management_frame, text="Import Guests",
+                  command=lambda: self.import_file("guests")).pack(side=tk.LEFT, padx=10, pady=10)
+        tk.Button(self.management_frame, text="Export Guests",
+                  command=lambda: self.export_file("guests")).pack(side=tk.LEFT, padx=10, pady=10)
         tk.Button(self.management_frame, text="Back to Menu", command=self.display_main_menu).pack(side=tk.LEFT,
                                                                                                    padx=10, pady=10)
 
@@ -865,16 +1525,17 @@ class CompanySystemGUI:
 
     def update_guest_tree(self):
         """Refresh the guest display tree."""
-        self.guest_tree.delete(*self.guest_tree.get_children())
-        # Populate the treeview with guest data
-        for guest_id, guest in self.guests.items():
-            self.guest_tree.insert("", "end", values=(guest._guest_ID, guest._name, guest._contact_details))
+        self.guest_tree.set_rows(self.guests.keys())
+
+    def guest_row(self, guest_id):
+        guest = self.guests[guest_id]
+        return (guest._guest_ID, guest._name, guest._contact_details)
 
     def add_guest(self):
         """Add a new guest."""
         add_window = tk.Toplevel(self.master)
         add_window.title("Add New Guest")
-        guest_id = max(self.guests.keys(), default=0) + 1
+        guest_id = self.service.next_id("guests")
 
         tk.Label(add_window, text="Guest ID:").grid(row=0, column=0)
         guest_id_entry = tk.Entry(add_window)
@@ -895,29 +1556,30 @@ class CompanySystemGUI:
 
     def save_new_guest(self, add_window, guest_id, name, contact_details):
         """Save the newly added guest information."""
-        if name and contact_details:
-            new_guest = Guest(guest_id, name, contact_details)
-            self.guests[guest_id] = new_guest
-            save_data(self.guests, "guests.pkl")
-            self.update_guest_tree()
-            add_window.destroy()
-            messagebox.showinfo("Success", "Guest added successfully")
-        else:
-            messagebox.showerror("Error", "All fields are required!")
+        # The ID field can be edited; the service refuses an ID in use and never hands out a typed-in ID later
+        try:
+            self.service.add_guest(guest_id, name, contact_details)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        self.guest_tree.upsert_row(guest_id)
+        add_window.destroy()
+        messagebox.showinfo("Success", "Guest added successfully")
 
     def delete_guest(self):
         """Delete a guest from the guest list."""
-        selected_item = self.guest_tree.selection()
-        if selected_item:
-            # Retrieve the guest ID directly from the selected item
-            guest_id = self.guest_tree.item(selected_item, 'values')[0]
+        guest_id = self.guest_tree.selected_key()
+        if guest_id is not None:
             if messagebox.askyesno("Confirm", "Do you really want to delete this guest?"):
-                # Delete the guest from the guest list
-                del self.guests[guest_id]
-                # Save the updated guest list
-                save_data(self.guests, "guests.pkl")
+                # Delete the guest from the guest list and save it
+                try:
+                    self.service.delete_guest(guest_id)
+                except RecordNotFoundError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
                 # Update the guest display tree
-                self.update_guest_tree()
+                self.guest_tree.remove_row(guest_id)
                 # Display success message
                 messagebox.showinfo("Success", "Guest deleted successfully")
         else:
@@ -927,13 +1589,12 @@ class CompanySystemGUI:
     def modify_guest(self):
         """Modify an existing guest's details."""
         # Get the selected guest
-        selected_item = self.guest_tree.selection()
-        if selected_item:
-            # Retrieve the guest ID from the selected item
-            guest_id = int(self.guest_tree.item(selected_item, 'values')[0])
+        guest_id = self.guest_tree.selected_key()
+        if guest_id is not None:
             # Get the guest object from the guest ID
             guest = self.guests.get(guest_id)
             if guest:
+                version = self.service.version("guests", guest_id)
                 # Create a window for modifying guest details
                 modify_window = tk.Toplevel(self.master)
                 modify_window.title("Modify Guest Details")
@@ -947,17 +1608,17 @@ class CompanySystemGUI:
 
                 tk.Label(modify_window, text="Name:").grid(row=1, column=0)
                 name_entry = tk.Entry(modify_window)
-                name_entry.insert(0, guest.name)
+                name_entry.insert(0, guest._name)
                 name_entry.grid(row=1, column=1)
 
                 tk.Label(modify_window, text="Contact Details:").grid(row=2, column=0)
                 contact_details_entry = tk.Entry(modify_window)
-                contact_details_entry.insert(0, guest.contact_details)
+                contact_details_entry.insert(0, guest._contact_details)
                 contact_details_entry.grid(row=2, column=1)
 
                 # Button to save changes to guest details
                 tk.Button(modify_window, text="Save Changes",
-                          command=lambda: self.apply_guest_changes(modify_window, guest_id, name_entry.get(),
+                          command=lambda: self.apply_guest_changes(modify_window, guest_id, version, name_entry.get(),
                                                                    contact_details_entry.get())).grid(row=3,
                                                                                                       columnspan=2)
             else:
@@ -967,21 +1628,16 @@ class CompanySystemGUI:
             # Display error message if no guest is selected
             messagebox.showerror("Error", "No guest selected")
 
-    def apply_guest_changes(self, modify_window, guest_id, name, contact_details):
+    def apply_guest_changes(self, modify_window, guest_id, version, name, contact_details):
         #Apply changes to an existing guest's details.
-        if name and contact_details:
-            guest = self.guests.get(guest_id)
-            if guest:
-                guest._name = name
-                guest._contact_details = contact_details
-                save_data(self.guests, "guests.pkl")
-                self.update_guest_tree()
-                modify_window.destroy()
-                messagebox.showinfo("Success", "Guest details updated successfully")
-            else:
-                messagebox.showerror("Error", "Failed to update guest details")
-        else:
-            messagebox.showerror("Error", "All fields are required!")
+        try:
+            self.service.modify_guest(guest_id, name, contact_details, version=version)
+        except (ValueError, RecordNotFoundError, ConflictError) as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.guest_tree.upsert_row(guest_id)
+        modify_window.destroy()
+        messagebox.showinfo("Success", "Guest details updated successfully")
 
     def display_guest_details(self):
         #Display details of a specific guest
@@ -989,7 +1645,7 @@ class CompanySystemGUI:
         if guest_id is not None:
             guest = self.guests.get(guest_id)
             if guest:
-                details = f"ID: {guest._name}\nName: {guest._guest_ID}\nContact Details: {guest._contact_details}"
+                details = f"ID: {guest._guest_ID}\nName: {guest._name}\nContact Details: {guest._contact_details}"
                 messagebox.showinfo("Guest Details", details)
             else:
                 messagebox.showerror("Error", f"No guest found with ID: {guest_id}")
@@ -1008,15 +1664,14 @@ class CompanySystemGUI:
                      font=("Arial", 16, "bold")).pack(pady=20)
 
             # Create the treeview for displaying venues with appropriate column headings
-            self.venue_tree = ttk.Treeview(self.venue_frame, columns=(
-            "Venue ID", "Name", "Address", "Contact Details", "Min Guests", "Max Guests"), show="headings")
-            self.venue_tree.heading("Venue ID", text="Venue ID")
-            self.venue_tree.heading("Name", text="Name")
-            self.venue_tree.heading("Address", text="Address")
-            self.venue_tree.heading("Contact Details", text="Contact Details")
-            self.venue_tree.heading("Min Guests", text="Min Guests")
-            self.venue_tree.heading("Max Guests", text="Max Guests")
+            self.venue_tree = VirtualTable(self.venue_frame,
+                                           columns=[("Venue ID", "Venue ID"), ("Name", "Name"),
+                                                    ("Address", "Address"), ("Contact Details", "Contact Details"),
+                                                    ("Min Guests", "Min Guests"), ("Max Guests", "Max Guests")],
+                                           row_values=self.venue_row)
             self.venue_tree.pack(padx=10, pady=10, fill='both', expand=True)
+            self.build_search_box("venues", self.venue_tree, self.update_venue_tree)
+            self.build_column_filter("venues", self.venue_tree, self.update_venue_tree)
             self.update_venue_tree()
 
             # Adding buttons for managing venues
@@ -1027,6 +1682,10 @@ class CompanySystemGUI:
                                                                                              pady=10)
             tk.Button(self.venue_frame, text="Display Venue Details", command=self.display_venue_details).pack(
                 side=tk.LEFT, padx=10, pady=10)
+            tk.Button(self.venue_frame, text="Booking Conflicts", command=self.display_booking_conflicts).pack(
+                side=tk.LEFT, padx=10, pady=10)
+            tk.Button(self.venue_frame, text="Export Venues",
+                      command=lambda: self.export_file("venues")).pack(side=tk.LEFT, padx=10, pady=10)
             tk.Button(self.venue_frame, text="Back to Menu", command=self.display_main_menu).pack(side=tk.LEFT, padx=10,
                                                                                                   pady=10)
         except Exception as e:
@@ -1035,19 +1694,20 @@ class CompanySystemGUI:
 
     def update_venue_tree(self):
         try:
-            self.venue_tree.delete(*self.venue_tree.get_children())
-            for venue_id, venue in self.venues.items():
-                self.venue_tree.insert("", "end", values=(venue._venue_id, venue._name, venue._address,
-                                                          venue._contact_details, venue._min_guests, venue._max_guests))
+            self.venue_tree.set_rows(self.venues.keys())
         except Exception as e:
             messagebox.showerror("Error", "Failed to update venue data: " + str(e))
 
+    def venue_row(self, venue_id):
+        venue = self.venues[venue_id]
+        return (venue._venue_id, venue._name, venue._address, venue._contact_details, venue._min_guests,
+                venue._max_guests)
+
     def add_venue(self):
         try:
             add_window = tk.Toplevel(self.master)
             add_window.title("Add New Venue")
-            # Provide a default value of 0 for max() when the sequence is empty
-            next_venue_id = max((int(vid) for vid in self.venues.keys()), default=0) + 1
+            next_venue_id = self.service.next_id("venues")
 
             tk.Label(add_window, text="Venue ID:").grid(row=0, column=0)
             venue_id_entry = tk.Entry(add_window)
@@ -1086,30 +1746,38 @@ class CompanySystemGUI:
 
     def save_new_venue(self, venue_id, name, address, contact_details, min_guests, max_guests, window):
         try:
-            if name and address and contact_details and min_guests and max_guests:
-                new_venue = Venue(venue_id, name, address, contact_details, min_guests, max_guests)
-                self.venues[venue_id] = new_venue
-                save_data(self.venues, "venues.pkl")
-                self.update_venue_tree()
-                window.destroy()
-                messagebox.showinfo("Success", "Venue added successfully")
-            else:
-                messagebox.showerror("Error", "All fields are required!")
+            self.service.add_venue(venue_id, name, address, contact_details, min_guests, max_guests)
+            self.venue_tree.upsert_row(venue_id)
+            window.destroy()
+            messagebox.showinfo("Success", "Venue added successfully")
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
         except Exception as e:
             messagebox.showerror("Error", "Failed to save new venue: " + str(e))
             if 'window' in locals():
                 window.destroy()
 
+    def apply_venue_changes(self, venue_id, version, name, address, contact_details, min_guests, max_guests, window):
+        try:
+            self.service.modify_venue(venue_id, name, address, contact_details, min_guests, max_guests,
+                                      version=version)
+            self.venue_tree.upsert_row(venue_id)
+            window.destroy()
+            messagebox.showinfo("Success", "Venue details updated successfully")
+        except (ValueError, RecordNotFoundError, ConflictError) as e:
+            messagebox.showerror("Error", str(e))
+        except Exception as e:
+            messagebox.showerror("Error", "Failed to save venue details: " + str(e))
+            window.destroy()
+
     def delete_venue(self):
         try:
-            selected_item = self.venue_tree.selection()
-            if selected_item:
-                venue_id = int(self.venue_tree.item(selected_item, 'values')[0])
+            venue_id = self.venue_tree.selected_key()
+            if venue_id is not None:
                 if venue_id in self.venues:
                     if messagebox.askyesno("Confirm", "Do you want to delete this venue?"):
-                        del self.venues[venue_id]
-                        save_data(self.venues, "venues.pkl")
-                        self.update_venue_tree()
+                        self.service.delete_venue(venue_id)
+                        self.venue_tree.remove_row(venue_id)
                         messagebox.showinfo("Success", "Venue deleted successfully")
                 else:
                     messagebox.showerror("Error", "Venue not found")
@@ -1120,12 +1788,11 @@ class CompanySystemGUI:
 
     def modify_venue(self):
         try:
-            selected_item = self.venue_tree.selection()
-            if selected_item:
-                venue_id_str = self.venue_tree.item(selected_item, 'values')[0]
-                venue_id = int(venue_id_str)
+            venue_id = self.venue_tree.selected_key()
+            if venue_id is not None:
                 venue = self.venues.get(venue_id)
                 if venue:
+                    version = self.service.version("venues", venue_id)
                     modify_window = tk.Toplevel(self.master)
                     modify_window.title("Modify Venue")
 
@@ -1154,8 +1821,8 @@ class CompanySystemGUI:
                     max_guests_entry.insert(0, venue._max_guests)
                     max_guests_entry.grid(row=5, column=1)
 
-                    tk.Button(modify_window, text="Save Changes", command=lambda: self.save_new_venue(
-                        venue_id, name_entry.get(), address_entry.get(), contact_details_entry.get(),
+                    tk.Button(modify_window, text="Save Changes", command=lambda: self.apply_venue_changes(
+                        venue_id, version, name_entry.get(), address_entry.get(), contact_details_entry.get(),
                         min_guests_entry.get(), max_guests_entry.get(), modify_window)).grid(row=6, columnspan=2)
                 else:
                     messagebox.showerror("Error", "Venue not found")
@@ -0,0 +1,196 @@
+import argparse
+import asyncio
+import json
+import signal
+import sys
+from main_classes import *
+from server import PAGE_SIZE, MAX_PAGE_SIZE, StoreOwner
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Longest request line a client may send, in bytes
+MAX_LINE = 64 * 1024
+
+
+class LineProtocolServer:
+    """Serves the six stores over a line-delimited JSON protocol with asyncio.
+
+    Each request is one JSON object on a line and gets one JSON object back on a line, in order:
+
+        {"op": "get", "store": "guests", "id": 3}
+        {"op": "list", "store": "guests", "offset": 0, "limit": 50}
+        {"op": "add", "store": "guests", "fields": {"name": "...", "contact_details": "..."}}
+        {"op": "modify", "store": "guests", "id": 3, "fields": {...}}
+        {"op": "delete", "store": "guests", "id": 3}
+        {"op": "ping"}
+
+    Answers are {"ok": true, ...} or {"ok": false, "status": 400, 404 or 409, "error": "..."}. A "ref" in the
+    request is copied into its answer. A modify or delete holding the "version" of the record read with get is
+    refused with 409 if the record has been changed since.
+
+    The event loop only does network I/O, so an idle connection costs a coroutine and a socket, not a thread.
+    Every operation on the stores, including handing changes to the persistence writer, runs on a StoreOwner
+    thread, so a slow save never holds up other clients.
+    """
+    def __init__(self, service):
+        self.owner = StoreOwner(service)
+        self.connections = 0
+
+    async def run(self, function, *args):
+        return await asyncio.wrap_future(self.owner.submit(function, *args))
+
+    async def handle_connection(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    writer.write(self._encode({"ok": False, "status": 400, "error": "Request line is too long"}))
+                    break
+                except ConnectionError:
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                writer.write(self._encode(await self.answer(line)))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def answer(self, line):
+        "Answers one request line"
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("A request must be a JSON object")
+        except (json.JSONDecodeError, UnicodeDecodeError, ValueError) as e:
+            return {"ok": False, "status": 400, "error": f"Invalid request: {e}"}
+        try:
+            answer = await self._dispatch(request)
+        except RecordNotFoundError as e:
+            answer = {"ok": False, "status": 404, "error": str(e)}
+        except ConflictError as e:
+            answer = {"ok": False, "status": 409, "error": str(e)}
+        except (ValueError, TypeError) as e:
+            answer = {"ok": False, "status": 400, "error": str(e)}
+        except Exception as e:
+            answer = {"ok": False, "status": 500, "error": f"{type(e).__name__}: {e}"}
+        if "ref" in request:
+            answer["ref"] = request["ref"]
+        return answer
+
+    async def _dispatch(self, request):
+        owner = self.owner
+        op = request.get("op")
+        if op == "ping":
+            return {"ok": True, "connections": self.connections}
+        collection = request.get("store")
+        if collection not in SQLITE_TABLES:
+            raise ValueError(f"Unknown store: {collection}")
+        if op == "list":
+            offset, limit = int(request.get("offset", 0)), min(int(request.get("limit", PAGE_SIZE)), MAX_PAGE_SIZE)
+            if offset < 0 or limit < 0:
+                raise ValueError("offset and limit must be at least 0")
+            total, items = await self.run(owner.page, collection, offset, limit)
+            return {"ok": True, "total": total, "items": items}
+        if op == "add":
+            key = self._key(request["id"]) if request.get("id") is not None else None
+            return {"ok": True, "record": await self.run(owner.add, collection, key, self._fields(request))}
+        key = self._key(request.get("id"))
+        if op == "get":
+            return {"ok": True, "record": await self.run(owner.get, collection, key)}
+        if op == "modify":
+            fields = dict(self._fields(request), version=request.get("version"))
+            return {"ok": True, "record": await self.run(owner.modify, collection, key, fields)}
+        if op == "delete":
+            await self.run(owner.delete, collection, key, request.get("version"))
+            return {"ok": True, "deleted": key}
+        raise ValueError(f"Unknown op: {op}")
+
+    @staticmethod
+    def _key(value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Not a record ID: {value}")
+
+    @staticmethod
+    def _fields(request):
+        fields = request.get("fields")
+        if not isinstance(fields, dict):
+            raise ValueError("fields must be a JSON object")
+        return fields
+
+    @staticmethod
+    def _encode(answer):
+        return json.dumps(answer, default=str).encode("utf-8") + b"\n"
+
+    def close(self):
+        "Saves every pending change and stops the owner thread"
+        self.owner.close()
+
+
+def raise_open_file_limit():
+    "Raises the limit on open files to the hard limit, since every connection takes one; returns the new limit"
+    if resource is None:
+        return None
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard != resource.RLIM_INFINITY and soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        soft = hard
+    return soft
+
+
+async def serve(service, host="127.0.0.1", port=8081):
+    "Serves until the task is cancelled or the process gets SIGINT/SIGTERM, then saves every pending change"
+    protocol = LineProtocolServer(service)
+    server = await asyncio.start_server(protocol.handle_connection, host, port, limit=MAX_LINE, backlog=1024)
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stopped.set)
+        except (NotImplementedError, RuntimeError):  # Windows event loops have no signal handlers
+            pass
+    print(f"Serving line-delimited JSON on {host}:{server.sockets[0].getsockname()[1]}")
+    try:
+        async with server:
+            await stopped.wait()
+    finally:
+        server.close()
+        await loop.run_in_executor(None, protocol.close)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="asyncio line-delimited JSON server for the Best Events "
+                                                 "Management System")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--database", help="SQLite file to use instead of the .pkl stores")
+    parser.add_argument("--binary", action="store_true", help="Use the compact binary .bin stores")
+    parser.add_argument("--read-only", action="store_true", help="Serve memory-mapped copies of the stores")
+    parser.add_argument("--autosave-ms", type=int, default=AUTOSAVE_EVERY_MS,
+                        help="Longest time in milliseconds a change waits before it is saved")
+    parser.add_argument("--autosave-changes", type=int, default=AUTOSAVE_EVERY_CHANGES,
+                        help="Number of changes that are saved together at the latest")
+    parser.add_argument("--shared", action="store_true",
+                        help="Share the stores with other programs opened on them (e.g. the desktop app)")
+    args = parser.parse_args()
+
+    limit = raise_open_file_limit()
+    if limit is not None:
+        print(f"Up to {limit} open files")
+    try:
+        service = CompanyService(args.database, args.binary, args.read_only, args.autosave_ms, args.autosave_changes,
+                                 args.shared)
+    except StoresInUseError as e:
+        sys.exit(f"Error: {e}")
+    asyncio.run(serve(service, args.host, args.port))
@@ -0,0 +1,116 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from main_classes import *
+
+
+def _bytes_per_instance(make, count):
+    # Measures the memory held by count objects built by make(i), divided by count
+    tracemalloc.start()
+    objects = [make(i) for i in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return size / count
+
+
+def _dict_based(legacy_class, values):
+    # Rebuilds an object the way the classes stored it before __slots__: a plain instance with a __dict__
+    legacy = object.__new__(legacy_class)
+    legacy.__dict__.update(values)
+    return legacy
+
+
+def benchmark_memory(count=100000):
+    "Prints the bytes per instance of each entity with a __dict__ (before) and with __slots__ (after)"
+    name, contact = "Guest Name", "0500000000"
+    samples = {
+        Guest: lambda i: Guest(name, i, contact),
+        Employee: lambda i: Employee(i, name, "Sales", EmployeeType.SALESPERSON, 30000),
+        Client: lambda i: Client(name, i, "Address", contact, 10000),
+        Venue: lambda i: Venue(i, name, "Address", contact, 100, 500),
+        Supplier: lambda i: Supplier(i, name, contact, SupplierType.CATERING),
+        Event: lambda i: Event(i, EventType.WEDDINGS, "Theme", "2024-01-01", "18:00", 4, name, 1, [], [], 5000),
+    }
+    print(f"{'Class':<10}{'before (bytes)':>16}{'after (bytes)':>16}{'saved':>8}")
+    for cls, make in samples.items():
+        slot_names = [slot for klass in cls.__mro__ for slot in getattr(klass, "__slots__", ())]
+        legacy_class = type("Legacy" + cls.__name__, (), {})
+        before = _bytes_per_instance(
+            lambda i: _dict_based(legacy_class, {slot: getattr(make(i), slot) for slot in slot_names}), count)
+        after = _bytes_per_instance(make, count)
+        print(f"{cls.__name__:<10}{before:>16.1f}{after:>16.1f}{1 - after / before:>8.0%}")
+
+
+
+def _sample_store(collection, count):
+    # Builds a store of count records shaped like the ones the GUI creates
+    if collection == "guests":
+        return {i: Guest(f"Guest {i}", i, f"05{i:08d}") for i in range(count)}
+    if collection == "employees":
+        return {i: Employee(i, f"Employee {i}", "Sales", EmployeeType.SALESPERSON, 30000 + i % 5000)
+                for i in range(count)}
+    return {i: {"name": f"Event {i}", "type": "Weddings", "date": "2024-06-02", "venue": "The Glasshouse",
+                "theme": "Fancy", "invoice": 5000 + i % 1000} for i in range(count)}
+
+
+def benchmark_formats(counts=(10000, 100000, 1000000)):
+    "Prints save time, load time and file size of the pickle and binary formats for growing stores"
+    print(f"{'Store':<11}{'records':>9}{'format':>8}{'save (s)':>10}{'load (s)':>10}{'size (MB)':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        for collection in ("guests", "employees", "events"):
+            for count in counts:
+                data = _sample_store(collection, count)
+                for extension in (".pkl", ".bin"):
+                    file_path = os.path.join(directory, collection + extension)
+                    start = time.perf_counter()
+                    save_data(data, file_path)
+                    saved = time.perf_counter()
+                    load_data(file_path)
+                    loaded = time.perf_counter()
+                    print(f"{collection:<11}{count:>9}{extension[1:]:>8}{saved - start:>10.3f}"
+                          f"{loaded - saved:>10.3f}{os.path.getsize(file_path) / 1e6:>11.2f}")
+                    os.remove(file_path)
+
+def benchmark_service(count=10000):
+    "Prints the rate of guest adds, modifies and deletes through CompanyService, saved as they would be by the GUI"
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            service = CompanyService()
+            operations = (
+                ("add", lambda i: service.add_guest(None, f"Guest {i}", f"05{i:08d}")),
+                ("modify", lambda guest_id: service.modify_guest(guest_id, "Renamed", "0500000000")),
+                ("delete", service.delete_guest),
+            )
+            keys = range(count)
+            print(f"{'operation':<10}{'ops/s':>12}")
+            for name, operation in operations:
+                start = time.perf_counter()
+                results = [operation(key) for key in keys]
+                elapsed = time.perf_counter() - start
+                if name == "add":
+                    keys = results
+                print(f"{name:<10}{count / elapsed:>12,.0f}")
+            service.close()
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Performance benchmarks for the management system")
+    parser.add_argument("benchmark", choices=["memory", "formats", "service"])
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--counts", type=int, nargs="+", default=[10000, 100000, 1000000],
+                        help="Store sizes compared by the formats benchmark")
+    args = parser.parse_args()
+
+    if args.benchmark == "memory":
+        benchmark_memory(args.count)
+    elif args.benchmark == "formats":
+        benchmark_formats(args.counts)
+    elif args.benchmark == "service":
+        benchmark_service(args.count)
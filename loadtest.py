@@ -0,0 +1,124 @@
+import argparse
+import asyncio
+import http.client
+import json
+import random
+import threading
+import time
+from collections import Counter
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def _client(host, port, collection, deadline, writes, latencies, statuses, seed):
+    # One connection, kept alive, sending a mix of page reads, record reads and adds until the deadline
+    rng = random.Random(seed)
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    connection.request("GET", f"/{collection}?limit=100")
+    response = connection.getresponse()
+    page = json.loads(response.read())
+    keys = [item["id"] for item in page["items"]] or [1]
+    total = max(page["total"], 1)
+
+    while time.perf_counter() < deadline:
+        roll = rng.random()
+        if roll < writes:
+            method, path, body = "POST", f"/{collection}", json.dumps(
+                {"name": f"Load {rng.randrange(10 ** 6)}", "contact_details": "0500000000"})
+        elif roll < writes + (1 - writes) / 2:
+            method, path, body = "GET", f"/{collection}?offset={rng.randrange(total)}&limit=50", None
+        else:
+            method, path, body = "GET", f"/{collection}/{rng.choice(keys)}", None
+        start = time.perf_counter()
+        connection.request(method, path, body=body, headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status] += 1
+    connection.close()
+
+
+def run_load_test(host="127.0.0.1", port=8080, clients=8, seconds=10.0, writes=0.1, collection="guests"):
+    """Sends requests from several clients at once for a number of seconds, then prints the requests per second
+    and the latency percentiles. A fraction writes of the requests add a record; the rest read a page or one
+    record. Run it against a server started on a copy of the data, since it adds records."""
+    # Each client keeps its own results, merged once every client has finished
+    results = [([], Counter()) for seed in range(clients)]
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=_client, args=(host, port, collection, deadline, writes, latencies,
+                                                      statuses, seed))
+               for seed, (latencies, statuses) in enumerate(results)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for client_latencies, client_statuses in results for latency in client_latencies)
+    statuses = sum((client_statuses for client_latencies, client_statuses in results), Counter())
+    print(f"{len(latencies)} requests from {clients} clients in {elapsed:.1f} s "
+          f"({', '.join(f'{status}: {count}' for status, count in sorted(statuses.items()))})")
+    if latencies:
+        print(f"{len(latencies) / elapsed:,.0f} requests/s, latency p50 {_percentile(latencies, 0.5) * 1000:.1f} ms, "
+              f"p99 {_percentile(latencies, 0.99) * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms")
+
+
+async def _lookup_client(host, port, keys, deadline, latencies, seed):
+    # One kiosk looking up guests by ID over the line protocol until the deadline
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        writer.write(json.dumps({"op": "get", "store": "guests", "id": rng.choice(keys)}).encode() + b"\n")
+        await reader.readline()
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+async def run_kiosk_test(host="127.0.0.1", port=8081, idle=2000, clients=50, seconds=10.0):
+    """For async_server.py: opens idle connections that never send anything, then has clients look up guests by
+    ID for a number of seconds and prints the lookups per second and the latency percentiles."""
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b'{"op": "list", "store": "guests", "limit": 1000}\n')
+    keys = [item["id"] for item in json.loads(await reader.readline())["items"]] or [1]
+
+    idle_connections = [await asyncio.open_connection(host, port) for number in range(idle)]
+    writer.write(b'{"op": "ping"}\n')
+    print(f"Server has {json.loads(await reader.readline())['connections']} open connections")
+
+    results = [[] for seed in range(clients)]
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    await asyncio.gather(*(_lookup_client(host, port, keys, deadline, latencies, seed)
+                           for seed, latencies in enumerate(results)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for client_latencies in results for latency in client_latencies)
+    print(f"{len(latencies)} lookups from {clients} clients next to {idle} idle connections in {elapsed:.1f} s")
+    if latencies:
+        print(f"{len(latencies) / elapsed:,.0f} lookups/s, latency p50 {_percentile(latencies, 0.5) * 1000:.1f} ms, "
+              f"p99 {_percentile(latencies, 0.99) * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms")
+    for idle_reader, idle_writer in idle_connections:
+        idle_writer.close()
+    writer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test for server.py (http) and async_server.py (kiosk)")
+    parser.add_argument("mode", nargs="?", choices=["http", "kiosk"], default="http")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="Defaults to 8080 for http and 8081 for kiosk")
+    parser.add_argument("--clients", type=int, default=8,
+                        help="Concurrent connections (at most the server's --workers to avoid queueing)")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--writes", type=float, default=0.1, help="Fraction of requests that add a record (http)")
+    parser.add_argument("--idle", type=int, default=2000, help="Connections kept open without requests (kiosk)")
+    args = parser.parse_args()
+
+    if args.mode == "http":
+        run_load_test(args.host, args.port or 8080, args.clients, args.seconds, args.writes)
+    else:
+        asyncio.run(run_kiosk_test(args.host, args.port or 8081, args.idle, args.clients, args.seconds))
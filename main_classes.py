@@ -1,5 +1,35 @@
+import atexit
+import csv
+import heapq
+import json
+import math
+import mmap
+import os
 import pickle
+import queue
+import random
+import re
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from collections.abc import Mapping, MutableMapping
+from contextlib import contextmanager, suppress
+from datetime import date, datetime, timedelta
 from enum import Enum
+from functools import partial
+from itertools import accumulate, compress, repeat
+from operator import add
+
+try:
+    import fcntl
+except ImportError:  # Windows has no advisory file locks; stores are then only protected between threads
+    fcntl = None
 
 
 class EmployeeType(Enum):
@@ -32,7 +62,34 @@ class SupplierType(Enum):
     DECORATIONS = "Decorations"
     ENTERTAINMENT = "Entertainment"
 
-class Person:
+def _flatten_state(state):
+    # Slotted objects pickle their state as (None, {slot: value}); older .pkl files hold a plain __dict__
+    if isinstance(state, tuple):
+        return {**(state[0] or {}), **state[1]}
+    return dict(state)
+
+
+class Record:
+    "Base class of the stored entities, which use __slots__ instead of a per-instance __dict__"
+    __slots__ = ()
+
+    def __setstate__(self, state):
+        # Restores objects pickled with or without __slots__; attributes that no longer exist (such as the old
+        # Employee._employee_list) are dropped
+        for name, value in _flatten_state(state).items():
+            try:
+                setattr(self, name, value)
+            except AttributeError:
+                pass
+
+
+# Service types offered by the supplier forms (which say "Decoration" where SupplierType says "Decorations")
+SUPPLIER_SERVICES = {service.value for service in SupplierType} | {"Decoration"}
+
+
+class Person(Record):
+    __slots__ = ("_name",)
+
     def __init__(self, name):
         self._name = name
 
@@ -40,6 +97,8 @@ class Person:
         print(f"Name: {self._name}")
 
 class Employee(Person):
+    __slots__ = ("_employee_ID", "_basic_salary", "_department", "_job_title", "_manager_ID")
+
     def __init__(self, employee_ID, name, department, job_title, basic_salary, manager_ID=None):
         super().__init__(name)
         self._employee_ID = employee_ID
@@ -47,7 +106,6 @@ class Employee(Person):
         self._department = department
         self._job_title = job_title
         self._manager_ID = manager_ID
-        self._employee_list = []
 
         # Assigns a manager ID if the employee job title is not manager (managers would not have the attribute as None)
         if self._job_title not in (EmployeeType.SALES_MANAGERS, EmployeeType.MARKETING_MANAGERS):
@@ -89,21 +147,25 @@ class Employee(Person):
         self._manager_ID = manager_ID
 
     # Methods to be used in the system
-    def add_employee(self):
+    def add_employee(self, service):
         "This method adds an employee to the employee_list"
-        pass # This is implemented in the GUI
+        return service.add_employee(self._employee_ID, self._name, self._department, self._job_title,
+                                    self._manager_ID, self._basic_salary)
 
-    def delete_employee(self):
+    def delete_employee(self, service):
         "This method removes an existing employee from the employee_list"
-        pass # This is implemented in the GUI
+        service.delete_employee(self._employee_ID)
 
-    def modify_employee(self):
+    def modify_employee(self, service):
         "This method updates an existing employee's attributes"
-        pass # This is implemented in the GUI
+        return service.modify_employee(self._employee_ID, self._name, self._department, self._job_title,
+                                       self._manager_ID, self._basic_salary)
 
 
 
 class Client(Person):
+    __slots__ = ("_client_id", "_address", "_contact_details", "_budget")
+
     def __init__(self, name, client_id, address, contact_details, budget):
         super().__init__(name)
         self._client_id = client_id
@@ -121,24 +183,34 @@ class Client(Person):
 
 
     # Methods to be used in the system
-    def add_clients(self):
+    # Clients are stored as their bookings, so the booking's fields are passed along with the client
+    def add_clients(self, service, type, date, time, duration, venue):
         "This method adds a client to the client list"
-        pass  # This is implemented in the GUI
+        return service.add_client(self._client_id, type, date, time, duration, venue)
 
-    def delete_client(self):
+    def delete_client(self, service):
         "This method removes an existing client from the client_list"
-        pass  # This is implemented in the GUI
+        service.delete_client(self._client_id)
 
-    def modify_client(self):
+    def modify_client(self, service, type, date, time, duration, venue):
         "This method updates an existing client's attributes"
-        pass  # This is implemented in the GUI
+        return service.modify_client(self._client_id, type, date, time, duration, venue)
 
 class Guest(Person):
+    __slots__ = ("_guest_ID", "_contact_details")
+
     def __init__(self, name, guest_id, contact_details):
         super().__init__(name)
         self._guest_ID = guest_id
         self._contact_details = contact_details
 
+    def __setstate__(self, state):
+        # Guests saved by older versions of the GUI have their name and ID swapped
+        state = _flatten_state(state)
+        if isinstance(state.get("_name"), int) and isinstance(state.get("_guest_ID"), str):
+            state["_name"], state["_guest_ID"] = state["_guest_ID"], state["_name"]
+        super().__setstate__(state)
+
     def display(self):
         print("---" * 10, "Guest", "---" * 10)
         super().display()
@@ -147,19 +219,180 @@ class Guest(Person):
 
 
     # Methods to be used in the system
-    def add_guests(self):
+    def add_guests(self, service):
         "This method adds a guest to a guest list (which will then be added to an event's guest list)"
-        pass  # This is implemented in the GUI
+        return service.add_guest(self._guest_ID, self._name, self._contact_details)
 
-    def delete_guest(self):
+    def delete_guest(self, service):
         "This method removes an existing guest from a guest list"
-        pass  # This is implemented in the GUI
+        service.delete_guest(self._guest_ID)
 
-    def modify_guest(self):
+    def modify_guest(self, service):
         "This method updates an existing client's attributes"
-        pass  # This is implemented in the GUI
+        return service.modify_guest(self._guest_ID, self._name, self._contact_details)
+
+class StringColumn:
+    """Stores a column of strings back to back in one bytearray with an array of start offsets.
+
+    Every value is stored as a NUL byte followed by its UTF-8 text, so a whole batch is encoded and split in one
+    call, and a million values take two objects instead of a million strings.
+    """
+    def __init__(self):
+        self._data = bytearray()
+        self._offsets = array('Q', [0])
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def extend(self, values):
+        values = list(map(str, values))
+        if not values:
+            return
+        text = "\x00".join(values)
+        if text.count("\x00") != len(values) - 1:
+            text = "\x00".join(value.replace("\x00", "") for value in values)
+        # Encodes the whole batch at once; each value then takes one NUL byte plus the length of its text
+        encoded = ("\x00" + text).encode()
+        start = self._offsets[-1]
+        lengths = map(len, encoded.split(b"\x00")[1:])
+        self._offsets.extend(map(add, accumulate(lengths), range(start + 1, start + 1 + len(values))))
+        self._data += encoded
+
+    def get(self, row):
+        return self._data[self._offsets[row] + 1:self._offsets[row + 1]].decode()
+
+
+class GuestRow:
+    "A Guest-like view of one guest in a GuestColumns store; setting an attribute writes it back to the store"
+    __slots__ = ("_store", "_guest_ID")
+
+    def __init__(self, store, guest_id):
+        self._store = store
+        self._guest_ID = guest_id
+
+    @property
+    def _name(self):
+        return self._store._names.get(self._store._rows[self._guest_ID])
+
+    @_name.setter
+    def _name(self, name):
+        self._store[self._guest_ID] = Guest(name, self._guest_ID, self._contact_details)
+
+    @property
+    def _contact_details(self):
+        return self._store._contacts.get(self._store._rows[self._guest_ID])
+
+    @_contact_details.setter
+    def _contact_details(self, contact_details):
+        self._store[self._guest_ID] = Guest(self._name, self._guest_ID, contact_details)
+
+    def __reduce__(self):
+        # Pickles (e.g. into the journal) as a plain Guest rather than as a view of the whole store
+        return Guest, (self._name, self._guest_ID, self._contact_details)
+
+    def display(self):
+        Guest(self._name, self._guest_ID, self._contact_details).display()
+
+
+class GuestColumns(MutableMapping):
+    """A column-oriented guest store for very large guest lists.
+
+    Guest IDs live in an array, names and contact details in StringColumns, and each guest is one row across
+    them. Modifying a guest appends a new row and marks the old one as removed; the removed rows are dropped
+    again when they make up most of the store. Reading a guest returns a GuestRow view instead of a Guest object.
+    """
+    def __init__(self, guests=()):
+        self._ids = array('q')
+        self._alive = bytearray()
+        self._names = StringColumn()
+        self._contacts = StringColumn()
+        self._rows = {}
+        self.extend(guests)
+
+    @classmethod
+    def from_mapping(cls, guests):
+        "Converts a loaded {guest ID: Guest} store, keeping a store that is already columnar as it is"
+        return guests if isinstance(guests, cls) else cls(guests.values())
+
+    def extend(self, guests):
+        "Appends many guests at once (any objects with _guest_ID, _name and _contact_details)"
+        guests = list(guests)
+        first_row = len(self._ids)
+        self._ids.extend(guest._guest_ID for guest in guests)
+        self._alive.extend(b"\x01" * len(guests))
+        self._names.extend(guest._name for guest in guests)
+        self._contacts.extend(guest._contact_details for guest in guests)
+
+        # Earlier rows of the same guest (already stored, or repeated in this batch) are marked as removed
+        new_rows = dict(zip(self._ids[first_row:], range(first_row, len(self._ids))))
+        for guest_id in self._rows.keys() & new_rows.keys():
+            self._alive[self._rows[guest_id]] = 0
+        if len(new_rows) < len(guests):
+            kept = set(new_rows.values())
+            for row in range(first_row, len(self._ids)):
+                if row not in kept:
+                    self._alive[row] = 0
+        self._rows.update(new_rows)
+        if len(self._ids) > 2 * len(self._rows) + 1024:
+            self.compact()
+
+    def compact(self):
+        "Rewrites the columns without the rows of removed and modified guests"
+        alive = self._alive
+        ids, names, contacts = self._ids, self._names, self._contacts
+        self.__init__()
+        self.extend(Guest(names.get(row), ids[row], contacts.get(row)) for row in compress(range(len(ids)), alive))
+
+    def __getitem__(self, guest_id):
+        if guest_id not in self._rows:
+            raise KeyError(guest_id)
+        return GuestRow(self, guest_id)
+
+    def __setitem__(self, guest_id, guest):
+        # Writing back a view of the current row (as the GUI does after modifying a guest) changes nothing
+        if isinstance(guest, GuestRow) and guest._store is self and guest._guest_ID == guest_id:
+            return
+        self.extend([Guest(guest._name, guest_id, guest._contact_details)])
+
+    def __delitem__(self, guest_id):
+        self._alive[self._rows.pop(guest_id)] = 0
+
+    def update(self, guests=(), **kwargs):
+        # Adds many guests with one bulk append instead of one append per guest
+        items = guests.items() if hasattr(guests, "items") else guests
+        self.extend(Guest(guest._name, guest_id, guest._contact_details) for guest_id, guest in items)
+
+    def __iter__(self):
+        return compress(self._ids, self._alive)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, guest_id):
+        return guest_id in self._rows
+
+    def copy(self):
+        ids, names, name_offsets, contacts, contact_offsets = self.__getstate__()
+        copied = GuestColumns.__new__(GuestColumns)
+        copied.__setstate__((array('q', ids), bytearray(names), array('Q', name_offsets), bytearray(contacts),
+                             array('Q', contact_offsets)))
+        return copied
+
+    def __getstate__(self):
+        if len(self._ids) > len(self._rows):
+            self.compact()
+        return (self._ids, self._names._data, self._names._offsets, self._contacts._data, self._contacts._offsets)
+
+    def __setstate__(self, state):
+        self._ids, self._names, self._contacts = state[0], StringColumn(), StringColumn()
+        self._names._data, self._names._offsets, self._contacts._data, self._contacts._offsets = state[1:]
+        self._alive = bytearray(b"\x01" * len(self._ids))
+        self._rows = dict(zip(self._ids, range(len(self._ids))))
+
+
+class Venue(Record):
+    __slots__ = ("_venue_id", "_name", "_address", "_contact_details", "_min_guests", "_max_guests")
 
-class Venue:
     def __init__(self, venue_id, name, address, contact_details, min_guests, max_guests):
         self._venue_id = venue_id
         self._name = name
@@ -179,25 +412,35 @@ class Venue:
 
 
     # Methods to be used in the system
-    def add_venue(self):
+    def add_venue(self, service):
         "This method adds a venue to the venue list"
-        pass  # This is implemented in the GUI
+        return service.add_venue(self._venue_id, self._name, self._address, self._contact_details,
+                                 self._min_guests, self._max_guests)
 
-    def delete_venue(self):
+    def delete_venue(self, service):
         "This method removes an existing venue from the venue list"
-        pass  # This is implemented in the GUI
+        service.delete_venue(self._venue_id)
 
-    def modify_venue(self):
+    def modify_venue(self, service):
         "This method updates an existing venue's attributes"
-        pass  # This is implemented in the GUI
+        return service.modify_venue(self._venue_id, self._name, self._address, self._contact_details,
+                                    self._min_guests, self._max_guests)
+
+class Supplier(Record):
+    __slots__ = ("_supplier_id", "_name", "_contact_details", "_service_type")
 
-class Supplier:
     def __init__(self, supplier_id, name, contact_details, service_type):
         self._supplier_id = supplier_id
         self._name = name
         self._contact_details = contact_details
         self._service_type = service_type
 
+    def __setstate__(self, state):
+        # Suppliers added by older versions of the GUI have their contact details and service type swapped
+        state = _flatten_state(state)
+        if state.get("_contact_details") in SUPPLIER_SERVICES and state.get("_service_type") not in SUPPLIER_SERVICES:
+            state["_contact_details"], state["_service_type"] = state["_service_type"], state["_contact_details"]
+        super().__setstate__(state)
 
 
     def display(self):
@@ -208,19 +451,22 @@ class Supplier:
         print("Service Type:", self._service_type)
 
     # Methods to be used in the system
-    def add_supplier(self):
+    def add_supplier(self, service):
         "This method adds a supplier to the supplier list"
-        pass  # This is implemented in the GUI
+        return service.add_supplier(self._supplier_id, self._name, self._service_type, self._contact_details)
 
-    def delete_supplier(self):
+    def delete_supplier(self, service):
         "This method removes an existing supplier from the supplier list"
-        pass  # This is implemented in the GUI
+        service.delete_supplier(self._supplier_id)
 
-    def modify_supplier(self):
+    def modify_supplier(self, service):
         "This method updates an existing supplier's attributes"
-        pass  # This is implemented in the GUI
+        return service.modify_supplier(self._supplier_id, self._name, self._service_type, self._contact_details)
+
+class Event(Record):
+    __slots__ = ("_event_id", "_type", "_theme", "_date", "_time", "_duration", "_venue", "_client_id", "_suppliers",
+                 "_guest_list", "_invoice")
 
-class Event:
     def __init__(self, event_id, type: EventType, theme, date, time, duration, venue, client_id, suppliers,
                  guest_list, invoice):
 
@@ -252,27 +498,2529 @@ class Event:
 
 
     # Methods to be used in the system
-    def add_event(self):
+    # The events store holds named records without a client or time, so the name is passed along with the event;
+    # its guest list and suppliers hold the IDs of existing guests and suppliers
+    def _type_value(self):
+        return self._type.value if isinstance(self._type, EventType) else self._type
+
+    def add_event(self, service, name):
         "This method adds a event to the event list"
-        pass  # This is implemented in the GUI
+        event_id = service.add_event(self._event_id, name, self._type_value(), self._date, self._venue, self._theme,
+                                     self._invoice)
+        for field, member_ids in (("guests", self._guest_list), ("suppliers", self._suppliers)):
+            if member_ids:
+                service.add_event_members(event_id, field, member_ids)
+        return event_id
 
-    def delete_event(self):
+    def delete_event(self, service):
         "This method removes an existing event from the event list"
-        pass  # This is implemented in the GUI
+        service.delete_event(self._event_id)
 
-    def modify_event(self):
+    def modify_event(self, service, name):
         "This method updates an existing event's attributes"
-        pass  # This is implemented in the GUI
+        return service.modify_event(self._event_id, name, self._type_value(), self._date, self._venue, self._theme)
 
-# Functions to save and load data using pickle
-def load_data(file_path):
+
+# Indexes CompanyService keeps over the stores, so lookups and filtered views do not scan every record
+class EmployeeIndex:
+    "Keeps employee IDs grouped by department, job title and manager so filtered views do not scan every employee"
+    def __init__(self, employees=None):
+        self._by_department = {}
+        self._by_job_title = {}
+        self._by_manager = {}
+        # The index keys each employee was filed under, so a modified employee can be moved out of its old groups
+        self._indexed = {}
+        if employees:
+            for emp_id, employee in employees.items():
+                self.add(emp_id, employee)
+
+    @staticmethod
+    def _job_title_key(job_title):
+        return job_title.value if isinstance(job_title, Enum) else job_title
+
+    @staticmethod
+    def _manager_key(manager_ID):
+        # Manager IDs are stored as None, 'None', '1' or 1 depending on where the employee was created
+        if manager_ID is None or str(manager_ID).strip() in ("", "None"):
+            return None
+        try:
+            return int(manager_ID)
+        except ValueError:
+            return str(manager_ID).strip()
+
+    def add(self, emp_id, employee):
+        "Files an employee under its current department, job title and manager (also used after a modification)"
+        self.remove(emp_id)
+        keys = (employee._department, self._job_title_key(employee._job_title), self._manager_key(employee._manager_ID))
+        for groups, key in zip((self._by_department, self._by_job_title, self._by_manager), keys):
+            groups.setdefault(key, set()).add(emp_id)
+        self._indexed[emp_id] = keys
+
+    def remove(self, emp_id):
+        keys = self._indexed.pop(emp_id, None)
+        if keys is None:
+            return
+        for groups, key in zip((self._by_department, self._by_job_title, self._by_manager), keys):
+            groups[key].discard(emp_id)
+            if not groups[key]:
+                del groups[key]
+
+    def by_department(self, department):
+        return set(self._by_department.get(department, ()))
+
+    def by_job_title(self, job_title):
+        return set(self._by_job_title.get(self._job_title_key(job_title), ()))
+
+    def by_manager(self, manager_ID):
+        return set(self._by_manager.get(self._manager_key(manager_ID), ()))
+
+    def departments(self):
+        return sorted(self._by_department, key=str)
+
+    def job_titles(self):
+        return sorted(self._by_job_title, key=str)
+
+    def managers(self):
+        return sorted((manager for manager in self._by_manager if manager is not None), key=str)
+
+    def hierarchy(self):
+        "Returns each manager ID with the sorted IDs of the employees reporting directly to it"
+        return {manager: sorted(reports) for manager, reports in self._by_manager.items() if manager is not None}
+
+    def reports_under(self, manager_ID):
+        "Returns the IDs of everyone under a manager, directly or through other managers"
+        found = set()
+        pending = [self._manager_key(manager_ID)]
+        while pending:
+            for emp_id in self._by_manager.get(pending.pop(), ()):
+                if emp_id not in found:
+                    found.add(emp_id)
+                    pending.append(emp_id)
+        return found
+
+
+def parse_date(value):
+    "Parses a yyyy-mm-dd date string, returning None if it is not a valid date"
     try:
-        with open(file_path, 'rb') as file:
-            return pickle.load(file)
+        return date.fromisoformat(str(value).strip())
+    except ValueError:
+        return None
+
+
+class DateIndex:
+    "Keeps record IDs sorted by their 'date' so date ranges can be found by binary search instead of a full scan"
+    def __init__(self, records=None):
+        self._entries = []
+        self._dates = {}
+        if records:
+            self._entries = sorted((day, key) for key, day in
+                                   ((key, parse_date(record['date'])) for key, record in records.items())
+                                   if day is not None)
+            self._dates = {key: day for day, key in self._entries}
+
+    def add(self, key, date_string):
+        "Indexes a record under its date (also used after a modification); records with invalid dates are skipped"
+        self.remove(key)
+        day = parse_date(date_string)
+        if day is not None:
+            insort(self._entries, (day, key))
+            self._dates[key] = day
+
+    def remove(self, key):
+        day = self._dates.pop(key, None)
+        if day is not None:
+            del self._entries[bisect_left(self._entries, (day, key))]
+
+    def between(self, start, end):
+        "Returns the IDs of records dated from start to end (both included, as dates or yyyy-mm-dd strings)"
+        start = parse_date(start) if isinstance(start, str) else start
+        end = parse_date(end) if isinstance(end, str) else end
+        low = 0 if start is None else bisect_left(self._entries, (start,))
+        high = len(self._entries) if end is None else bisect_left(self._entries, (end + timedelta(days=1),))
+        return [key for day, key in self._entries[low:high]]
+
+    def on(self, day):
+        return self.between(day, day)
+
+    def next_days(self, days, today=None):
+        "Returns the IDs of records dated in the given number of days starting today"
+        today = today or date.today()
+        return self.between(today, today + timedelta(days=days - 1))
+
+
+def booking_interval(record):
+    """Returns the (start, end) datetimes a client booking or event takes its venue for, or None if it cannot be read.
+
+    Client bookings have a 'time' (hh:mm) and a 'duration' in hours. Events only have a date, so they take the
+    venue for the whole day.
+    """
+    day = parse_date(record.get('date'))
+    if day is None:
+        return None
+    start = datetime.combine(day, datetime.min.time())
+    if 'time' not in record:
+        return start, start + timedelta(days=1)
+    try:
+        hours, minutes = (int(part) for part in str(record['time']).split(':'))
+        length = timedelta(hours=float(record['duration']))
+        start = start.replace(hour=hours, minute=minutes)
+    except ValueError:
+        return None
+    if length <= timedelta(0):
+        return None
+    return start, start + length
+
+
+class VenueBookingIndex:
+    """Keeps the bookings of each venue sorted by start time to find double bookings.
+
+    Each venue keeps its bookings in classes by length: class c holds the bookings longer than 2**(c-1) and at
+    most 2**c seconds, as a list of (start, end, key) sorted by start. A booking of class c can only overlap a new
+    one if it starts before the new one ends and at most 2**c seconds before it starts, so a conflict check is
+    two binary searches per class plus a look at the bookings in between. Of those, the ones that end too early
+    all overlap each other, so there is at most one per class unless the venue is already double booked. A single
+    very long booking therefore does not slow down the checks of the others. Keys are ("client", client_id) for
+    client bookings and ("event", event_id) for events.
+    """
+    def __init__(self, clients_events=None, events=None):
+        self._venues = {}
+        self._bookings = {}
+        for kind, records in (("client", clients_events), ("event", events)):
+            for record_id, record in (records or {}).items():
+                self.add((kind, record_id), record)
+
+    @staticmethod
+    def _length_class(start, end):
+        return (math.ceil((end - start).total_seconds()) - 1).bit_length()
+
+    def add(self, key, record):
+        "Indexes a booking under its venue (also used after a modification); unreadable bookings are skipped"
+        self.remove(key)
+        interval = booking_interval(record)
+        if interval is None:
+            return
+        venue = record['venue']
+        start, end = interval
+        length_class = self._length_class(start, end)
+        insort(self._venues.setdefault(venue, {}).setdefault(length_class, []), (start, end, key))
+        self._bookings[key] = (venue, length_class, start, end)
+
+    def remove(self, key):
+        booking = self._bookings.pop(key, None)
+        if booking is None:
+            return
+        venue, length_class, start, end = booking
+        classes = self._venues[venue]
+        bookings = classes[length_class]
+        del bookings[bisect_left(bookings, (start, end, key))]
+        if not bookings:
+            del classes[length_class]
+            if not classes:
+                del self._venues[venue]
+
+    def conflicts(self, record, ignore=None):
+        "Returns the keys of the bookings at the same venue that overlap the given one, except the ignored key"
+        interval = booking_interval(record)
+        classes = self._venues.get(record.get('venue'))
+        if interval is None or not classes:
+            return []
+        start, end = interval
+        found = []
+        for length_class, bookings in classes.items():
+            try:
+                low = bisect_left(bookings, (start - timedelta(seconds=2 ** length_class),))
+            except OverflowError:
+                low = 0
+            high = bisect_left(bookings, (end,))
+            found.extend((other_start, key) for other_start, other_end, key in bookings[low:high]
+                         if other_end > start and key != ignore)
+        return [key for other_start, key in sorted(found)]
+
+    def find_all_conflicts(self):
+        "Returns (venue, key, key) for every pair of overlapping bookings with one sweep per venue"
+        conflicts = []
+        for venue, classes in self._venues.items():
+            # Bookings that have started and not yet ended, as a heap ordered by end time
+            active = []
+            for start, end, key in heapq.merge(*classes.values()):
+                while active and active[0][0] <= start:
+                    heapq.heappop(active)
+                conflicts.extend((venue, other_key, key) for other_end, other_key in active)
+                heapq.heappush(active, (end, key))
+        return conflicts
+
+
+# Fields of an event record holding the IDs of its guests and suppliers, named after the stores the IDs belong to.
+# Each is a set of IDs (missing in events saved before they existed), so an event never holds copies of records.
+EVENT_MEMBERS = ("guests", "suppliers")
+
+
+class MemberIndex:
+    """Which events each guest (or supplier) belongs to: the reverse of one member field of the events.
+
+    Every member ID maps to the set of events it is on, next to a copy of each event's members. link and unlink
+    change k members of an event in O(k), so a bulk add or remove never touches the rest of a 2,000-guest list,
+    and "which events is guest 512 invited to" is a single lookup. add re-indexes a whole event record, e.g.
+    after another program changed it.
+    """
+    def __init__(self, events=None, field="guests"):
+        self.field = field
+        self._members = {}
+        self._events = {}
+        for event_id, event in (events or {}).items():
+            self.add(event_id, event)
+
+    def add(self, event_id, event):
+        "Indexes the members of an event record (also used after a modification)"
+        old = self._members.get(event_id, set())
+        new = set(event.get(self.field, ()))
+        self.unlink(event_id, old - new)
+        self.link(event_id, new - old)
+
+    def remove(self, event_id):
+        self.unlink(event_id, list(self._members.get(event_id, ())))
+        self._members.pop(event_id, None)
+
+    def link(self, event_id, member_ids):
+        members = self._members.setdefault(event_id, set())
+        for member_id in member_ids:
+            members.add(member_id)
+            self._events.setdefault(member_id, set()).add(event_id)
+
+    def unlink(self, event_id, member_ids):
+        members = self._members.get(event_id, set())
+        for member_id in member_ids:
+            members.discard(member_id)
+            events = self._events.get(member_id)
+            if events is not None:
+                events.discard(event_id)
+                if not events:
+                    del self._events[member_id]
+
+    def events_of(self, member_id):
+        "Returns the IDs of the events a guest or supplier is on, in ID order"
+        return sorted(self._events.get(member_id, ()))
+
+
+_NUMBER = re.compile(r"[+-]?\d+(\.\d+)?")
+
+
+def sort_key(value):
+    "Orders numbers (also those stored as text, like '750') before other text, ignoring case, and empty values last"
+    if isinstance(value, Enum):
+        value = value.value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (0, value)
+    text = "" if value is None else str(value).strip()
+    if text in ("", "None"):
+        return (2, "")
+    if _NUMBER.fullmatch(text):
+        return (0, float(text))
+    return (1, text.lower())
+
+
+class ColumnIndex:
+    """Record IDs kept sorted by the values of one table column.
+
+    value(key) returns the column value of a record. Sorting by the column, in either direction, copies the
+    already sorted IDs, and filters are binary searches for a range of values. Changed records are moved with
+    add/remove instead of sorting again.
+    """
+    def __init__(self, keys=(), value=None):
+        self.value = value
+        self._indexed = {key: sort_key(value(key)) for key in keys}
+        self._entries = sorted((indexed, key) for key, indexed in self._indexed.items())
+        self._keys = [key for indexed, key in self._entries]
+
+    def add(self, key):
+        "Files a record under its current value (also used after a modification)"
+        self.remove(key)
+        indexed = self._indexed[key] = sort_key(self.value(key))
+        position = bisect_left(self._entries, (indexed, key))
+        self._entries.insert(position, (indexed, key))
+        self._keys.insert(position, key)
+
+    def remove(self, key):
+        indexed = self._indexed.pop(key, None)
+        if indexed is not None:
+            position = bisect_left(self._entries, (indexed, key))
+            del self._entries[position]
+            del self._keys[position]
+
+    def ordered(self, descending=False):
+        return self._keys[::-1] if descending else list(self._keys)
+
+    def sort(self, keys, descending=False):
+        "Orders some of the indexed records, e.g. the rows left by a filter"
+        return sorted(keys, key=self._indexed.__getitem__, reverse=descending)
+
+    def between(self, low=None, high=None):
+        "Records whose value is from low to high (both included); a missing end is open"
+        start = 0 if low is None else bisect_left(self._entries, (sort_key(low),))
+        end = len(self._entries) if high is None else bisect_right(self._entries, (sort_key(high), float("inf")))
+        return self._keys[start:end]
+
+    def matching(self, text):
+        """Answers a filter typed by the user: 'low..high' is a range, a number must be equal and any other text
+        is a prefix."""
+        if ".." in text:
+            low, high = (part.strip() or None for part in text.split("..", 1))
+            return self.between(low, high)
+        kind, value = sort_key(text)
+        if kind != 1:
+            return self.between(text, text)
+        start = bisect_left(self._entries, ((1, value),))
+        end = bisect_left(self._entries, ((1, value + "\U0010ffff"),))
+        return self._keys[start:end]
+
+
+# Number of matches a TextSearchIndex returns at most, so a short query stays fast on a very large store.
+# The GUI waits SEARCH_DELAY_MS after the last keystroke before searching, and indexes SEARCH_INDEX_CHUNK records
+# between two Tk events.
+SEARCH_LIMIT = 500
+SEARCH_DELAY_MS = 250
+SEARCH_INDEX_CHUNK = 2000
+
+
+def search_text(values):
+    "The text a search matches against: the fields, lowercased and kept apart by a line break"
+    return "\n".join(map(str, values)).lower()
+
+
+def text_matches(query, text):
+    """Whether a stripped, lowercased query matches a search_text: a query of one or two characters matches the
+    start of a word (words are split at any whitespace), a longer one any part of a field."""
+    if len(query) < 3:
+        return any(word.startswith(query) for word in text.split())
+    return query in text
+
+
+class TextSearchIndex:
+    """Finds records whose name or contact details contain a piece of text, ignoring case.
+
+    Every three-character sequence (trigram) of a record's text and the first one and two characters of each of
+    its words point to the records that contain them. A query of three or more characters only checks the
+    records listed under its rarest trigram; a shorter one matches the start of words. Candidates are checked
+    with text_matches, which SQLiteCollection.search uses too, so both find the same records; only the order,
+    and so which ones are left out past the limit, can differ. Postings are lists of
+    IDs that are only appended to: a modified record adds the trigrams it gained, and the ones it lost (or all of
+    a removed record's) are left behind as stale entries, which searches skip by checking every candidate
+    against the record's current text. Once stale entries outnumber live ones, the lists are rebuilt from the
+    current texts, so they never grow past twice their live size.
+    """
+    def __init__(self, records=None, fields=("_name", "_contact_details")):
+        self.fields = fields
+        self._postings = defaultdict(list)
+        self._texts = {}
+        # Number of posting entries that still point at a record with that trigram, and of those that don't
+        self._live = 0
+        self._stale = 0
+        if records:
+            self.add_many(records.items())
+
+    @staticmethod
+    def _grams(text):
+        # The fields are kept apart by a line break, which no stripped query can contain
+        grams = {text[i:i + 3] for i in range(len(text) - 2)}
+        for word in text.split():
+            grams.update(("\0" + word[:1], "\0" + word[:2]))
+        return grams
+
+    def add(self, key, record):
+        "Indexes a record by its current text (also used after a modification)"
+        text = search_text(getattr(record, field, "") for field in self.fields)
+        old = self._texts.get(key)
+        if old == text:
+            return
+        self._texts[key] = text
+        grams = self._grams(text)
+        if old is not None:
+            old_grams = self._grams(old)
+            self._stale += len(old_grams - grams)
+            self._live -= len(old_grams - grams)
+            grams -= old_grams
+        postings = self._postings
+        for gram in grams:
+            postings[gram].append(key)
+        self._live += len(grams)
+        self._compact_if_stale()
+
+    def add_many(self, items):
+        "Indexes (key, record) pairs, e.g. a slice of a store's items()"
+        for key, record in items:
+            self.add(key, record)
+
+    def remove(self, key):
+        text = self._texts.pop(key, None)
+        if text is not None:
+            count = len(self._grams(text))
+            self._stale += count
+            self._live -= count
+            self._compact_if_stale()
+
+    def _compact_if_stale(self):
+        # Rebuilding costs one pass over the texts and only happens after as many stale entries piled up, so
+        # it adds O(1) per change on average
+        if self._stale > self._live:
+            postings = self._postings = defaultdict(list)
+            self._live = self._stale = 0
+            for key, text in self._texts.items():
+                grams = self._grams(text)
+                for gram in grams:
+                    postings[gram].append(key)
+                self._live += len(grams)
+
+    def __len__(self):
+        return len(self._texts)
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        "Returns the IDs of up to limit records matching query, in the order they were indexed"
+        query = query.strip().lower()
+        if not query:
+            return []
+        if len(query) < 3:
+            candidates = self._postings.get("\0" + query, ())
+        else:
+            grams = [query[i:i + 3] for i in range(len(query) - 2)]
+            candidates = min((self._postings.get(gram, ()) for gram in grams), key=len)
+        found = {}
+        for key in candidates:
+            text = self._texts.get(key)
+            if text is not None and key not in found and text_matches(query, text):
+                found[key] = None
+                if len(found) >= limit:
+                    break
+        return list(found)
+
+
+# Validation shared by CompanyService and the bulk importer. Each function raises ValueError with the message the
+# GUI shows when a field is missing or invalid.
+def build_employee(employee_ID, name, department, job_title, manager_ID, basic_salary):
+    if not job_title:
+        raise ValueError("Job Title cannot be empty!")
+    # The modify form shows a missing manager ID as "None"
+    if manager_ID is None or str(manager_ID).strip() in ("", "None"):
+        manager_ID = None
+
+    # Accepts the job title either as its enum name (SALES_MANAGERS) or as shown in the forms (Sales Managers)
+    job_title_enum = str(job_title).strip().replace(' ', '_').upper()
+    if isinstance(job_title, EmployeeType):
+        employee_type = job_title
+    elif job_title_enum in EmployeeType.__members__:
+        employee_type = EmployeeType[job_title_enum]
+    elif isinstance(job_title, str) and job_title.strip() in {member.value for member in EmployeeType}:
+        employee_type = EmployeeType(job_title.strip())
+    else:
+        raise ValueError(f"Unknown job title: {job_title}")
+
+    if not (name and department):
+        raise ValueError("All fields are required!")
+    try:
+        basic_salary = int(basic_salary)
+    except (TypeError, ValueError):
+        raise ValueError(f"Basic salary must be a whole number: {basic_salary}")
+    return Employee(employee_ID, name, department, employee_type, basic_salary, manager_ID)
+
+
+def build_supplier(supplier_id, name, service_type, contact_details):
+    if not (name and service_type and contact_details):
+        raise ValueError("All fields are required!")
+    return Supplier(supplier_id, name, contact_details, service_type)
+
+
+def build_guest(guest_id, name, contact_details):
+    if not (name and contact_details):
+        raise ValueError("All fields are required!")
+    return Guest(name, guest_id, contact_details)
+
+
+def build_venue(venue_id, name, address, contact_details, min_guests, max_guests):
+    if not (name and address and contact_details and min_guests and max_guests):
+        raise ValueError("All fields are required!")
+    try:
+        smallest, largest = int(min_guests), int(max_guests)
+    except (TypeError, ValueError):
+        raise ValueError("Min and max guests must be whole numbers")
+    if smallest > largest:
+        raise ValueError("Min guests cannot be more than max guests")
+    return Venue(venue_id, name, address, contact_details, min_guests, max_guests)
+
+
+def _check_booking(booking):
+    # Bookings the venue index can't place would never be checked for double bookings
+    if parse_date(booking['date']) is None:
+        raise ValueError("Dates must be in the format yyyy-mm-dd")
+    if booking_interval(booking) is None:
+        raise ValueError("Time must be in the format hh:mm and the duration a number of hours")
+    return booking
+
+
+def build_client_booking(type, date, time, duration, venue):
+    if not (type and date and time and duration and venue):
+        raise ValueError("All fields are required!")
+    return _check_booking({'type': type, 'date': date, 'time': time, 'duration': duration, 'venue': venue})
+
+
+def build_event(name, type, date, venue, theme, invoice):
+    if not (name and type and date and venue and theme):
+        raise ValueError("All fields are required!")
+    return _check_booking({'name': name, 'type': type, 'date': date, 'venue': venue, 'theme': theme,
+                           'invoice': invoice})
+
+
+def parse_id_list(text):
+    "Reads IDs typed as a list such as '3, 7, 10-250': commas or spaces between IDs, a dash for a range"
+    ids = []
+    for part in text.replace(",", " ").split():
+        first, dash, last = part.partition("-")
+        try:
+            if dash:
+                if int(last) < int(first):
+                    raise ValueError
+                ids.extend(range(int(first), int(last) + 1))
+            else:
+                ids.append(int(part))
+        except ValueError:
+            raise ValueError("IDs must be whole numbers or ranges such as 10-20") from None
+    if not ids:
+        raise ValueError("Enter at least one ID")
+    return ids
+
+
+class StoreLock:
+    """Advisory lock on one store, held by one thread of one process at a time.
+
+    It is an flock on a .lock file next to the store plus a thread lock, so it keeps apart the threads of a
+    process as well as the processes using the same files. It is reentrant: a thread holding it can take it
+    again, e.g. when a store is loaded while a change to it is being made.
+    """
+    def __init__(self, file_path):
+        self.path = file_path + ".lock"
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self._file = open(self.path, "a+b")
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            # Closing the file releases the flock
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class StoresInUseError(Exception):
+    "Raised when the stores are already open in another process that uses them in a way that can't be combined"
+
+
+def lock_stores(name, shared):
+    """Marks the stores (the .pkl or .bin files of the current folder, or a database) as in use by this process.
+
+    Processes that share the stores take a shared lock and follow each other's changes; a process that keeps
+    them in memory and saves in the background takes an exclusive lock, so no other process can overwrite its
+    changes or have them overwritten. Returns the lock file, to be kept open for as long as the stores are used.
+    """
+    file = open(name + ".lock", "a+b")
+    if fcntl is not None:
+        try:
+            fcntl.flock(file.fileno(), (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | fcntl.LOCK_NB)
+        except BlockingIOError:
+            file.close()
+            if shared:
+                raise StoresInUseError("The data is open in a program that doesn't share it (such as a server "
+                                       "started without --shared). Close that program first.")
+            raise StoresInUseError("The data is already open in another program. Start every copy with "
+                                   "--shared to use it together.")
+    return file
+
+
+# Number of IDs an IdSequence reserves on disk at a time
+ID_BLOCK_SIZE = 100
+
+
+class IdSequence:
+    """Hands out increasing IDs for one store without scanning its keys for every new record.
+
+    The highest reserved ID is kept in a .seq file named after the collection (not the store file, so it
+    survives converting a .pkl store into a .bin one), and IDs of deleted records are never reused, even across
+    restarts. The file is only rewritten once per block of ID_BLOCK_SIZE IDs; IDs reserved but not used before
+    the program exits are skipped. Allocation is thread-safe, and processes sharing the store reserve their
+    blocks under a StoreLock, so they never hand out the same ID. previous_names are names the sequence was
+    saved under by older versions; their marks still count.
+    """
+    def __init__(self, name, data, block_size=ID_BLOCK_SIZE, previous_names=()):
+        self.file_path = name + ".seq"
+        self.data = data
+        self.block_size = block_size
+        self.previous_paths = [previous + ".seq" for previous in previous_names]
+        self._lock = threading.Lock()
+        self._file_lock = StoreLock(self.file_path)
+        self._next = None
+        self._reserved = None
+
+    @staticmethod
+    def _read_mark(path):
+        try:
+            with open(path) as file:
+                return int(file.read())
+        except (FileNotFoundError, ValueError):
+            return 1
+
+    def _saved_mark(self):
+        return self._read_mark(self.file_path)
+
+    def _load(self):
+        # Runs once: the saved marks also cover deleted records, the keys cover records added elsewhere
+        self._next = self._reserved = max(self._saved_mark(), *map(self._read_mark, self.previous_paths),
+                                          max(self.data.keys(), default=0) + 1)
+
+    def _reserve(self, count):
+        # Another process may have reserved a block since this one did; the new block starts after it
+        with self._file_lock:
+            self._next = max(self._next, self._saved_mark())
+            self._reserved = self._next + count + self.block_size
+            temp_path = self.file_path + ".tmp"
+            with open(temp_path, "w") as file:
+                file.write(str(self._reserved))
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.file_path)
+
+    def allocate(self, count=1):
+        "Returns the first of count new consecutive IDs"
+        with self._lock:
+            if self._next is None:
+                self._load()
+            if self._next + count > self._reserved:
+                self._reserve(count)
+            first = self._next
+            self._next += count
+            return first
+
+    def next_id(self):
+        return self.allocate()
+
+    def advance_past(self, key):
+        "Makes sure an ID chosen by hand is never handed out again"
+        with self._lock:
+            if self._next is None:
+                self._load()
+            if key >= self._next:
+                self._next = key + 1
+                if self._next > self._reserved:
+                    self._reserve(0)
+
+
+# Number of journal entries a store collects before it is compacted into a new snapshot in the background
+JOURNAL_COMPACT_EVERY = 500
+
+_journal_lock = threading.Lock()
+_journal_counts = {}
+
+
+def journal_path(file_path):
+    return file_path + ".journal"
+
+
+def _rotated_journal_path(file_path):
+    # Older versions rotated the journal here while they compacted it; load_data still replays such a file
+    return file_path + ".journal.1"
+
+
+def _apply_journal_entry(data, entry):
+    # Applies one journal entry to a store and returns the key of the record it changed. An entry is either
+    # (key, present, value), the whole record or its deletion, or (key, field, added, removed), a change to the
+    # guests or suppliers of an event, which is made to its set in place.
+    if len(entry) == 4:
+        key, field, added, removed = entry
+        record = data.get(key)
+        if record is not None:
+            members = record.setdefault(field, set())
+            members.difference_update(removed)
+            members.update(added)
+        return key
+    key, present, value = entry
+    if present:
+        data[key] = value
+    else:
+        data.pop(key, None)
+    return key
+
+
+def _replay_journal(data, path):
+    # Applies every complete entry of a journal file to data and returns how many were applied.
+    # A torn entry at the end (the program was killed mid-append) is cut off so later appends stay readable.
+    count = 0
+    try:
+        with open(path, 'rb+') as file:
+            while True:
+                offset = file.tell()
+                try:
+                    entry = pickle.load(file)
+                except EOFError:
+                    break
+                except (pickle.UnpicklingError, ValueError):
+                    file.truncate(offset)
+                    break
+                _apply_journal_entry(data, entry)
+                count += 1
     except FileNotFoundError:
+        pass
+    return count
+
+
+# Snapshot files start with SNAPSHOT_MAGIC and a header holding the length and CRC-32 of the pickled data.
+# Files without it are plain pickles written by older versions and are still read.
+SNAPSHOT_MAGIC = b"BEMSNAP1"
+SNAPSHOT_HEADER = struct.Struct("<QI")
+
+
+def previous_snapshot_path(file_path):
+    return file_path + ".prev"
+
+
+class _ChecksumWriter:
+    # Counts and checksums the bytes pickle writes on their way to the file
+    def __init__(self, file):
+        self.file = file
+        self.length = 0
+        self.checksum = 0
+
+    def write(self, data):
+        self.length += len(data)
+        self.checksum = zlib.crc32(data, self.checksum)
+        return self.file.write(data)
+
+
+def _fsync_directory(path):
+    # Makes the renames inside a directory durable; not possible (nor needed) on Windows
+    if hasattr(os, "O_DIRECTORY"):
+        descriptor = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+
+
+def _write_checksummed(file_path, magic, dump, staged=False):
+    # Writes and fsyncs a temporary file first, so an interrupted write never leaves a truncated snapshot
+    # behind. A staged write (named after the process, as several may stage one) returns the temporary file
+    # for _install_snapshot to put in place later.
+    temp_path = f"{file_path}.{os.getpid()}.tmp" if staged else file_path + ".tmp"
+    try:
+        with open(temp_path, 'wb') as file:
+            file.write(magic + SNAPSHOT_HEADER.pack(0, 0))
+            writer = _ChecksumWriter(file)
+            dump(writer)
+            file.seek(len(magic))
+            file.write(SNAPSHOT_HEADER.pack(writer.length, writer.checksum))
+            file.flush()
+            os.fsync(file.fileno())
+    except BaseException:
+        # A failed cleanup (e.g. the file was never created) must not hide the error of the write itself
+        with suppress(OSError):
+            os.remove(temp_path)
+        raise
+    if staged:
+        return temp_path
+    _install_snapshot(temp_path, file_path)
+
+
+def _install_snapshot(temp_path, file_path):
+    # The snapshot it replaces is kept as the previous generation for load_data to fall back to
+    if os.path.exists(file_path):
+        os.replace(file_path, previous_snapshot_path(file_path))
+    os.replace(temp_path, file_path)
+    _fsync_directory(file_path)
+
+
+def _write_snapshot(data, file_path, staged=False):
+    # .bin stores use the compact binary format, every other store is pickled
+    collection = binary_collection(file_path)
+    if collection:
+        return _write_checksummed(file_path, BINARY_MAGIC, lambda out: write_binary(data, collection, out), staged)
+    return _write_checksummed(file_path, SNAPSHOT_MAGIC, lambda out: pickle.dump(data, out), staged)
+
+
+def _read_snapshot(file_path):
+    # Returns the data of a snapshot file. Raises ValueError if its checksum shows it is damaged.
+    with open(file_path, 'rb') as file:
+        magic = file.read(len(SNAPSHOT_MAGIC))
+        if magic not in (SNAPSHOT_MAGIC, BINARY_MAGIC):
+            file.seek(0)
+            return pickle.load(file)
+        length, checksum = SNAPSHOT_HEADER.unpack(file.read(SNAPSHOT_HEADER.size))
+        payload = file.read()
+    if len(payload) != length or zlib.crc32(payload) != checksum:
+        raise ValueError("checksum mismatch")
+    return read_binary(payload) if magic == BINARY_MAGIC else pickle.loads(payload)
+
+
+# Functions to save and load data using pickle
+def load_data(file_path):
+    # Loads the last snapshot and replays the journal entries written since then.
+    # If the snapshot is missing or damaged, the previous generation is used instead.
+    for path in (file_path, previous_snapshot_path(file_path)):
+        try:
+            data = _read_snapshot(path)
+            break
+        except FileNotFoundError:
+            continue
+        except (ValueError, EOFError, pickle.UnpicklingError) as e:
+            print(f"{path} is damaged ({e}), trying the previous snapshot.")
+    else:
         print("File not found. Initializing new data.")
-        return {}
+        data = {}
+    _replay_journal(data, _rotated_journal_path(file_path))
+    count = _replay_journal(data, journal_path(file_path))
+    with _journal_lock:
+        _journal_counts[file_path] = count
+    return data
 
 def save_data(data, file_path):
-    with open(file_path, 'wb') as file:
-        pickle.dump(data, file)
\ No newline at end of file
+    # Rewrites the whole snapshot, so any journal entries are already part of it.
+    with _journal_lock:
+        _replace_snapshot(data, file_path)
+        _journal_counts[file_path] = 0
+
+def _replace_snapshot(data, file_path):
+    # Callers hold _journal_lock
+    _write_snapshot(data, file_path)
+    for path in (journal_path(file_path), _rotated_journal_path(file_path)):
+        if os.path.exists(path):
+            os.remove(path)
+
+def _append_journal(file_path, entries):
+    if entries:
+        with open(journal_path(file_path), 'ab') as file:
+            file.write(entries)
+
+class LazyStore(MutableMapping):
+    "A store that loads its .pkl file the first time it is used instead of when the program starts"
+    def __init__(self, file_path, factory=None, loader=None):
+        # factory optionally converts the loaded data, e.g. into a GuestColumns store; loader reads the file
+        # (load_data, or SharedJournal.load when other processes write the store too)
+        self.file_path = file_path
+        self.factory = factory
+        self.loader = loader or load_data
+        self._data = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            start = time.perf_counter()
+            data = self.loader(self.file_path)
+            self._data = self.factory(data) if self.factory else data
+            print(f"Loaded {self.file_path} ({len(self._data)} records) in "
+                  f"{(time.perf_counter() - start) * 1000:.1f} ms")
+        return self._data
+
+    def is_loaded(self):
+        return self._data is not None
+
+    def reload(self):
+        "Forgets the loaded records, so the file is read again the next time the store is used"
+        self._data = None
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+
+    def __delitem__(self, key):
+        del self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def keys(self):
+        return self.data.keys()
+
+    def items(self):
+        return self.data.items()
+
+    def values(self):
+        return self.data.values()
+
+    def copy(self):
+        return self.data.copy()
+
+    def update(self, *args, **kwargs):
+        self.data.update(*args, **kwargs)
+
+
+def _journal_entry(data, key):
+    return pickle.dumps((key, True, data[key]) if key in data else (key, False, None))
+
+
+def _journal_entries(data, keys, member_changes):
+    # The pickled entries of a submit, in the order they are to be appended: member changes first, since the
+    # records written after them already include them. Member changes never replace another entry, so each
+    # gets a key of its own.
+    entries = {object(): pickle.dumps(change) for change in member_changes}
+    entries.update((key, _journal_entry(data, key)) for key in keys)
+    return entries
+
+
+def _merge_entries(target, entries):
+    # The entry of a record moves to the end, after any member changes of the record queued before it
+    for key, entry in entries.items():
+        target.pop(key, None)
+        target[key] = entry
+
+
+def _copy_store(data):
+    # A copy of a store for another thread to write. The guest and supplier sets of events are changed in place
+    # (see CompanyService.add_event_members), so every event of the copy gets its own.
+    copied = data.copy()
+    if isinstance(copied, dict):
+        for key, record in copied.items():
+            if isinstance(record, dict) and not record.keys().isdisjoint(EVENT_MEMBERS):
+                copied[key] = {field: set(value) if field in EVENT_MEMBERS else value
+                               for field, value in record.items()}
+    return copied
+
+
+def record_changes(data, file_path, keys, writer, member_changes=()):
+    """Hands the current state of several records (or their deletion) to the store's journal.
+
+    Only the changed records are written, so the cost does not grow with the size of the store. member_changes
+    are (event ID, field, added IDs, removed IDs) changes to the guests or suppliers of events, which are
+    journaled instead of the whole event. writer is a PersistenceWriter, an AutoSaver or a SharedJournal; the
+    first two write on the writer's thread.
+    """
+    # Repository collections write each change through to the database themselves
+    if isinstance(data, SQLiteCollection):
+        return
+    writer.submit(data, file_path, keys, member_changes)
+
+
+class PersistenceWriter:
+    """Writes journal entries and snapshots on a background thread, so callers never wait for the disk.
+
+    Changes are pickled by submit() on the caller's thread, so the writer never reads a store while it is being
+    edited. Everything queued for the same store while a write is in progress is merged into a single append
+    (keeping only the last state of each record) and at most one snapshot. The outcome of every write is put on
+    the completed queue as (file_path, error), where error is None on success.
+    """
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.completed = queue.Queue()
+        self._counts = {}
+        self._thread = threading.Thread(target=self._run, name="persistence-writer", daemon=True)
+        self._thread.start()
+        # Pending writes still reach the disk when the program exits
+        atexit.register(self.close)
+
+    def submit(self, data, file_path, keys, member_changes=()):
+        "Queues the member changes, then the current state of data[key] for each key"
+        entries = _journal_entries(data, keys, member_changes)
+        count = self._counts.get(file_path, _journal_counts.get(file_path, 0)) + len(entries)
+        # The snapshot replaces the journal, so the copy is taken here, in order with the changes
+        snapshot = None
+        if count >= JOURNAL_COMPACT_EVERY:
+            snapshot, count = _copy_store(data), 0
+        self._counts[file_path] = count
+        self.queue.put((file_path, entries, snapshot))
+
+    def save(self, data, file_path):
+        "Queues a full snapshot of data"
+        self._counts[file_path] = 0
+        self.queue.put((file_path, {}, _copy_store(data)))
+
+    def call(self, file_path, function, *args):
+        "Queues function(*args) to run on the writer thread; its outcome is reported for file_path like a write's"
+        self.queue.put((file_path, partial(function, *args), None))
+
+    def flush(self):
+        "Waits until everything queued so far has been written"
+        self.queue.join()
+
+    def close(self):
+        if self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            items = [self.queue.get()]
+            while True:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            # Per store: the entries to append before the snapshot, the latest snapshot and the entries after it
+            pending, calls = {}, []
+            for item in items:
+                if item is None:
+                    continue
+                file_path, entries, snapshot = item
+                if callable(entries):
+                    calls.append((file_path, entries))
+                    continue
+                before, current, after = pending.get(file_path, ({}, None, {}))
+                _merge_entries(before if current is None else after, entries)
+                if snapshot is not None:
+                    _merge_entries(before, after)
+                    current, after = snapshot, {}
+                pending[file_path] = (before, current, after)
+
+            for file_path, (before, snapshot, after) in pending.items():
+                try:
+                    with _journal_lock:
+                        # Entries written before a snapshot are the ones it contains, so replaying them after a
+                        # crash between the rename and the journal removal changes nothing
+                        _append_journal(file_path, b"".join(before.values()))
+                        if snapshot is not None:
+                            _replace_snapshot(snapshot, file_path)
+                            _append_journal(file_path, b"".join(after.values()))
+                    self.completed.put((file_path, None))
+                except (OSError, TypeError, pickle.PicklingError) as e:
+                    self.completed.put((file_path, str(e)))
+                except Exception as e:
+                    # Any other failure is reported the same way; letting it end the thread would silently lose
+                    # every later save
+                    self.completed.put((file_path, f"{type(e).__name__}: {e}"))
+
+            # Jobs queued with call() run after the writes taken from the queue with them
+            for file_path, function in calls:
+                try:
+                    function()
+                    self.completed.put((file_path, None))
+                except OSError as e:
+                    self.completed.put((file_path, str(e)))
+                except Exception as e:
+                    self.completed.put((file_path, f"{type(e).__name__}: {e}"))
+
+            for _ in items:
+                self.queue.task_done()
+            if None in items:
+                return
+
+
+# Default autosave policy: changed records reach the writer at most this many milliseconds or changes later
+AUTOSAVE_EVERY_MS = 2000
+AUTOSAVE_EVERY_CHANGES = 200
+
+
+class AutoSaver:
+    """Marks changed records as dirty and hands them to a PersistenceWriter in batches.
+
+    It takes the place of the writer in record_changes(), so a burst of edits costs one write instead of one per
+    edit. Dirty records are flushed once every_changes changes have piled up, when flush_if_due() is called at
+    least every_ms after the last flush, and on flush(), e.g. when the window is closed. A crash can therefore
+    lose at most every_ms worth of changes, or every_changes changes.
+    """
+    def __init__(self, writer, every_ms=AUTOSAVE_EVERY_MS, every_changes=AUTOSAVE_EVERY_CHANGES):
+        self.writer = writer
+        self.every_ms = every_ms
+        self.every_changes = every_changes
+        self._dirty = {}  # file_path -> (store, changed keys, member changes)
+        self._changes = 0
+        self._last_flush = time.monotonic()
+
+    def submit(self, data, file_path, keys, member_changes=()):
+        "Marks data[key] as changed for each key and keeps the member changes, in order"
+        dirty = self._dirty.setdefault(file_path, (data, set(), []))
+        dirty[1].update(keys)
+        dirty[2].extend(member_changes)
+        self._changes += len(keys) + len(member_changes)
+        if self._changes >= self.every_changes:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def is_dirty(self, file_path=None):
+        return bool(self._dirty) if file_path is None else file_path in self._dirty
+
+    def flush_if_due(self):
+        if self._dirty and (time.monotonic() - self._last_flush) * 1000 >= self.every_ms:
+            self.flush()
+
+    def flush(self):
+        "Hands every dirty record to the writer"
+        dirty, self._dirty = self._dirty, {}
+        for file_path, (data, keys, member_changes) in dirty.items():
+            self.writer.submit(data, file_path, keys, member_changes)
+        self._changes = 0
+        self._last_flush = time.monotonic()
+
+
+class SharedJournal:
+    """Keeps one process's copy of a store in step with other processes writing the same files.
+
+    Every process takes the store's StoreLock before it changes the store, first applies the journal entries
+    the others appended since it last looked (catch_up), then appends its own. It takes the place of the
+    writer in record_changes(); the append is synchronous, so the entries are on disk before the lock is
+    released, but it is only as large as the change. Compacting the journal into a new snapshot is handed to
+    writer, a PersistenceWriter, which writes the file without the lock and only takes it to put the file in
+    place. A process that finds a different snapshot than the one it loaded reads the store again.
+    """
+    def __init__(self, file_path, writer):
+        self.file_path = file_path
+        self.writer = writer
+        self.lock = StoreLock(file_path)
+        self._snapshot = None
+        self._offset = 0
+        self._count = 0
+        self._compacting = False
+
+    def _snapshot_id(self):
+        try:
+            status = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return status.st_ino, status.st_mtime_ns, status.st_size
+
+    def _journal_size(self):
+        try:
+            return os.path.getsize(journal_path(self.file_path))
+        except FileNotFoundError:
+            return 0
+
+    def load(self, file_path):
+        "Loads the store and remembers how far its files have been read; used as the loader of a LazyStore"
+        with self.lock:
+            data = load_data(file_path)
+            self._snapshot, self._offset = self._snapshot_id(), self._journal_size()
+            with _journal_lock:
+                self._count = _journal_counts.get(file_path, 0)
+            return data
+
+    def catch_up(self, data):
+        """Applies the journal entries other processes appended since the last call, under the lock.
+
+        Returns the changed keys, or None when the snapshot was replaced and the store has to be read again.
+        """
+        size = self._journal_size()
+        if self._snapshot_id() != self._snapshot or size < self._offset:
+            return None
+        changed = []
+        if size == self._offset:
+            return changed
+        with open(journal_path(self.file_path), 'rb+') as file:
+            file.seek(self._offset)
+            while True:
+                try:
+                    entry = pickle.load(file)
+                except (EOFError, pickle.UnpicklingError, ValueError):
+                    # Nobody appends while the lock is held, so anything left is a torn entry of a writer that
+                    # was killed; the next append starts after the complete ones
+                    file.truncate(self._offset)
+                    break
+                changed.append(_apply_journal_entry(data, entry))
+                self._offset = file.tell()
+        self._count += len(changed)
+        return changed
+
+    def submit(self, data, file_path, keys, member_changes=()):
+        "Appends the member changes, then the current state of data[key] for each key; callers hold the lock"
+        entries = _journal_entries(data, keys, member_changes)
+        appended = b"".join(entries.values())
+        with _journal_lock:
+            _append_journal(file_path, appended)
+            self._count += len(entries)
+            self._offset += len(appended)
+            if self._count >= JOURNAL_COMPACT_EVERY and not self._compacting:
+                # The copy holds the store as of the current end of the journal
+                self._compacting = True
+                self.writer.call(file_path, self._compact, _copy_store(data), self._snapshot, self._offset,
+                                 self._count)
+
+    def _compact(self, data, snapshot, offset, count):
+        # Runs on the writer thread. data is the store as of offset bytes into the journal on top of snapshot;
+        # it becomes the new snapshot, and the entries appended after offset stay in the journal. A crash between
+        # the two renames replays the whole old journal over the new snapshot, which ends in the same state.
+        temp_path = None
+        try:
+            temp_path = _write_snapshot(data, self.file_path, staged=True)
+            with self.lock, _journal_lock:
+                # Another process compacted first (and this one read its snapshot) or is about to be told to
+                if self._snapshot != snapshot or self._snapshot_id() != snapshot:
+                    return
+                path = journal_path(self.file_path)
+                with open(path, 'rb') as file:
+                    file.seek(offset)
+                    tail = file.read()
+                _install_snapshot(temp_path, self.file_path)
+                temp_path = None
+                with open(path + f".{os.getpid()}.tmp", 'wb') as file:
+                    file.write(tail)
+                    file.flush()
+                    os.fsync(file.fileno())
+                os.replace(path + f".{os.getpid()}.tmp", path)
+                if os.path.exists(_rotated_journal_path(self.file_path)):
+                    os.remove(_rotated_journal_path(self.file_path))
+                self._snapshot = self._snapshot_id()
+                self._offset -= offset
+                self._count = _journal_counts[self.file_path] = self._count - count
+        finally:
+            if temp_path is not None:
+                with suppress(OSError):
+                    os.remove(temp_path)
+            with self.lock:
+                self._compacting = False
+
+
+# Table layout for each store: its columns (after the integer ID) and the columns that get an index.
+# Columns without a declared type keep whatever value the GUI stored (e.g. manager IDs as None, '1' or 'None').
+SQLITE_TABLES = {
+    "employees": (("name", "department", "job_title", "basic_salary", "manager_id"),
+                  ("department", "job_title", "manager_id")),
+    "clients_events": (("type", "date", "time", "duration", "venue"), ("date", "venue")),
+    "events": (("name", "type", "date", "venue", "theme", "invoice") + EVENT_MEMBERS, ("date", "venue")),
+    "suppliers": (("name", "contact_details", "service_type"), ("name",)),
+    "guests": (("name", "contact_details"), ("name",)),
+    "venues": (("name", "address", "contact_details", "min_guests", "max_guests"), ("name",)),
+}
+
+
+def _encode_members(member_ids):
+    # The guests or suppliers of an event as the text of their sorted IDs, which every store format can hold.
+    # Events saved before they had members have no such field, which is kept apart from an empty set as None.
+    return None if member_ids is None else ",".join(map(str, sorted(member_ids)))
+
+
+def _decode_members(text):
+    return None if text is None else set(map(int, text.split(","))) if text else set()
+
+
+def _to_row(table, value):
+    # Converts a stored record into the column values of its table
+    if table == "employees":
+        return (value._name, value._department, value._job_title.value, value._basic_salary, value._manager_ID)
+    if table == "events":
+        return (tuple(value[column] for column in SQLITE_TABLES[table][0] if column not in EVENT_MEMBERS)
+                + tuple(_encode_members(value.get(field)) for field in EVENT_MEMBERS))
+    if table == "clients_events":
+        return tuple(value[column] for column in SQLITE_TABLES[table][0])
+    if table == "suppliers":
+        return (value._name, value._contact_details, value._service_type)
+    if table == "guests":
+        return (value._name, value._contact_details)
+    return (value._name, value._address, value._contact_details, value._min_guests, value._max_guests)
+
+
+def _from_row(table, row):
+    # Rebuilds the record the GUI expects from a table row (ID first)
+    key, values = row[0], row[1:]
+    if table == "employees":
+        name, department, job_title, basic_salary, manager_ID = values
+        employee = Employee(key, name, department, EmployeeType(job_title), basic_salary)
+        employee._manager_ID = manager_ID
+        return employee
+    if table == "events":
+        # Rows written before events had guests and suppliers are shorter, or hold None
+        event = dict(zip(SQLITE_TABLES[table][0], values))
+        for field in EVENT_MEMBERS:
+            members = _decode_members(event.pop(field, None))
+            if members is not None:
+                event[field] = members
+        return event
+    if table == "clients_events":
+        return dict(zip(SQLITE_TABLES[table][0], values))
+    if table == "suppliers":
+        return Supplier(key, *values)
+    if table == "guests":
+        return Guest(values[0], key, values[1])
+    return Venue(key, *values)
+
+
+# Compact binary format for the six stores. Each store has a fixed schema: the columns of SQLITE_TABLES, stored
+# column by column. Every value carries a one-byte type tag, because the stores hold mixed types (manager IDs
+# are None, '1' or 'None', durations are strings). Strings are stored as a table of lengths followed by the
+# UTF-8 text of the whole column, only once each if the column repeats them. Strings equal to a value of the
+# field's enum are stored as its index.
+BINARY_MAGIC = b"BEMBIN01"
+BINARY_ENUMS = {
+    ("employees", "job_title"): EmployeeType,
+    ("clients_events", "type"): EventType,
+    ("events", "type"): EventType,
+    ("suppliers", "service_type"): SupplierType,
+}
+BINARY_ENUM_VALUES = {field: [member.value for member in enum] for field, enum in BINARY_ENUMS.items()}
+_TAG_NONE, _TAG_INT, _TAG_STR, _TAG_ENUM, _TAG_FLOAT = range(5)
+_BLOCK_LENGTH = struct.Struct("<Q")
+
+
+def binary_collection(file_path):
+    "Returns the store a .bin file holds (from its file name), or None for other files"
+    name, extension = os.path.splitext(os.path.basename(file_path))
+    if extension != ".bin":
+        return None
+    if name not in SQLITE_TABLES:
+        raise ValueError(f"Unknown store for the binary format: {name}")
+    return name
+
+
+def _array_bytes(values):
+    # Arrays are stored little-endian whatever the machine's byte order
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _bytes_array(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _encode_column(values, enum):
+    # Returns the blocks of one column: type tags (a single tag if all values share it), ints, floats, string
+    # lengths, string text, enum indexes and, when the column repeats its strings, each string's index into the
+    # distinct strings (which are then the only ones stored)
+    tags, codes = bytearray(), bytearray()
+    ints, floats, strings = array('q'), array('d'), []
+    enum_codes = {member.value: code for code, member in enumerate(enum)} if enum else {}
+    for value in values:
+        if value is None:
+            tags.append(_TAG_NONE)
+        elif type(value) is int:
+            tags.append(_TAG_INT)
+            ints.append(value)
+        elif type(value) is str:
+            code = enum_codes.get(value)
+            if code is None:
+                tags.append(_TAG_STR)
+                strings.append(value)
+            else:
+                tags.append(_TAG_ENUM)
+                codes.append(code)
+        elif type(value) is float:
+            tags.append(_TAG_FLOAT)
+            floats.append(value)
+        else:
+            raise TypeError(f"{type(value).__name__} values can't be stored in the binary format")
+    if tags and tags.count(tags[0]) == len(tags):
+        del tags[1:]
+
+    distinct = dict.fromkeys(strings)
+    indexes = array('I')
+    if len(distinct) * 2 <= len(strings):
+        positions = {text: position for position, text in enumerate(distinct)}
+        indexes.extend(map(positions.__getitem__, strings))
+        strings = list(distinct)
+    return (tags, _array_bytes(ints), _array_bytes(floats), _array_bytes(array('I', map(len, strings))),
+            "".join(strings).encode("utf-8", "surrogatepass"), codes, _array_bytes(indexes))
+
+
+def _decode_column(blocks, count, enum):
+    tags, ints, floats, lengths, text, codes, indexes = blocks
+    kind = tags[0] if len(tags) == 1 else None
+    columns = [None] * 5
+    if kind in (None, _TAG_INT):
+        columns[_TAG_INT] = _bytes_array('q', ints).tolist()
+    if kind in (None, _TAG_FLOAT):
+        columns[_TAG_FLOAT] = _bytes_array('d', floats).tolist()
+    if kind in (None, _TAG_STR):
+        ends = list(accumulate(_bytes_array('I', lengths)))
+        text = str(text, "utf-8", "surrogatepass")
+        strings = list(map(text.__getitem__, map(slice, [0] + ends[:-1], ends)))
+        columns[_TAG_STR] = list(map(strings.__getitem__, _bytes_array('I', indexes))) if indexes else strings
+    if kind in (None, _TAG_ENUM):
+        columns[_TAG_ENUM] = list(map([member.value for member in enum].__getitem__, codes)) if enum else []
+    if kind is not None:
+        return [None] * count if kind == _TAG_NONE else columns[kind]
+    sources = [repeat(None).__next__] + [iter(column).__next__ for column in columns[1:]]
+    return [sources[tag]() for tag in tags]
+
+
+def write_binary(data, collection, out):
+    "Writes a store in the binary format to a file-like object"
+    keys = list(data.keys())
+    if not all(type(key) is int for key in keys):
+        raise TypeError("The binary format needs integer IDs")
+    rows = [_to_row(collection, data[key]) for key in keys]
+    name = collection.encode("ascii")
+    out.write(bytes([len(name)]) + name + _BLOCK_LENGTH.pack(len(keys)))
+    blocks = [_array_bytes(array('q', keys))]
+    for index, field in enumerate(SQLITE_TABLES[collection][0]):
+        blocks.extend(_encode_column([row[index] for row in rows], BINARY_ENUMS.get((collection, field))))
+    for block in blocks:
+        out.write(_BLOCK_LENGTH.pack(len(block)))
+        out.write(block)
+
+
+def read_binary(payload):
+    "Rebuilds the store held by the payload of a binary file"
+    view = memoryview(payload)
+    collection = str(view[1:1 + view[0]], "ascii")
+    offset = 1 + view[0]
+    count = _BLOCK_LENGTH.unpack_from(view, offset)[0]
+    offset += _BLOCK_LENGTH.size
+
+    def block():
+        nonlocal offset
+        length = _BLOCK_LENGTH.unpack_from(view, offset)[0]
+        offset += _BLOCK_LENGTH.size + length
+        return view[offset - length:offset]
+
+    keys = _bytes_array('q', block()).tolist()
+    columns = []
+    for field in SQLITE_TABLES[collection][0]:
+        # Files written before a store gained a column end early; _from_row fills in the missing values
+        if offset == len(view):
+            break
+        columns.append(_decode_column([block() for _ in range(7)], count, BINARY_ENUMS.get((collection, field))))
+    return {row[0]: _from_row(collection, row) for row in zip(keys, *columns)}
+
+
+def convert_to_binary(file_path):
+    "Converts a .pkl store (with its journal) into a .bin store next to it and returns the new path"
+    binary_path = os.path.splitext(file_path)[0] + ".bin"
+    save_data(load_data(file_path), binary_path)
+    return binary_path
+
+
+# Memory-mapped layout of a store for read-only use (.rows files): a fixed header, the sorted IDs and the offset of
+# each record as two tables of 8-byte integers, then the records. Each record holds its values in SQLITE_TABLES
+# order, one type tag (as in the binary format) followed by the value: 8-byte ints and floats, strings as a
+# 4-byte length and UTF-8, enum values as their index.
+MAPPED_MAGIC = b"BEMROWS2"
+MAPPED_HEADER = struct.Struct("<8s16sQ")
+_INT_VALUE = struct.Struct("<q")
+_FLOAT_VALUE = struct.Struct("<d")
+_STR_LENGTH = struct.Struct("<I")
+
+
+def _encode_record(collection, values):
+    parts = bytearray()
+    for field, value in zip(SQLITE_TABLES[collection][0], values):
+        enum_values = BINARY_ENUM_VALUES.get((collection, field), ())
+        if value is None:
+            parts.append(_TAG_NONE)
+        elif type(value) is int:
+            parts.append(_TAG_INT)
+            parts += _INT_VALUE.pack(value)
+        elif type(value) is str and value in enum_values:
+            parts.append(_TAG_ENUM)
+            parts.append(enum_values.index(value))
+        elif type(value) is str:
+            encoded = value.encode("utf-8", "surrogatepass")
+            parts.append(_TAG_STR)
+            parts += _STR_LENGTH.pack(len(encoded)) + encoded
+        elif type(value) is float:
+            parts.append(_TAG_FLOAT)
+            parts += _FLOAT_VALUE.pack(value)
+        else:
+            raise TypeError(f"{type(value).__name__} values can't be stored in the binary format")
+    return parts
+
+
+def _decode_record(collection, view, offset):
+    values = []
+    for field in SQLITE_TABLES[collection][0]:
+        tag = view[offset]
+        offset += 1
+        if tag == _TAG_NONE:
+            values.append(None)
+        elif tag == _TAG_INT:
+            values.append(_INT_VALUE.unpack_from(view, offset)[0])
+            offset += _INT_VALUE.size
+        elif tag == _TAG_ENUM:
+            values.append(BINARY_ENUM_VALUES[collection, field][view[offset]])
+            offset += 1
+        elif tag == _TAG_STR:
+            length = _STR_LENGTH.unpack_from(view, offset)[0]
+            offset += _STR_LENGTH.size + length
+            values.append(str(view[offset - length:offset], "utf-8", "surrogatepass"))
+        else:
+            values.append(_FLOAT_VALUE.unpack_from(view, offset)[0])
+            offset += _FLOAT_VALUE.size
+    return values
+
+
+def write_mapped_store(data, collection, file_path):
+    "Writes a store in the memory-mapped layout, streaming one record at a time"
+    keys = sorted(data.keys())
+    offsets = array('q')
+    records_start = MAPPED_HEADER.size + 16 * len(keys)
+    temp_path = file_path + ".tmp"
+    with open(temp_path, 'wb') as file:
+        file.seek(records_start)
+        for key in keys:
+            offsets.append(file.tell())
+            file.write(_encode_record(collection, _to_row(collection, data[key])))
+        file.seek(0)
+        file.write(MAPPED_HEADER.pack(MAPPED_MAGIC, collection.encode("ascii"), len(keys)))
+        file.write(_array_bytes(array('q', keys)))
+        file.write(_array_bytes(offsets))
+    os.replace(temp_path, file_path)
+
+
+class MappedStore(Mapping):
+    """A read-only store that reads records straight from a memory-mapped .rows file.
+
+    Looking up an ID is a binary search in the ID table followed by decoding that one record, so nothing is
+    loaded up front and the memory used stays the same however large the file is. keys() returns the ID table
+    itself rather than a copy.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with open(file_path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        magic, name, count = MAPPED_HEADER.unpack_from(self._view)
+        if magic != MAPPED_MAGIC:
+            raise ValueError(f"{file_path} is not a memory-mapped store")
+        self.collection = name.rstrip(b"\0").decode("ascii")
+        tables = self._view[MAPPED_HEADER.size:MAPPED_HEADER.size + 16 * count]
+        if sys.byteorder == "little":
+            self._ids, self._offsets = tables[:8 * count].cast('q'), tables[8 * count:].cast('q')
+        else:
+            self._ids, self._offsets = _bytes_array('q', tables[:8 * count]), _bytes_array('q', tables[8 * count:])
+
+    def _position(self, key):
+        position = bisect_left(self._ids, key) if type(key) is int else len(self._ids)
+        if position == len(self._ids) or self._ids[position] != key:
+            raise KeyError(key)
+        return position
+
+    def __getitem__(self, key):
+        values = _decode_record(self.collection, self._view, self._offsets[self._position(key)])
+        return _from_row(self.collection, [key] + values)
+
+    def __contains__(self, key):
+        try:
+            self._position(key)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def keys(self):
+        return self._ids
+
+
+def _file_magic(file_path):
+    with open(file_path, 'rb') as file:
+        return file.read(len(MAPPED_MAGIC))
+
+
+def open_mapped_store(file_path):
+    """Opens a .pkl or .bin store as a MappedStore.
+
+    Its .rows file is (re)built from the store when it is missing, older than the store or its journals, or
+    written for an older layout of the records. It is named after the whole store file (e.g. guests.bin.rows),
+    so the .pkl and .bin stores of a collection never share one.
+    """
+    collection = os.path.splitext(os.path.basename(file_path))[0]
+    rows_path = file_path + ".rows"
+    sources = [path for path in (file_path, journal_path(file_path), _rotated_journal_path(file_path))
+               if os.path.exists(path)]
+    if not os.path.exists(rows_path) or any(os.path.getmtime(path) > os.path.getmtime(rows_path)
+                                            for path in sources) or _file_magic(rows_path) != MAPPED_MAGIC:
+        write_mapped_store(load_data(file_path), collection, rows_path)
+    return MappedStore(rows_path)
+
+
+class SQLiteCollection(MutableMapping):
+    "A dict-like view of one table so the GUI can use it in place of a loaded .pkl store"
+    def __init__(self, repository, table):
+        self._repository = repository
+        self._table = table
+        self._columns = SQLITE_TABLES[table][0]
+
+    def __getitem__(self, key):
+        row = self._repository.query_one(f"SELECT id, {', '.join(self._columns)} FROM {self._table} WHERE id = ?",
+                                         (key,))
+        if row is None:
+            raise KeyError(key)
+        return _from_row(self._table, row)
+
+    def __setitem__(self, key, value):
+        # Inserts or updates a single row in its own transaction
+        placeholders = ", ".join("?" * (len(self._columns) + 1))
+        self._repository.execute(
+            f"INSERT OR REPLACE INTO {self._table} (id, {', '.join(self._columns)}) VALUES ({placeholders})",
+            (key,) + _to_row(self._table, value))
+
+    def __delitem__(self, key):
+        if self._repository.execute(f"DELETE FROM {self._table} WHERE id = ?", (key,)) == 0:
+            raise KeyError(key)
+
+    def __iter__(self):
+        return iter([row[0] for row in self._repository.query(f"SELECT id FROM {self._table} ORDER BY id")])
+
+    def __len__(self):
+        return self._repository.query_one(f"SELECT COUNT(*) FROM {self._table}")[0]
+
+    def __contains__(self, key):
+        return self._repository.query_one(f"SELECT 1 FROM {self._table} WHERE id = ?", (key,)) is not None
+
+    def items(self):
+        # One query for the whole table instead of one query per key
+        return [(row[0], _from_row(self._table, row)) for row in
+                self._repository.query(f"SELECT id, {', '.join(self._columns)} FROM {self._table} ORDER BY id")]
+
+    def values(self):
+        return [value for key, value in self.items()]
+
+    def page(self, offset, limit):
+        "Returns (ID, record) pairs for one page of the table ordered by ID"
+        rows = self._repository.query(
+            f"SELECT id, {', '.join(self._columns)} FROM {self._table} ORDER BY id LIMIT ? OFFSET ?",
+            (limit, offset))
+        return [(row[0], _from_row(self._table, row)) for row in rows]
+
+    def find(self, column, value):
+        "Returns (ID, record) pairs whose column equals value, using the column's index where it has one"
+        if column not in self._columns:
+            raise ValueError(f"Unknown column for {self._table}: {column}")
+        if isinstance(value, Enum):
+            value = value.value
+        rows = self._repository.query(
+            f"SELECT id, {', '.join(self._columns)} FROM {self._table} WHERE {column} = ? ORDER BY id", (value,))
+        return [(row[0], _from_row(self._table, row)) for row in rows]
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """Returns the IDs of up to limit records whose name or contact details match query, in ID order. Each row
+        is checked with text_matches, as in TextSearchIndex.search, so no text is kept in memory."""
+        query = query.strip().lower()
+        if not query:
+            return []
+        # Employees have no contact details, which the index reads as empty text
+        columns = [column for column in ("name", "contact_details") if column in self._columns]
+        rows = self._repository.query(f"SELECT id FROM {self._table} WHERE search_matches(?, {', '.join(columns)}) "
+                                      f"ORDER BY id LIMIT ?", (query, limit))
+        return [row[0] for row in rows]
+
+    def max_id(self):
+        return self._repository.query_one(f"SELECT MAX(id) FROM {self._table}")[0] or 0
+
+
+# PRAGMA user_version of a database the .pkl stores have been copied into
+SQLITE_MIGRATED = 1
+
+
+class SQLiteRepository:
+    "Keeps all six stores as indexed tables in one SQLite file"
+    def __init__(self, db_path="company.db"):
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        # SQLite's own lower() and LIKE only fold ASCII letters and don't know the index's idea of a word
+        self._connection.create_function("search_matches", -1,
+                                         lambda query, *values: text_matches(query, search_text(values)),
+                                         deterministic=True)
+        with self._lock, self._connection:
+            for table, (columns, indexes) in SQLITE_TABLES.items():
+                self._connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, {', '.join(columns)})")
+                # Columns a store gained after the database was created (such as the guests of events)
+                existing = {row[1] for row in self._connection.execute(f"PRAGMA table_info({table})")}
+                for column in columns:
+                    if column not in existing:
+                        self._connection.execute(f"ALTER TABLE {table} ADD COLUMN {column}")
+                for column in indexes:
+                    self._connection.execute(
+                        f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ({column})")
+        self._collections = {table: SQLiteCollection(self, table) for table in SQLITE_TABLES}
+
+    def collection(self, table):
+        return self._collections[table]
+
+    def execute(self, sql, parameters=()):
+        # Runs a single write in its own transaction and returns the number of affected rows
+        with self._lock, self._connection:
+            return self._connection.execute(sql, parameters).rowcount
+
+    def query(self, sql, parameters=()):
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def query_one(self, sql, parameters=()):
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchone()
+
+    def migrated(self):
+        "Whether the .pkl stores have been copied into this database (or it was created after they were)"
+        return self.query_one("PRAGMA user_version")[0] >= SQLITE_MIGRATED
+
+    def import_stores(self, stores):
+        """Copies loaded .pkl stores ({table: data}) into their tables and marks the database as migrated, all in
+        one transaction, so an interrupted migration leaves nothing behind and is done again on the next start"""
+        with self._lock, self._connection:
+            for table, data in stores.items():
+                columns = SQLITE_TABLES[table][0]
+                placeholders = ", ".join("?" * (len(columns) + 1))
+                self._connection.executemany(
+                    f"INSERT OR REPLACE INTO {table} (id, {', '.join(columns)}) VALUES ({placeholders})",
+                    ((key,) + _to_row(table, value) for key, value in data.items()))
+            self._connection.execute(f"PRAGMA user_version = {SQLITE_MIGRATED}")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def open_repository(db_path="company.db"):
+    """Opens the SQLite repository. The .pkl stores are copied into it once, when it is first created; after
+    that the database is the only copy, so records deleted from it stay deleted."""
+    repository = SQLiteRepository(db_path)
+    if not repository.migrated():
+        # Databases written before the marker existed got their copy when they were first opened
+        if all(len(repository.collection(table)) == 0 for table in SQLITE_TABLES):
+            repository.import_stores({table: load_data(table + ".pkl") for table in SQLITE_TABLES
+                                      if os.path.exists(table + ".pkl")})
+        else:
+            repository.import_stores({})
+    return repository
+
+
+# Number of rows the bulk importer adds to a store before it writes them to disk in one go
+IMPORT_BATCH_SIZE = 1000
+
+
+def iter_import_rows(file_path):
+    """Yields (line number, parse) for each record of a CSV file (with a header row) or a JSON-lines file, reading
+    it line by line. parse() decodes the record and returns it, raising ValueError for a line that isn't valid
+    UTF-8, JSON or CSV, so the importer rejects that line like any other invalid row."""
+    if file_path.lower().endswith((".jsonl", ".json", ".ndjson")):
+        with open(file_path, "rb") as file:
+            for line_number, line in enumerate(file, start=1):
+                if line.strip():
+                    yield line_number, partial(_parse_json_line, line)
+    else:
+        with open(file_path, "rb") as file:
+            # Undecodable bytes are kept as surrogates so the reader gets past them; _parse_csv_row rejects the row
+            reader = csv.reader(line.decode("utf-8", "surrogateescape") for line in file)
+            header = None
+            while True:
+                try:
+                    values = next(reader)
+                except StopIteration:
+                    return
+                except csv.Error as e:
+                    yield reader.line_num, partial(_reject_row, f"Unreadable CSV line: {e}")
+                    continue
+                if header is None:
+                    header = values
+                elif values:
+                    yield reader.line_num, partial(_parse_csv_row, header, values)
+
+
+def _parse_json_line(line):
+    try:
+        return json.loads(line.decode("utf-8"))
+    except UnicodeDecodeError:
+        raise ValueError("Line is not valid UTF-8 text") from None
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON: {e.msg} (column {e.colno})") from None
+
+
+def _parse_csv_row(header, values):
+    try:
+        for value in header + values:
+            value.encode("utf-8")
+    except UnicodeEncodeError:
+        raise ValueError("Line is not valid UTF-8 text") from None
+    return dict(zip(header, values))
+
+
+def _reject_row(message):
+    raise ValueError(message)
+
+
+# Fields of each importable store that must be text; JSON lines may hold numbers, lists or objects instead
+IMPORT_TEXT_FIELDS = {
+    "guests": ("name", "contact_details"),
+    "suppliers": ("name", "service_type", "contact_details"),
+    "employees": ("name", "department", "job_title"),
+}
+
+
+def _build_imported(collection, record_id, row):
+    # Applies the same rules as the add forms to one imported row
+    if not isinstance(row, dict):
+        raise ValueError("Row is not a record with named fields")
+    for field in IMPORT_TEXT_FIELDS[collection]:
+        if row.get(field) is not None and not isinstance(row[field], str):
+            raise ValueError(f"{field} must be text: {row[field]!r}")
+    if collection == "guests":
+        return build_guest(record_id, row.get("name"), row.get("contact_details"))
+    if collection == "suppliers":
+        return build_supplier(record_id, row.get("name"), row.get("service_type"), row.get("contact_details"))
+    # Employees without a basic_salary column get a random salary, like the add form gives them
+    return build_employee(record_id, row.get("name"), row.get("department"), row.get("job_title"),
+                          row.get("manager_id"), row.get("basic_salary") or random.randint(5000, 75000))
+
+
+class ImportResult:
+    "Summary of one bulk import: the IDs added, the rejected rows and the throughput"
+    def __init__(self, imported, errors, seconds):
+        self.imported = imported
+        self.errors = errors
+        self.seconds = seconds
+
+    def rows_per_second(self):
+        return (len(self.imported) + len(self.errors)) / self.seconds if self.seconds else 0.0
+
+    def summary(self):
+        return (f"Imported {len(self.imported)} records, rejected {len(self.errors)}, "
+                f"{self.rows_per_second():,.0f} rows/s")
+
+
+def import_records(data, file_path, collection, source_path, ids, writer, batch_size=IMPORT_BATCH_SIZE):
+    """Streams guests, suppliers or employees from a CSV or JSON-lines file into a store.
+
+    Rows are parsed one at a time and checked with the same rules as the add forms. Valid rows are added in
+    batches of batch_size with one journal write per batch. Invalid rows, including lines that can't be decoded
+    or parsed, are skipped and reported with their line number. New records get their IDs from the store's
+    IdSequence.
+    """
+    start = time.perf_counter()
+    imported, errors, batch = [], [], {}
+    record_id = None
+    for line_number, parse in iter_import_rows(source_path):
+        # An ID is only taken for a row once the previous one has been used
+        if record_id is None:
+            record_id = ids.next_id()
+        try:
+            batch[record_id] = _build_imported(collection, record_id, parse())
+        except ValueError as e:
+            errors.append((line_number, str(e)))
+            continue
+        record_id = None
+        if len(batch) >= batch_size:
+            _commit_batch(data, file_path, batch, imported, writer)
+    _commit_batch(data, file_path, batch, imported, writer)
+    return ImportResult(imported, errors, time.perf_counter() - start)
+
+
+def _commit_batch(data, file_path, batch, imported, writer):
+    if batch:
+        data.update(batch)
+        record_changes(data, file_path, list(batch), writer)
+        imported.extend(batch)
+        batch.clear()
+
+
+# Number of rows the exporter writes between two progress reports, and per row group of a columnar file
+EXPORT_PROGRESS_EVERY = 1000
+EXPORT_ROW_GROUP_SIZE = 10000
+EXPORT_FORMATS = ("csv", "jsonl", "columnar")
+# Number of chunks of EXPORT_PROGRESS_EVERY rows the GUI reads ahead of the export worker
+EXPORT_CHUNKS_AHEAD = 4
+
+
+def export_fields(collection):
+    "Column names of a store in exported files"
+    return ("id",) + SQLITE_TABLES[collection][0]
+
+
+def iter_export_rows(data, collection, keys=None):
+    """Yields the column values of each record of a store, one record at a time.
+
+    Only the list of IDs is copied up front, so the store can still be edited while an export runs; a record
+    deleted in the meantime is skipped.
+    """
+    for key in list(data.keys()) if keys is None else keys:
+        try:
+            yield (key,) + _to_row(collection, data[key])
+        except KeyError:
+            continue
+
+
+def _write_columnar(file, fields, rows, report):
+    # Writes rows in groups of EXPORT_ROW_GROUP_SIZE, each group as one JSON line holding a list per column (the
+    # row group / column chunk layout of Parquet), so a reader can load single columns of a group
+    file.write(json.dumps({"format": "columnar", "fields": fields}) + "\n")
+    group = []
+    for row in rows:
+        group.append(row)
+        report()
+        if len(group) >= EXPORT_ROW_GROUP_SIZE:
+            file.write(json.dumps({"rows": len(group), "columns": dict(zip(fields, map(list, zip(*group))))},
+                                  default=str) + "\n")
+            group = []
+    if group:
+        file.write(json.dumps({"rows": len(group), "columns": dict(zip(fields, map(list, zip(*group))))},
+                              default=str) + "\n")
+
+
+def read_columnar(file_path, columns=None):
+    "Yields the rows of a columnar export as dicts, optionally reading only some of its columns"
+    with open(file_path, encoding="utf-8") as file:
+        fields = json.loads(file.readline())["fields"]
+        columns = columns or fields
+        for line in file:
+            group = json.loads(line)["columns"]
+            yield from (dict(zip(columns, values)) for values in zip(*(group[column] for column in columns)))
+
+
+def export_records(data, collection, file_path, file_format, progress=None):
+    """Streams a store into a CSV, JSON-lines or columnar file without building a copy of the records.
+
+    progress(done, total) is called every EXPORT_PROGRESS_EVERY rows and once at the end. Returns the number
+    of records written.
+    """
+    keys = list(data.keys())
+    return export_rows(iter_export_rows(data, collection, keys), len(keys), collection, file_path, file_format,
+                       progress)
+
+
+def export_rows(rows, total, collection, file_path, file_format, progress=None):
+    """Writes the rows of a store, as yielded by iter_export_rows, into an export file as they arrive.
+
+    total is the number of records expected, for the progress reports. Returns the number of rows written.
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {file_format}")
+    fields = export_fields(collection)
+    written = 0
+
+    def report():
+        nonlocal written
+        written += 1
+        if progress and written % EXPORT_PROGRESS_EVERY == 0:
+            progress(written, total)
+
+    with open(file_path, "w", newline="", encoding="utf-8") as file:
+        if file_format == "csv":
+            writer = csv.writer(file)
+            writer.writerow(fields)
+            for row in rows:
+                writer.writerow(row)
+                report()
+        elif file_format == "jsonl":
+            for row in rows:
+                file.write(json.dumps(dict(zip(fields, row)), default=str) + "\n")
+                report()
+        else:
+            _write_columnar(file, list(fields), rows, report)
+    if progress:
+        progress(written, total)
+    return written
+
+
+class RecordNotFoundError(LookupError):
+    "Raised by CompanyService when a record to modify or delete does not exist"
+
+
+class ConflictError(Exception):
+    "Raised by CompanyService when a record was changed by another program since the caller read its version"
+
+
+# Singular names of the stores, as used in the messages of CompanyService
+RECORD_NAMES = {"employees": "Employee", "clients_events": "Client", "events": "Event", "suppliers": "Supplier",
+                "guests": "Guest", "venues": "Venue"}
+
+
+def record_version(collection, record):
+    """Version stamp of a record: a checksum of its column values, so any change to it, in any process, changes
+    it. Pickles are not used, as they depend on the order of a set and on which values share one object."""
+    return zlib.crc32(repr(_to_row(collection, record)).encode())
+
+
+class CompanyService:
+    """The add, modify and delete operations on the six stores, without any user interface.
+
+    The GUI calls it for every change, and scripts, benchmarks and servers can use it without tk.Tk(). Each
+    operation checks its fields with the build_* functions, raising ValueError with the message the GUI shows
+    (or RecordNotFoundError for an unknown ID), then updates the store and the indexes built so far and hands
+    the change to the autosaver. Functions in listeners are called with (collection, key) after every change.
+
+    Stores are opened as in the GUI: tables of a SQLite database, .bin files with binary=True, memory-mapped
+    .rows files with read_only=True, otherwise .pkl files loaded on first use.
+
+    With shared=True several processes can change the same stores at once. Each change is made under the
+    store's StoreLock after catching up with what the others saved, and is written before the lock is released
+    (see SharedJournal), so no process overwrites another's records. Modify and delete take the version() of
+    the record the caller showed to the user and raise ConflictError if it has been changed since, instead of
+    silently undoing that change. Without shared, the process locks the stores for itself.
+    """
+    def __init__(self, database=None, binary=False, read_only=False, autosave_ms=AUTOSAVE_EVERY_MS,
+                 autosave_changes=AUTOSAVE_EVERY_CHANGES, shared=False):
+        self.read_only = read_only
+        self.shared = shared and not read_only
+        # Refuses to open stores that another process uses in a way that can't be combined with this one
+        self.session = None if read_only else lock_stores(database or "stores", self.shared)
+        self.store_paths = {name: name + (".bin" if binary else ".pkl") for name in SQLITE_TABLES}
+        self.journals = {}
+        self.locks = {}
+        # Changes are written by a background thread, in batches collected by the autosaver
+        self.writer = PersistenceWriter()
+        self.autosave = AutoSaver(self.writer, autosave_ms, autosave_changes)
+        self.repository = None
+        if database:
+            self.repository = open_repository(database)
+            for name in SQLITE_TABLES:
+                setattr(self, name, self.repository.collection(name))
+                self.locks[name] = StoreLock(f"{database}.{name}")
+        else:
+            if binary:
+                # The first binary run converts each .pkl store into its .bin file
+                for name, path in self.store_paths.items():
+                    if not os.path.exists(path) and os.path.exists(name + ".pkl"):
+                        convert_to_binary(name + ".pkl")
+            for name, path in self.store_paths.items():
+                if read_only:
+                    # For browsing only: a record is only read when it is used
+                    setattr(self, name, open_mapped_store(path))
+                    continue
+                if self.shared:
+                    self.journals[name] = SharedJournal(path, self.writer)
+                    self.locks[name] = self.journals[name].lock
+                setattr(self, name, LazyStore(path, GuestColumns.from_mapping if name == "guests" else None,
+                                              self.journals[name].load if self.shared else None))
+
+        # New IDs come from a sequence per collection, named after the database file for a repository. The
+        # sequences of the store files a repository is first filled from count too, as did the ones older
+        # versions kept per store file.
+        self.id_sequences = {name: IdSequence(f"{database}.{name}" if database else name, getattr(self, name),
+                                              previous_names=(name + ".pkl", name + ".bin")
+                                              + ((name,) if database else ()))
+                             for name in SQLITE_TABLES}
+
+        self.listeners = []
+        # Changes other processes made to shared stores, until refresh() returns them
+        self.changed_elsewhere = []
+
+        # Built the first time they are asked for, then kept up to date by every change
+        self._employee_index = None
+        self._client_dates = None
+        self._event_dates = None
+        self._venue_bookings = None
+        self._member_indexes = {}
+
+    def store(self, collection):
+        return getattr(self, collection)
+
+    def next_id(self, collection):
+        return self.id_sequences[collection].next_id()
+
+    def version(self, collection, key):
+        "The version stamp to pass to modify_* or delete_* when the record is changed after it was shown"
+        return record_version(collection, self._existing(collection, key))
+
+    def employee_index(self):
+        if self._employee_index is None:
+            self._employee_index = EmployeeIndex(self.employees)
+        return self._employee_index
+
+    def client_dates(self):
+        if self._client_dates is None:
+            self._client_dates = DateIndex(self.clients_events)
+        return self._client_dates
+
+    def event_dates(self):
+        if self._event_dates is None:
+            self._event_dates = DateIndex(self.events)
+        return self._event_dates
+
+    def venue_bookings(self):
+        if self._venue_bookings is None:
+            self._venue_bookings = VenueBookingIndex(self.clients_events, self.events)
+        return self._venue_bookings
+
+    def member_index(self, field):
+        "The MemberIndex of the events' guests or suppliers (field is one of EVENT_MEMBERS)"
+        if field not in self._member_indexes:
+            self._member_indexes[field] = MemberIndex(self.events, field)
+        return self._member_indexes[field]
+
+    def event_members(self, event_id, field):
+        "Returns the IDs of an event's guests or suppliers"
+        return set(self._existing("events", event_id).get(field, ()))
+
+    def events_with_member(self, field, member_id):
+        "Returns the IDs of the events a guest or supplier is on, e.g. events_with_member('guests', 512)"
+        return self.member_index(field).events_of(member_id)
+
+    def refresh(self):
+        """Applies what other processes saved to the shared stores loaded so far.
+
+        Returns the (collection, key) of every record changed elsewhere since the last call; the key is None when
+        a whole store was read again.
+        """
+        for collection, journal in self.journals.items():
+            if self.store(collection).is_loaded():
+                with journal.lock:
+                    self._catch_up(collection)
+        changes, self.changed_elsewhere = self.changed_elsewhere, []
+        return changes
+
+    def flush(self):
+        "Hands every pending change to the writer"
+        self.autosave.flush()
+
+    def close(self):
+        "Writes every pending change, stops the writer thread and closes the database"
+        self.autosave.flush()
+        self.writer.close()
+        if self.repository is not None:
+            self.repository.close()
+            self.repository = None
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+    def _check_writable(self):
+        if self.read_only:
+            raise ValueError("The data is opened read-only and can't be changed.")
+
+    @contextmanager
+    def _writing(self, *collections):
+        # Holds the locks of the stores an operation reads and changes, taken in a fixed order so two processes
+        # never wait for each other; shared stores are brought up to date first
+        self._check_writable()
+        if not self.shared:
+            yield
+            return
+        locks = [self.locks[collection] for collection in sorted(collections)]
+        for lock in locks:
+            lock.acquire()
+        try:
+            for collection in collections:
+                self._catch_up(collection)
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def _catch_up(self, collection):
+        # Callers hold the store's lock. A store that isn't loaded yet will read everything when it is.
+        journal, store = self.journals.get(collection), self.store(collection)
+        if journal is None or not store.is_loaded():
+            return
+        keys = journal.catch_up(store)
+        if keys is None:
+            # Another process wrote a new snapshot: read it, and re-index every record that was or is there
+            keys = set(store.keys())
+            store.reload()
+            keys = sorted(keys | set(store.keys()))
+            self.changed_elsewhere.append((collection, None))
+        else:
+            self.changed_elsewhere.extend((collection, key) for key in keys)
+        for key in keys:
+            self._update_indexes(collection, key)
+            for listener in self.listeners:
+                listener(collection, key)
+
+    def _update_indexes(self, collection, key):
+        record = self.store(collection).get(key)
+        if collection == "employees" and self._employee_index is not None:
+            if record is None:
+                self._employee_index.remove(key)
+            else:
+                self._employee_index.add(key, record)
+        elif collection in ("clients_events", "events"):
+            if collection == "events":
+                for index in self._member_indexes.values():
+                    if record is None:
+                        index.remove(key)
+                    else:
+                        index.add(key, record)
+            kind, dates = (("client", self._client_dates) if collection == "clients_events"
+                           else ("event", self._event_dates))
+            if dates is not None:
+                if record is None:
+                    dates.remove(key)
+                else:
+                    dates.add(key, record['date'])
+            if self._venue_bookings is not None:
+                if record is None:
+                    self._venue_bookings.remove((kind, key))
+                else:
+                    self._venue_bookings.add((kind, key), record)
+
+    def _existing(self, collection, key):
+        store = self.store(collection)
+        if key not in store:
+            raise RecordNotFoundError(f"{RECORD_NAMES[collection]} not found")
+        return store[key]
+
+    def _current(self, collection, key, version):
+        # Returns the record if it is still the version the caller read (any version when None)
+        record = self._existing(collection, key)
+        if version is not None and record_version(collection, record) != version:
+            raise ConflictError(f"{RECORD_NAMES[collection]} {key} was changed by someone else after you opened it. "
+                                f"Open it again to see the changes.")
+        return record
+
+    def _new_id(self, collection, key):
+        # Takes the next ID, or checks one chosen by the caller and makes sure the sequence never hands it out
+        if key is None:
+            key = self.next_id(collection)
+            # Another process may have chosen an ID by hand from the block this one reserved
+            while key in self.store(collection):
+                key = self.next_id(collection)
+            return key
+        if key in self.store(collection):
+            raise ValueError(f"{RECORD_NAMES[collection]} ID {key} is already in use")
+        self.id_sequences[collection].advance_past(key)
+        return key
+
+    def _changed(self, collection, keys, member_changes=()):
+        # Shared stores are written at once, while the lock is still held
+        record_changes(self.store(collection), self.store_paths[collection], keys,
+                       self.journals.get(collection, self.autosave), member_changes)
+        for key in list(keys) + [change[0] for change in member_changes]:
+            for listener in self.listeners:
+                listener(collection, key)
+
+    def _put(self, collection, key, record):
+        self.store(collection)[key] = record
+        self._update_indexes(collection, key)
+        self._changed(collection, [key])
+        return record
+
+    def _remove(self, collection, key, version):
+        with self._writing(collection):
+            self._current(collection, key, version)
+            del self.store(collection)[key]
+            self._update_indexes(collection, key)
+            self._changed(collection, [key])
+
+    def _check_venue_free(self, kind, key, booking):
+        # Refuses a booking whose venue is already taken for any part of its time
+        conflicts = self.venue_bookings().conflicts(booking, ignore=(kind, key))
+        if conflicts:
+            other_kind, other_id = conflicts[0]
+            raise ValueError(f"{booking['venue']} is already booked at that time ({other_kind} {other_id})")
+
+    # Employees
+    def add_employee(self, employee_ID, name, department, job_title, manager_ID, basic_salary):
+        "Adds an employee and returns its ID; employee_ID None takes the next ID"
+        self._check_writable()
+        employee = build_employee(employee_ID, name, department, job_title, manager_ID, basic_salary)
+        with self._writing("employees"):
+            employee._employee_ID = self._new_id("employees", employee_ID)
+            self._put("employees", employee._employee_ID, employee)
+        return employee._employee_ID
+
+    def modify_employee(self, emp_id, name, department, job_title, manager_ID, basic_salary, version=None):
+        "Changes an employee; version is the one read before the change was made (see version())"
+        self._check_writable()
+        employee = build_employee(emp_id, name, department, job_title, manager_ID, basic_salary)
+        with self._writing("employees"):
+            self._current("employees", emp_id, version)
+            return self._put("employees", emp_id, employee)
+
+    def delete_employee(self, emp_id, version=None):
+        self._remove("employees", emp_id, version)
+
+    # Client bookings
+    def add_client(self, client_id, type, date, time, duration, venue):
+        "Adds a client booking and returns its ID; client_id None takes the next ID"
+        self._check_writable()
+        booking = build_client_booking(type, date, time, duration, venue)
+        # Both kinds of booking are locked, since either can take the venue
+        with self._writing("clients_events", "events"):
+            self._check_venue_free("client", None, booking)
+            client_id = self._new_id("clients_events", client_id)
+            self._put("clients_events", client_id, booking)
+        return client_id
+
+    def modify_client(self, client_id, type, date, time, duration, venue, version=None):
+        self._check_writable()
+        booking = build_client_booking(type, date, time, duration, venue)
+        with self._writing("clients_events", "events"):
+            self._current("clients_events", client_id, version)
+            self._check_venue_free("client", client_id, booking)
+            return self._put("clients_events", client_id, booking)
+
+    def delete_client(self, client_id, version=None):
+        self._remove("clients_events", client_id, version)
+
+    # Events
+    def add_event(self, event_id, name, type, date, venue, theme, invoice=None):
+        "Adds an event and returns its ID; event_id None takes the next ID and invoice None a random invoice number"
+        self._check_writable()
+        event = build_event(name, type, date, venue, theme,
+                            random.randint(5000, 25000) if invoice is None else invoice)
+        with self._writing("clients_events", "events"):
+            self._check_venue_free("event", None, event)
+            event_id = self._new_id("events", event_id)
+            self._put("events", event_id, event)
+        return event_id
+
+    def modify_event(self, event_id, name, type, date, venue, theme, version=None):
+        "Changes an event, keeping its invoice number, guests and suppliers"
+        self._check_writable()
+        with self._writing("clients_events", "events"):
+            current = self._current("events", event_id, version)
+            event = build_event(name, type, date, venue, theme, current['invoice'])
+            event.update((field, current[field]) for field in EVENT_MEMBERS if field in current)
+            self._check_venue_free("event", event_id, event)
+            return self._put("events", event_id, event)
+
+    def delete_event(self, event_id, version=None):
+        self._remove("events", event_id, version)
+
+    def add_event_members(self, event_id, field, member_ids, version=None):
+        """Adds guests (field "guests") or suppliers (field "suppliers") to an event by ID and returns how many
+        were not on it yet. The event's set and the reverse index are changed in place and only the change is
+        journaled, so adding k IDs costs O(k) however many the event has."""
+        return self._change_members(event_id, field, member_ids, True, version)
+
+    def remove_event_members(self, event_id, field, member_ids, version=None):
+        "Takes guests or suppliers off an event by ID and returns how many were on it"
+        return self._change_members(event_id, field, member_ids, False, version)
+
+    def _change_members(self, event_id, field, member_ids, adding, version):
+        if field not in EVENT_MEMBERS:
+            raise ValueError(f"Unknown member field: {field}")
+        self._check_writable()
+        member_ids = list(dict.fromkeys(member_ids))
+        with self._writing("events", field):
+            event = self._current("events", event_id, version)
+            if adding:
+                missing = [member_id for member_id in member_ids if member_id not in self.store(field)]
+                if missing:
+                    shown = ", ".join(map(str, missing[:10])) + (" ..." if len(missing) > 10 else "")
+                    raise RecordNotFoundError(f"{RECORD_NAMES[field]} not found: {shown}")
+            # Only this thread changes the set; copies of the store written by other threads get their own
+            # (see _copy_store). The other indexes don't depend on the members.
+            members = event.setdefault(field, set())
+            if adding:
+                changed = [member_id for member_id in member_ids if member_id not in members]
+                members.update(changed)
+            else:
+                changed = [member_id for member_id in member_ids if member_id in members]
+                members.difference_update(changed)
+            if changed:
+                index = self._member_indexes.get(field)
+                if index is not None and adding:
+                    index.link(event_id, changed)
+                elif index is not None:
+                    index.unlink(event_id, changed)
+                self._members_changed({event_id: event},
+                                      [(event_id, field, changed, ()) if adding else (event_id, field, (), changed)])
+        return len(changed)
+
+    def _drop_member(self, field, member_id):
+        # Takes a deleted guest or supplier off every event it was on
+        events = {event_id: self.events[event_id] for event_id in self.events_with_member(field, member_id)}
+        for event_id, event in events.items():
+            event[field].discard(member_id)
+            self._member_indexes[field].unlink(event_id, [member_id])
+        if events:
+            self._members_changed(events, [(event_id, field, (), (member_id,)) for event_id in events])
+
+    def _members_changed(self, events, member_changes):
+        # Saves events whose member sets were changed in place. An event read from the database is a copy of its
+        # row, so it is written back whole; other stores only journal the changes.
+        if isinstance(self.events, SQLiteCollection):
+            self.events.update(events)
+        self._changed("events", [], member_changes)
+
+    # Suppliers
+    def add_supplier(self, supplier_id, name, service_type, contact_details):
+        "Adds a supplier and returns its ID; supplier_id None takes the next ID"
+        self._check_writable()
+        supplier = build_supplier(supplier_id, name, service_type, contact_details)
+        with self._writing("suppliers"):
+            supplier._supplier_id = self._new_id("suppliers", supplier_id)
+            self._put("suppliers", supplier._supplier_id, supplier)
+        return supplier._supplier_id
+
+    def modify_supplier(self, supplier_id, name, service_type, contact_details, version=None):
+        self._check_writable()
+        supplier = build_supplier(supplier_id, name, service_type, contact_details)
+        with self._writing("suppliers"):
+            self._current("suppliers", supplier_id, version)
+            return self._put("suppliers", supplier_id, supplier)
+
+    def delete_supplier(self, supplier_id, version=None):
+        "Deletes a supplier and takes it off every event"
+        with self._writing("events", "suppliers"):
+            self._remove("suppliers", supplier_id, version)
+            self._drop_member("suppliers", supplier_id)
+
+    # Guests
+    def add_guest(self, guest_id, name, contact_details):
+        "Adds a guest and returns its ID; guest_id None takes the next ID"
+        self._check_writable()
+        guest = build_guest(guest_id, name, contact_details)
+        with self._writing("guests"):
+            guest._guest_ID = self._new_id("guests", guest_id)
+            self._put("guests", guest._guest_ID, guest)
+        return guest._guest_ID
+
+    def modify_guest(self, guest_id, name, contact_details, version=None):
+        self._check_writable()
+        guest = build_guest(guest_id, name, contact_details)
+        with self._writing("guests"):
+            self._current("guests", guest_id, version)
+            return self._put("guests", guest_id, guest)
+
+    def delete_guest(self, guest_id, version=None):
+        "Deletes a guest and takes it off the guest list of every event"
+        with self._writing("events", "guests"):
+            self._remove("guests", guest_id, version)
+            self._drop_member("guests", guest_id)
+
+    # Venues
+    def add_venue(self, venue_id, name, address, contact_details, min_guests, max_guests):
+        "Adds a venue and returns its ID; venue_id None takes the next ID"
+        self._check_writable()
+        venue = build_venue(venue_id, name, address, contact_details, min_guests, max_guests)
+        with self._writing("venues"):
+            venue._venue_id = self._new_id("venues", venue_id)
+            self._put("venues", venue._venue_id, venue)
+        return venue._venue_id
+
+    def modify_venue(self, venue_id, name, address, contact_details, min_guests, max_guests, version=None):
+        self._check_writable()
+        venue = build_venue(venue_id, name, address, contact_details, min_guests, max_guests)
+        with self._writing("venues"):
+            self._current("venues", venue_id, version)
+            return self._put("venues", venue_id, venue)
+
+    def delete_venue(self, venue_id, version=None):
+        self._remove("venues", venue_id, version)
+
+    def import_file(self, collection, source_path):
+        "Bulk-imports guests, suppliers or employees from a CSV or JSON-lines file and returns the ImportResult"
+        with self._writing(collection):
+            result = import_records(self.store(collection), self.store_paths[collection], collection, source_path,
+                                    self.id_sequences[collection],
+                                    writer=self.journals.get(collection, self.autosave))
+            for key in result.imported:
+                self._update_indexes(collection, key)
+                for listener in self.listeners:
+                    listener(collection, key)
+        return result
@@ -0,0 +1,309 @@
+import argparse
+import json
+import signal
+import socket
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from itertools import islice
+from urllib.parse import parse_qs, urlsplit
+from main_classes import *
+
+# Records per page of a list endpoint when the request doesn't say, and the most a request may ask for
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+# Threads answering requests, and seconds a kept-alive connection may sit idle before it is closed
+SERVER_WORKERS = 16
+IDLE_TIMEOUT = 30
+
+# Fields of each store in the order the service's add and modify methods take them (after the ID)
+SERVICE_FIELDS = {
+    "employees": ("name", "department", "job_title", "manager_id", "basic_salary"),
+    "clients_events": ("type", "date", "time", "duration", "venue"),
+    "events": ("name", "type", "date", "venue", "theme"),
+    "suppliers": ("name", "service_type", "contact_details"),
+    "guests": ("name", "contact_details"),
+    "venues": ("name", "address", "contact_details", "min_guests", "max_guests"),
+}
+SERVICE_NAMES = {"employees": "employee", "clients_events": "client", "events": "event", "suppliers": "supplier",
+                 "guests": "guest", "venues": "venue"}
+
+
+class StoreOwner:
+    """Runs every operation on the stores on one thread, so request threads never touch them directly.
+
+    The stores, indexes and autosaver are not thread-safe; handing each call to a single-thread executor keeps
+    them consistent without a lock on every record. Pending changes are flushed every autosave_ms.
+    """
+    def __init__(self, service):
+        self.service = service
+        self._thread = ThreadPoolExecutor(1, thread_name_prefix="store-owner")
+        self._stopped = threading.Event()
+        self._autosaver = threading.Thread(target=self._autosave, daemon=True)
+        self._autosaver.start()
+
+    def submit(self, function, *args):
+        "Queues function(*args) for the owner thread and returns a Future of its result"
+        return self._thread.submit(function, *args)
+
+    def call(self, function, *args):
+        "Runs function(*args) on the owner thread and returns its result (or raises its exception)"
+        return self.submit(function, *args).result()
+
+    def _autosave(self):
+        while not self._stopped.wait(self.service.autosave.every_ms / 1000):
+            self.call(self._flush)
+
+    def _flush(self):
+        if self.service.autosave.is_dirty():
+            self.service.flush()
+        # Shared stores pick up what other programs saved, so reads don't fall behind by more than autosave_ms
+        if self.service.shared:
+            self.service.refresh()
+        # Reports writes that failed on the persistence thread
+        while not self.service.writer.completed.empty():
+            file_path, error = self.service.writer.completed.get()
+            if error:
+                print(f"Failed to save {file_path}: {error}")
+
+    def close(self):
+        "Writes every pending change and stops the owner thread"
+        self._stopped.set()
+        self.call(self.service.close)
+        self._thread.shutdown()
+
+    # The operations below run on the owner thread
+    def page(self, collection, offset, limit):
+        "Returns the total number of records and one page of them, in store order, as field dicts"
+        store = self.service.store(collection)
+        if isinstance(store, SQLiteCollection):
+            store = dict(store.page(offset, limit))
+            keys = list(store)
+        else:
+            keys = list(islice(store.keys(), offset, offset + limit))
+        fields = export_fields(collection)
+        return len(self.service.store(collection)), [dict(zip(fields, row))
+                                                     for row in iter_export_rows(store, collection, keys)]
+
+    def get(self, collection, key):
+        "Returns the fields of a record and its version, which a modify or delete can pass back"
+        store = self.service.store(collection)
+        if key not in store:
+            raise RecordNotFoundError(f"{RECORD_NAMES[collection]} not found")
+        record = dict(zip(export_fields(collection), next(iter_export_rows(store, collection, [key]))))
+        record["version"] = record_version(collection, store[key])
+        return record
+
+    def add(self, collection, key, body):
+        values = [body.get(field) for field in SERVICE_FIELDS[collection]]
+        if collection == "events":
+            values.append(body.get("invoice"))
+        key = getattr(self.service, "add_" + SERVICE_NAMES[collection])(key, *values)
+        return self.get(collection, key)
+
+    def modify(self, collection, key, body):
+        values = [body.get(field) for field in SERVICE_FIELDS[collection]]
+        getattr(self.service, "modify_" + SERVICE_NAMES[collection])(key, *values, version=body.get("version"))
+        return self.get(collection, key)
+
+    def delete(self, collection, key, version=None):
+        getattr(self.service, "delete_" + SERVICE_NAMES[collection])(key, version)
+
+
+class RequestError(Exception):
+    "An HTTP error status and message for the client"
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class CompanyRequestHandler(BaseHTTPRequestHandler):
+    """JSON API over the six stores:
+
+        GET    /<store>?offset=0&limit=50   one page of records and the total count
+        GET    /<store>/<id>                one record, with its version
+        POST   /<store>                     adds a record from a JSON object of its fields (an "id" is optional)
+        PUT    /<store>/<id>                replaces the fields of a record
+        DELETE /<store>/<id>?version=...    deletes a record
+
+    A PUT body or DELETE query holding the version read with GET is refused with 409 if the record has been
+    changed since. Invalid fields answer 400 with the message the GUI would show, unknown records 404.
+    """
+    protocol_version = "HTTP/1.1"
+    timeout = IDLE_TIMEOUT
+    # Headers and body are written separately; without this each response waits for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _dispatch(self, method):
+        try:
+            status, body = self._route(method)
+        except RequestError as e:
+            status, body = e.status, {"error": str(e)}
+        except RecordNotFoundError as e:
+            status, body = 404, {"error": str(e)}
+        except ConflictError as e:
+            status, body = 409, {"error": str(e)}
+        except ValueError as e:
+            status, body = 400, {"error": str(e)}
+        except Exception as e:
+            status, body = 500, {"error": f"{type(e).__name__}: {e}"}
+        payload = json.dumps(body, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _route(self, method):
+        owner = self.server.owner
+        url = urlsplit(self.path)
+        parts = url.path.strip("/").split("/")
+        collection = parts[0]
+        if collection not in SQLITE_TABLES or len(parts) > 2:
+            raise RequestError(404, f"Unknown path: {url.path}")
+        if len(parts) == 1:
+            if method == "GET":
+                query = parse_qs(url.query)
+                offset = self._number(query, "offset", 0)
+                limit = min(self._number(query, "limit", PAGE_SIZE), MAX_PAGE_SIZE)
+                total, items = owner.call(owner.page, collection, offset, limit)
+                return 200, {"total": total, "offset": offset, "limit": limit, "items": items}
+            if method == "POST":
+                body = self._body()
+                key = self._key(body["id"], 400) if body.get("id") is not None else None
+                return 201, owner.call(owner.add, collection, key, body)
+            raise RequestError(405, f"{method} is not allowed on /{collection}")
+
+        key = self._key(parts[1])
+        if method == "GET":
+            return 200, owner.call(owner.get, collection, key)
+        if method == "PUT":
+            return 200, owner.call(owner.modify, collection, key, self._body())
+        if method == "DELETE":
+            query = parse_qs(url.query)
+            version = self._number(query, "version", None) if "version" in query else None
+            owner.call(owner.delete, collection, key, version)
+            return 200, {"deleted": key}
+        raise RequestError(405, f"{method} is not allowed on /{collection}/<id>")
+
+    @staticmethod
+    def _key(value, status=404):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise RequestError(status, f"Not a record ID: {value}")
+
+    @staticmethod
+    def _number(query, name, default):
+        try:
+            value = int(query[name][0]) if name in query else default
+        except ValueError:
+            value = -1
+        if value < 0:
+            raise RequestError(400, f"{name} must be a whole number of at least 0")
+        return value
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise RequestError(400, f"Invalid JSON: {e}")
+        if not isinstance(body, dict):
+            raise RequestError(400, "The request body must be a JSON object")
+        return body
+
+
+class CompanyServer(HTTPServer):
+    """HTTP server that answers requests on a fixed pool of threads and hands the stores' work to a StoreOwner.
+
+    A connection is kept by one worker until the client closes it or it is idle for IDLE_TIMEOUT seconds, so
+    the pool size is also the number of clients served at the same time.
+    """
+    def __init__(self, address, service, workers=SERVER_WORKERS, verbose=False):
+        super().__init__(address, CompanyRequestHandler)
+        self.owner = StoreOwner(service)
+        self.verbose = verbose
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="http")
+        self._connections = set()
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        self._connections.add(request)
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self._connections.discard(request)
+            self.shutdown_request(request)
+
+    def server_close(self):
+        "Stops accepting connections, ends the open ones and saves every pending change"
+        super().server_close()
+        # Workers waiting on a kept-alive connection return as soon as it is shut down
+        for connection in list(self._connections):
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.pool.shutdown()
+        self.owner.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JSON API server for the Best Events Management System")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS,
+                        help="Threads answering requests, which is also the number of clients served at once")
+    parser.add_argument("--database", help="SQLite file to use instead of the .pkl stores")
+    parser.add_argument("--binary", action="store_true", help="Use the compact binary .bin stores")
+    parser.add_argument("--read-only", action="store_true", help="Serve memory-mapped copies of the stores")
+    parser.add_argument("--autosave-ms", type=int, default=AUTOSAVE_EVERY_MS,
+                        help="Longest time in milliseconds a change waits before it is saved")
+    parser.add_argument("--autosave-changes", type=int, default=AUTOSAVE_EVERY_CHANGES,
+                        help="Number of changes that are saved together at the latest")
+    parser.add_argument("--shared", action="store_true",
+                        help="Share the stores with other programs opened on them (e.g. the desktop app)")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    try:
+        service = CompanyService(args.database, args.binary, args.read_only, args.autosave_ms, args.autosave_changes,
+                                 args.shared)
+    except StoresInUseError as e:
+        sys.exit(f"Error: {e}")
+    server = CompanyServer((args.host, args.port), service, args.workers, args.verbose)
+    print(f"Serving on http://{args.host}:{server.server_address[1]} with {args.workers} workers")
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    # Stopping the server (Ctrl+C or SIGTERM) saves every pending change first
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,129 @@
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from main_classes import *
+
+
+def _worker(folder, worker, operations, counter_id, start, results):
+    # One copy of the program on the shared folder: adds, renames and deletes guests of its own and increments a
+    # counter every copy increments, always passing the version it read and retrying when another copy won
+    os.chdir(folder)
+    rng = random.Random(worker)
+    added, deleted, expected = [], [], {}
+    increments = conflicts = 0
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        service = CompanyService(shared=True)
+        start.wait()
+        for number in range(operations):
+            roll = rng.random()
+            if roll < 0.35 or not added:
+                contact_details = f"05{worker:02}{number:06}"
+                key = service.add_guest(None, f"Worker {worker} guest {number}", contact_details)
+                added.append(key)
+                expected[key] = (f"Worker {worker} guest {number}", contact_details)
+            elif roll < 0.65:
+                while True:
+                    service.refresh()
+                    counter = service.guests[counter_id]
+                    version = service.version("guests", counter_id)
+                    try:
+                        service.modify_guest(counter_id, counter._name, str(int(counter._contact_details) + 1),
+                                             version=version)
+                        increments += 1
+                        break
+                    except ConflictError:
+                        conflicts += 1
+            elif roll < 0.9:
+                key = rng.choice(added)
+                name, contact_details = expected[key]
+                service.modify_guest(key, f"Worker {worker} renamed {number}", contact_details,
+                                     version=service.version("guests", key))
+                expected[key] = (f"Worker {worker} renamed {number}", contact_details)
+            else:
+                key = added.pop(rng.randrange(len(added)))
+                service.delete_guest(key, service.version("guests", key))
+                deleted.append(key)
+                del expected[key]
+        service.close()
+    results.put((worker, expected, deleted, increments, conflicts))
+
+
+def run_stress_test(workers=4, operations=1000, source="."):
+    """Has several processes change a copy of guests.pkl at the same time through CompanyService(shared=True), then
+    opens the result and checks that no change was lost: every added guest is there with its last name, every
+    deleted one is gone, no ID was handed out twice and the counter equals the number of increments. Returns
+    True if all checks pass."""
+    folder = tempfile.mkdtemp(prefix="stress-")
+    if os.path.exists(os.path.join(source, "guests.pkl")):
+        shutil.copy(os.path.join(source, "guests.pkl"), folder)
+    cwd = os.getcwd()
+    os.chdir(folder)
+    try:
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            setup = CompanyService(shared=True)
+            counter_id = setup.add_guest(None, "Counter", "0")
+            initial = len(setup.guests)
+            setup.close()
+
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        start = context.Barrier(workers + 1)
+        processes = [context.Process(target=_worker, args=(folder, worker, operations, counter_id, start, results))
+                     for worker in range(workers)]
+        for process in processes:
+            process.start()
+        start.wait()
+        began = time.perf_counter()
+        outcomes = [results.get() for process in processes]
+        elapsed = time.perf_counter() - began
+        for process in processes:
+            process.join()
+
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            final = CompanyService()
+            guests = dict(final.guests.items())
+            final.close()
+    finally:
+        os.chdir(cwd)
+
+    failures = []
+    added = [key for worker, expected, deleted, increments, conflicts in outcomes for key in [*expected, *deleted]]
+    if len(added) != len(set(added)):
+        failures.append(f"{len(added) - len(set(added))} IDs were handed out to more than one process")
+    for worker, expected, deleted, increments, conflicts in outcomes:
+        for key, (name, contact_details) in expected.items():
+            if key not in guests:
+                failures.append(f"Guest {key} added by worker {worker} is missing")
+            elif (guests[key]._name, guests[key]._contact_details) != (name, contact_details):
+                failures.append(f"Guest {key} is {guests[key]._name!r}, worker {worker} last saved {name!r}")
+        failures.extend(f"Guest {key} deleted by worker {worker} is back" for key in deleted if key in guests)
+    increments = sum(outcome[3] for outcome in outcomes)
+    conflicts = sum(outcome[4] for outcome in outcomes)
+    if guests[counter_id]._contact_details != str(increments):
+        failures.append(f"Counter is {guests[counter_id]._contact_details} after {increments} increments")
+    expected_count = initial + sum(len(outcome[1]) for outcome in outcomes)
+    if len(guests) != expected_count:
+        failures.append(f"{len(guests)} guests instead of {expected_count}")
+
+    print(f"{workers * operations} changes from {workers} processes in {elapsed:.1f} s "
+          f"({workers * operations / elapsed:,.0f} changes/s), {increments} counter increments, "
+          f"{conflicts} conflicts refused and retried")
+    for failure in failures[:20]:
+        print(failure)
+    print("FAILED" if failures else "OK: no change was lost")
+    shutil.rmtree(folder, ignore_errors=True)
+    return not failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-process test of shared stores (CompanyService(shared=True))")
+    parser.add_argument("--workers", type=int, default=4, help="Processes changing the stores at the same time")
+    parser.add_argument("--operations", type=int, default=1000, help="Changes made by each process")
+    args = parser.parse_args()
+    sys.exit(0 if run_stress_test(args.workers, args.operations) else 1)
@@ -1,9 +1,31 @@
+import argparse
 from main_classes import *
 from GUI import *
 
 # Runs the program entirely and loops until it ends.
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = CompanySystemGUI(root)
-    root.mainloop()
+    parser = argparse.ArgumentParser(description="Best Events Management System")
+    parser.add_argument("--database", help="SQLite file to use instead of the .pkl stores")
+    parser.add_argument("--binary", action="store_true",
+                        help="Use the compact binary .bin stores, converting the .pkl files the first time")
+    parser.add_argument("--read-only", action="store_true",
+                        help="Browse memory-mapped copies of the stores without loading or changing them")
+    parser.add_argument("--autosave-ms", type=int, default=AUTOSAVE_EVERY_MS,
+                        help="Longest time in milliseconds a change waits before it is saved")
+    parser.add_argument("--autosave-changes", type=int, default=AUTOSAVE_EVERY_CHANGES,
+                        help="Number of changes that are saved together at the latest")
+    parser.add_argument("--shared", action="store_true",
+                        help="Share the data with other copies of the program (or a server) opened on the same "
+                             "folder; every change is written at once instead of in the background")
+    args = parser.parse_args()
 
+    root = tk.Tk()
+    try:
+        app = CompanySystemGUI(root, database=args.database, autosave_ms=args.autosave_ms,
+                               autosave_changes=args.autosave_changes, binary=args.binary,
+                               read_only=args.read_only, shared=args.shared)
+    except StoresInUseError as e:
+        messagebox.showerror("Error", str(e))
+        root.destroy()
+    else:
+        root.mainloop()
@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the top of the repository, which is not an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def store_dir(tmp_path, monkeypatch):
+    "Runs a test in an empty folder, since the stores are read from and written to the working directory"
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,104 @@
+"Round trips of the stores through the binary (.bin), memory-mapped (.rows) and SQLite formats"
+import io
+import os
+import shutil
+
+import pytest
+
+from main_classes import (SQLITE_TABLES, SQLiteRepository, _to_row, build_client_booking, build_employee,
+                          build_event, build_guest, build_supplier, build_venue, convert_to_binary, load_data,
+                          open_mapped_store, read_binary, save_data, write_binary)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def sample_stores():
+    events = {
+        1: build_event("Old party", "Weddings", "2031-01-01", "Hall A", "Blue", 5000),
+        2: dict(build_event("Empty party", "Birthdays", "2031-01-02", "Hall B", "Red", 6000), guests=set(),
+                suppliers=set()),
+        3: dict(build_event("Full party", "Graduations", "2031-01-03", "Hall C", "Gold", 7000), guests={4, 10, 200},
+                suppliers={1}),
+        4: dict(build_event("Half party", "Themed Parties", "2031-01-04", "Hall D", "Green", None), guests={3}),
+    }
+    return {
+        "employees": {1: build_employee(1, "Ann", "Sales", "Sales Managers", None, 50000),
+                      2: build_employee(2, "Bob", "Sales", "Salesperson", "1", 30000.5)},
+        "clients_events": {1: build_client_booking("Wedding", "2031-02-01", "10:30", "2.5", "Hall A"),
+                           2: build_client_booking("Party", "2031-02-02", "18:00", "4", "Hall É")},
+        "events": events,
+        "suppliers": {1: build_supplier(1, "Cater Co", "Catering", "cater@example.com")},
+        "guests": {1: build_guest(1, "Zoë", "zoe@example.com"), 2: build_guest(2, "Ed Wood", "+44 20 7946 0000")},
+        "venues": {1: build_venue(1, "Hall A", "1 Main St", "hall@example.com", "10", "200")},
+    }
+
+
+def rows(collection, data):
+    # Records are compared by their column values, since the entity classes have no __eq__
+    return {key: _to_row(collection, record) for key, record in data.items()}
+
+
+@pytest.mark.parametrize("collection", SQLITE_TABLES)
+def test_binary_round_trip(collection):
+    data = sample_stores()[collection]
+    out = io.BytesIO()
+    write_binary(data, collection, out)
+
+    assert rows(collection, read_binary(out.getvalue())) == rows(collection, data)
+
+
+def test_binary_keeps_missing_and_empty_member_sets_apart():
+    events = sample_stores()["events"]
+    out = io.BytesIO()
+    write_binary(events, "events", out)
+
+    assert read_binary(out.getvalue()) == events
+    assert "guests" not in read_binary(out.getvalue())[1]
+
+
+def test_binary_store_file_round_trip(store_dir):
+    events = sample_stores()["events"]
+    save_data(events, "events.bin")
+
+    assert load_data("events.bin") == events
+
+
+def test_converted_repository_stores_read_back_the_same(store_dir):
+    for collection in SQLITE_TABLES:
+        shutil.copy(os.path.join(ROOT, collection + ".pkl"), collection + ".pkl")
+        convert_to_binary(collection + ".pkl")
+
+        assert rows(collection, load_data(collection + ".bin")) == rows(collection, load_data(collection + ".pkl"))
+
+
+@pytest.mark.parametrize("collection", SQLITE_TABLES)
+def test_mapped_store_round_trip(store_dir, collection):
+    data = sample_stores()[collection]
+    save_data(data, collection + ".bin")
+    mapped = open_mapped_store(collection + ".bin")
+
+    assert list(mapped) == sorted(data)
+    assert rows(collection, {key: mapped[key] for key in mapped}) == rows(collection, data)
+    if collection == "events":
+        assert {key: mapped[key] for key in mapped} == data
+
+
+def test_mapped_store_is_rebuilt_for_each_store_file(store_dir):
+    save_data(sample_stores()["guests"], "guests.pkl")
+    save_data({7: build_guest(7, "Only in bin", "bin@example.com")}, "guests.bin")
+
+    assert list(open_mapped_store("guests.pkl")) == [1, 2]
+    assert list(open_mapped_store("guests.bin")) == [7]
+
+
+def test_sqlite_round_trip(store_dir):
+    stores = sample_stores()
+    repository = SQLiteRepository("company.db")
+    repository.import_stores(stores)
+    try:
+        for collection, data in stores.items():
+            stored = dict(repository.collection(collection).items())
+            assert rows(collection, stored) == rows(collection, data)
+        assert dict(repository.collection("events").items()) == stores["events"]
+    finally:
+        repository.close()
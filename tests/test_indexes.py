@@ -0,0 +1,196 @@
+"The index classes checked against brute-force scans of the same records"
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from main_classes import (ColumnIndex, DateIndex, EmployeeIndex, Guest, MemberIndex, SQLiteRepository,
+                          TextSearchIndex, VenueBookingIndex, booking_interval, build_employee, parse_date,
+                          search_text, sort_key, text_matches)
+
+DAYS = [(date(2031, 1, 1) + timedelta(days=offset)).isoformat() for offset in range(40)]
+
+
+def random_booking(rng):
+    if rng.random() < 0.3:
+        return {'name': "Event", 'date': rng.choice(DAYS), 'venue': rng.choice("AB")}
+    return {'type': "Wedding", 'date': rng.choice(DAYS), 'venue': rng.choice("AB"),
+            'time': f"{rng.randint(0, 23)}:{rng.randint(0, 59):02d}",
+            'duration': str(rng.choice([0.25, 1, 2.5, 8, 30, 24 * 90]))}
+
+
+def overlap(first, second):
+    (first_start, first_end), (second_start, second_end) = booking_interval(first), booking_interval(second)
+    return first['venue'] == second['venue'] and first_start < second_end and second_start < first_end
+
+
+def test_venue_booking_conflicts_match_brute_force():
+    rng = random.Random(1)
+    index, bookings = VenueBookingIndex(), {}
+    for _ in range(2000):
+        key = (rng.choice(["client", "event"]), rng.randint(1, 150))
+        if rng.random() < 0.3:
+            index.remove(key)
+            bookings.pop(key, None)
+        else:
+            bookings[key] = random_booking(rng)
+            index.add(key, bookings[key])
+
+        query = random_booking(rng)
+        ignore = rng.choice(sorted(bookings)) if bookings else None
+        expected = sorted((booking_interval(booking)[0], key) for key, booking in bookings.items()
+                          if key != ignore and overlap(booking, query))
+        assert index.conflicts(query, ignore=ignore) == [key for start, key in expected]
+
+    pairs = {frozenset((first, second)) for venue, first, second in index.find_all_conflicts()}
+    keys = sorted(bookings)
+    assert pairs == {frozenset((first, second)) for position, first in enumerate(keys)
+                     for second in keys[position + 1:] if overlap(bookings[first], bookings[second])}
+
+
+def test_venue_booking_index_skips_unreadable_bookings():
+    index = VenueBookingIndex({1: {'date': "someday", 'venue': "A", 'time': "10:00", 'duration': "1"}})
+
+    assert index.conflicts({'date': DAYS[0], 'venue': "A", 'time': "10:00", 'duration': "1"}) == []
+    assert index.find_all_conflicts() == []
+
+
+def test_date_index_matches_brute_force():
+    rng = random.Random(2)
+    records = {key: {'date': rng.choice(DAYS + ["not a date"])} for key in range(300)}
+    index = DateIndex(records)
+    for key in rng.sample(sorted(records), 100):
+        records[key] = {'date': rng.choice(DAYS)}
+        index.add(key, records[key]['date'])
+    for key in rng.sample(sorted(records), 50):
+        del records[key]
+        index.remove(key)
+
+    for _ in range(100):
+        start, end = sorted(rng.sample(DAYS, 2))
+        expected = sorted((parse_date(record['date']), key) for key, record in records.items()
+                          if parse_date(record['date']) and start <= record['date'] <= end)
+        assert index.between(start, end) == [key for day, key in expected]
+    assert index.between(None, None) == [key for day, key in sorted(
+        (parse_date(record['date']), key) for key, record in records.items() if parse_date(record['date']))]
+
+
+def test_member_index_matches_brute_force():
+    rng = random.Random(3)
+    events = {event_id: {'guests': set(rng.sample(range(50), rng.randint(0, 10)))} for event_id in range(40)}
+    index = MemberIndex(events, "guests")
+    for _ in range(500):
+        event_id = rng.randrange(45)
+        members = rng.sample(range(50), 3)
+        action = rng.random()
+        if action < 0.4 and event_id in events:
+            added = [member for member in members if member not in events[event_id]['guests']]
+            events[event_id]['guests'].update(added)
+            index.link(event_id, added)
+        elif action < 0.8 and event_id in events:
+            removed = [member for member in members if member in events[event_id]['guests']]
+            events[event_id]['guests'].difference_update(removed)
+            index.unlink(event_id, removed)
+        elif action < 0.9:
+            events[event_id] = {'guests': set(members)}
+            index.add(event_id, events[event_id])
+        else:
+            events.pop(event_id, None)
+            index.remove(event_id)
+
+    for member in range(50):
+        assert index.events_of(member) == sorted(event_id for event_id, event in events.items()
+                                                 if member in event['guests'])
+
+
+def test_column_index_matches_brute_force():
+    rng = random.Random(4)
+    words = ["apple", "Apricot", "banana", "750", "75", "-3.5", "", None, "None", "  cherry ", "Éclair"]
+    values = {key: rng.choice(words) for key in range(200)}
+    index = ColumnIndex(values, values.get)
+    for key in rng.sample(sorted(values), 60):
+        values[key] = rng.choice(words)
+        index.add(key)
+    for key in rng.sample(sorted(values), 30):
+        del values[key]
+        index.remove(key)
+
+    by_value = sorted(values, key=lambda key: (sort_key(values[key]), key))
+    assert index.ordered() == by_value
+    assert index.ordered(descending=True) == by_value[::-1]
+    assert sorted(index.matching("ap")) == sorted(key for key, value in values.items()
+                                                  if sort_key(value)[0] == 1 and sort_key(value)[1].startswith("ap"))
+    assert sorted(index.matching("75")) == sorted(key for key, value in values.items() if sort_key(value) == (0, 75))
+    assert sorted(index.matching("0..100")) == sorted(key for key, value in values.items()
+                                                      if sort_key(value)[0] == 0 and 0 <= sort_key(value)[1] <= 100)
+
+
+def test_employee_index_matches_brute_force():
+    rng = random.Random(5)
+    employees = {}
+    index = EmployeeIndex()
+    for _ in range(300):
+        emp_id = rng.randint(1, 60)
+        if rng.random() < 0.2:
+            employees.pop(emp_id, None)
+            index.remove(emp_id)
+            continue
+        employees[emp_id] = build_employee(emp_id, "Employee", rng.choice(["Sales", "Marketing"]),
+                                           rng.choice(["Sales Managers", "Salesperson"]),
+                                           rng.choice([None, "None", 1, "2", 3]), 1000)
+        index.add(emp_id, employees[emp_id])
+
+    for department in ("Sales", "Marketing"):
+        assert index.by_department(department) == {emp_id for emp_id, employee in employees.items()
+                                                   if employee._department == department}
+    for manager in (1, 2, 3):
+        assert index.by_manager(manager) == {emp_id for emp_id, employee in employees.items()
+                                             if str(employee._manager_ID) == str(manager)}
+
+
+ALPHABET = "abcÉéßİK \t_%-\\xyz0"
+
+
+def random_text(rng):
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 8)))
+
+
+@pytest.fixture
+def guests():
+    rng = random.Random(6)
+    return {key: Guest(random_text(rng), key, random_text(rng)) for key in range(1, 1500)}
+
+
+def brute_force_search(records, query):
+    query = query.strip().lower()
+    return [key for key, record in records.items()
+            if query and text_matches(query, search_text((record._name, record._contact_details)))]
+
+
+def test_text_search_index_matches_brute_force(guests):
+    rng = random.Random(7)
+    index = TextSearchIndex(guests)
+    for key in rng.sample(sorted(guests), 300):
+        guests[key] = Guest(random_text(rng), key, random_text(rng))
+        index.add(key, guests[key])
+    for key in rng.sample(sorted(guests), 200):
+        del guests[key]
+        index.remove(key)
+
+    for _ in range(500):
+        query = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 4)))
+        assert sorted(index.search(query, limit=len(guests))) == sorted(brute_force_search(guests, query))
+
+
+def test_sqlite_search_matches_text_search_index(store_dir, guests):
+    rng = random.Random(8)
+    repository = SQLiteRepository("company.db")
+    repository.import_stores({"guests": guests})
+    index = TextSearchIndex(guests)
+    try:
+        for _ in range(300):
+            query = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 4)))
+            assert repository.collection("guests").search(query, limit=len(guests)) == \
+                sorted(index.search(query, limit=len(guests)))
+    finally:
+        repository.close()
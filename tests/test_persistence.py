@@ -0,0 +1,165 @@
+"Journal and snapshot recovery of the .pkl stores"
+import os
+import pickle
+
+import main_classes
+from main_classes import (AutoSaver, Guest, PersistenceWriter, SharedJournal, journal_path, load_data,
+                          previous_snapshot_path, record_changes, save_data)
+
+
+def names(data):
+    return {key: guest._name for key, guest in data.items()}
+
+
+def event(**members):
+    return dict({'name': "Party", 'type': "Weddings", 'date': "2031-05-01", 'venue': "Hall", 'theme': "Blue",
+                 'invoice': 7000}, **members)
+
+
+def write_changes(data, file_path, keys, member_changes=()):
+    writer = PersistenceWriter()
+    record_changes(data, file_path, keys, writer, member_changes)
+    writer.close()
+
+
+def test_journal_is_replayed_over_the_snapshot(store_dir):
+    data = {1: Guest("Ann", 1, "ann@example.com"), 2: Guest("Bob", 2, "bob@example.com")}
+    save_data(data, "guests.pkl")
+    data[3] = Guest("Cid", 3, "cid@example.com")
+    data[1] = Guest("Anne", 1, "ann@example.com")
+    del data[2]
+    write_changes(data, "guests.pkl", [3, 1, 2])
+
+    assert os.path.getsize(journal_path("guests.pkl")) > 0
+    assert names(load_data("guests.pkl")) == {1: "Anne", 3: "Cid"}
+
+
+def test_torn_journal_entry_is_cut_off(store_dir):
+    data = {1: Guest("Ann", 1, "ann@example.com")}
+    save_data(data, "guests.pkl")
+    data[2] = Guest("Bob", 2, "bob@example.com")
+    write_changes(data, "guests.pkl", [2])
+    complete = os.path.getsize(journal_path("guests.pkl"))
+    # The program was killed in the middle of an append
+    with open(journal_path("guests.pkl"), "ab") as file:
+        file.write(pickle.dumps((3, True, Guest("Cid", 3, "cid@example.com")))[:-5])
+
+    assert names(load_data("guests.pkl")) == {1: "Ann", 2: "Bob"}
+    assert os.path.getsize(journal_path("guests.pkl")) == complete
+
+    # Later appends stay readable
+    data[4] = Guest("Dee", 4, "dee@example.com")
+    write_changes(data, "guests.pkl", [4])
+    assert names(load_data("guests.pkl")) == {1: "Ann", 2: "Bob", 4: "Dee"}
+
+
+def test_damaged_snapshot_falls_back_to_the_previous_one(store_dir):
+    save_data({1: Guest("Ann", 1, "ann@example.com")}, "guests.pkl")
+    save_data({1: Guest("Ann", 1, "ann@example.com"), 2: Guest("Bob", 2, "bob@example.com")}, "guests.pkl")
+    assert os.path.exists(previous_snapshot_path("guests.pkl"))
+    with open("guests.pkl", "r+b") as file:
+        file.seek(-3, os.SEEK_END)
+        file.write(b"xxx")
+
+    assert names(load_data("guests.pkl")) == {1: "Ann"}
+
+
+def test_missing_store_starts_empty(store_dir):
+    assert load_data("guests.pkl") == {}
+
+
+def test_writer_compacts_the_journal_into_a_snapshot(store_dir, monkeypatch):
+    monkeypatch.setattr(main_classes, "JOURNAL_COMPACT_EVERY", 5)
+    data = {}
+    save_data(data, "guests.pkl")
+    writer = PersistenceWriter()
+    for key in range(1, 8):
+        data[key] = Guest(f"Guest {key}", key, "guest@example.com")
+        record_changes(data, "guests.pkl", [key], writer)
+    writer.close()
+
+    # Writes queued together are merged, so there may be fewer reports than changes
+    assert all(error is None for file_path, error in list(writer.completed.queue))
+    # The snapshot holds the first five; only the two after it are left in the journal
+    with open(journal_path("guests.pkl"), "rb") as file:
+        assert sum(1 for _ in iter(lambda: _load_entry(file), None)) == 2
+    assert names(load_data("guests.pkl")) == {key: f"Guest {key}" for key in range(1, 8)}
+
+
+def _load_entry(file):
+    try:
+        return pickle.load(file)
+    except EOFError:
+        return None
+
+
+def test_journal_left_by_an_older_compaction_is_replayed(store_dir):
+    save_data({1: Guest("Ann", 1, "ann@example.com")}, "guests.pkl")
+    with open("guests.pkl.journal.1", "wb") as file:
+        file.write(pickle.dumps((2, True, Guest("Bob", 2, "bob@example.com"))))
+
+    assert names(load_data("guests.pkl")) == {1: "Ann", 2: "Bob"}
+
+
+def test_member_changes_are_journaled_and_replayed(store_dir):
+    data = {5: event(guests={1, 2}, suppliers=set())}
+    save_data(data, "events.pkl")
+    data[5]["guests"].update({3, 4})
+    data[5]["guests"].discard(1)
+    write_changes(data, "events.pkl", [], [(5, "guests", [3, 4], ()), (5, "guests", (), [1])])
+
+    with open(journal_path("events.pkl"), "rb") as file:
+        assert [len(entry) for entry in iter(lambda: _load_entry(file), None)] == [4, 4]
+    assert load_data("events.pkl") == {5: event(guests={2, 3, 4}, suppliers=set())}
+
+
+def test_member_changes_of_an_event_without_members_create_the_set(store_dir):
+    data = {5: event()}
+    save_data(data, "events.pkl")
+    data[5]["suppliers"] = {9}
+    write_changes(data, "events.pkl", [], [(5, "suppliers", [9], ())])
+
+    assert load_data("events.pkl") == {5: event(suppliers={9})}
+
+
+def test_whole_record_is_written_after_earlier_member_changes(store_dir):
+    data = {5: event(guests={1})}
+    save_data(data, "events.pkl")
+    writer = PersistenceWriter()
+    autosave = AutoSaver(writer, every_ms=60000, every_changes=1000)
+    data[5]["guests"].add(2)
+    autosave.submit(data, "events.pkl", [], [(5, "guests", [2], ())])
+    # The event is then replaced by one without guest 2; replaying the member change after it would add it back
+    data[5] = event(guests={1}, theme="Green")
+    autosave.submit(data, "events.pkl", [5])
+    autosave.flush()
+    writer.close()
+
+    assert load_data("events.pkl") == {5: event(guests={1}, theme="Green")}
+
+
+def test_snapshot_copy_does_not_share_member_sets(store_dir):
+    data = {5: event(guests={1})}
+    copied = main_classes._copy_store(data)
+    data[5]["guests"].add(2)
+
+    assert copied[5]["guests"] == {1}
+
+
+def test_shared_journal_catches_up_with_other_writers(store_dir):
+    save_data({5: event(guests={1})}, "events.pkl")
+    writer = PersistenceWriter()
+    mine, theirs = SharedJournal("events.pkl", writer), SharedJournal("events.pkl", writer)
+    my_data, their_data = mine.load("events.pkl"), theirs.load("events.pkl")
+
+    with theirs.lock:
+        assert theirs.catch_up(their_data) == []
+        their_data[5]["guests"].add(2)
+        their_data[6] = event(theme="Red")
+        theirs.submit(their_data, "events.pkl", [6], [(5, "guests", [2], ())])
+
+    with mine.lock:
+        assert sorted(mine.catch_up(my_data)) == [5, 6]
+    writer.close()
+
+    assert my_data == their_data == {5: event(guests={1, 2}), 6: event(theme="Red")}
@@ -0,0 +1,81 @@
+"CompanyService version checks: stale versions are refused instead of undoing someone else's change"
+import pytest
+
+from main_classes import CompanyService, ConflictError, RecordNotFoundError
+
+
+@pytest.fixture
+def service(store_dir):
+    service = CompanyService()
+    yield service
+    service.close()
+
+
+def test_modify_with_current_version(service):
+    guest_id = service.add_guest(None, "Ada Lovelace", "ada@example.com")
+    version = service.version("guests", guest_id)
+
+    service.modify_guest(guest_id, "Ada King", "ada@example.com", version)
+
+    assert service.store("guests")[guest_id]._name == "Ada King"
+    assert service.version("guests", guest_id) != version
+
+
+def test_stale_version_is_refused(service):
+    guest_id = service.add_guest(None, "Ada Lovelace", "ada@example.com")
+    version = service.version("guests", guest_id)
+    service.modify_guest(guest_id, "Ada King", "ada@example.com", version)
+
+    with pytest.raises(ConflictError):
+        service.modify_guest(guest_id, "Ada Byron", "ada@example.com", version)
+    with pytest.raises(ConflictError):
+        service.delete_guest(guest_id, version)
+    assert service.store("guests")[guest_id]._name == "Ada King"
+
+
+def test_unknown_id(service):
+    with pytest.raises(RecordNotFoundError):
+        service.modify_guest(404, "Ada Lovelace", "ada@example.com")
+    with pytest.raises(RecordNotFoundError):
+        service.delete_guest(404)
+    with pytest.raises(RecordNotFoundError):
+        service.version("guests", 404)
+
+
+def test_member_change_with_stale_version(service):
+    guest_ids = [service.add_guest(None, name, "guest@example.com") for name in ("Ada Lovelace", "Alan Turing")]
+    event_id = service.add_event(None, "Launch", "Weddings", "2031-05-01", "Hall", "Gold")
+    version = service.version("events", event_id)
+    assert service.add_event_members(event_id, "guests", guest_ids[:1], version) == 1
+
+    with pytest.raises(ConflictError):
+        service.add_event_members(event_id, "guests", guest_ids[1:], version)
+    assert service.event_members(event_id, "guests") == {guest_ids[0]}
+    with pytest.raises(RecordNotFoundError):
+        service.add_event_members(event_id, "guests", [404])
+
+
+def test_shared_services_agree_on_versions(store_dir):
+    first = CompanyService(shared=True)
+    second = CompanyService(shared=True)
+    try:
+        for guest_id, name in ((8, "Ada Lovelace"), (16, "Alan Turing")):
+            first.add_guest(guest_id, name, "guest@example.com")
+        event_id = first.add_event(None, "Launch", "Weddings", "2031-05-01", "Hall", "Gold")
+        first.add_event_members(event_id, "guests", [16, 8])
+        second.refresh()
+        # 8 and 16 share a hash slot, so sets built in a different order iterate differently. That must not
+        # change the version.
+        second.store("events")[event_id]['guests'] = {8, 16}
+        assert list(first.store("events")[event_id]['guests']) != list(second.store("events")[event_id]['guests'])
+        assert first.version("events", event_id) == second.version("events", event_id)
+
+        version = second.version("events", event_id)
+        first.modify_event(event_id, "Launch party", "Weddings", "2031-05-01", "Hall", "Gold",
+                           first.version("events", event_id))
+        with pytest.raises(ConflictError):
+            second.modify_event(event_id, "Launch", "Birthdays", "2031-05-01", "Hall", "Gold", version)
+        assert second.store("events")[event_id]['name'] == "Launch party"
+    finally:
+        first.close()
+        second.close()